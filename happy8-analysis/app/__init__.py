@@ -23,6 +23,33 @@ def create_app(config_name=None):
     from app.utils.logger import setup_logger
     setup_logger(app)
     
+    # 开奖数据存储
+    from app.utils.draw_store import draw_store
+    draw_store.binary_enabled = app.config.get('HISTORY_BINARY_ENABLED', False)
+    
+    # 接口响应缓存
+    from app.utils.response_cache import response_cache
+    response_cache.configure(
+        max_entries=app.config.get('RESPONSE_CACHE_SIZE', 32),
+        shared_dir=app.config['RESPONSE_CACHE_DIR'] if app.config.get('RESPONSE_CACHE_SHARED') else None,
+        max_shared_files=app.config.get('RESPONSE_CACHE_SHARED_FILES', 64)
+    )
+    # 共享缓存文件会保留到重启之后，期间数据文件可能已在应用外被改写
+    response_cache.invalidate()
+    
+    # 推荐记录后台写入
+    from app.services.recommendation_journal import recommendation_journal
+    recommendation_journal.init_app(app)
+    
+    # 策略表现台账
+    from app.services.strategy_ledger import strategy_ledger
+    strategy_ledger.configure(app.config['STRATEGY_STATS_FILE'],
+                              app.config.get('STRATEGY_STATS_WINDOWS', (10, 50)))
+    
+    # 中奖概率与奖金表
+    from app.utils.odds import odds_table
+    odds_table.configure(app.config.get('PRIZE_TABLE', {}), app.config.get('TICKET_PRICE', 2))
+    
     # 注册路由
     from app.routes import register_routes
     register_routes(app)
@@ -4,15 +4,85 @@ Flask 路由模块
 """
 from flask import render_template, jsonify, request, current_app
 from datetime import datetime, timedelta
-from app.utils.data_loader import read_from_csv, fetch_data, save_manual_data
-from app.services.analyzer import get_analysis_results, load_recommendation_history
-from app.services.pattern import get_pattern_analysis
+from app.utils.data_loader import read_from_csv, fetch_data, save_manual_data, data_signature
+from app.utils.response_cache import response_cache, make_etag
+from app.services.analyzer import get_analysis_results, analyze_window_frequency, analyze_co_occurrence, query_recommendation_history, get_strategy_stats, model_version, score_strategies, optimize_ticket_set, get_ticket_odds
+from app.services.pattern import get_pattern_analysis, analyze_pattern_windows
 
 
 # 全局缓存
 cached_data = []
 
 
+def _build_data_body(limit, trend_format):
+    """
+    计算 /api/data 的响应体
+    
+    Args:
+        limit: 分析期数
+        trend_format: 走势图格式
+        
+    Returns:
+        bytes: 序列化后的 JSON，无开奖数据时返回 None
+    """
+    # 强制实时从本地 CSV 读取
+    current_app.logger.info(f'实时分析请求: limit={limit}')
+    data_from_file = read_from_csv(limit if limit > 50 else 50)
+    
+    if not data_from_file:
+        return None
+    
+    # 切片数据
+    data_to_analyze = data_from_file[:limit]
+    
+    # 分析数据
+    analysis = get_analysis_results(data_to_analyze, trend_format=trend_format)
+    
+    # 添加模式分析
+    pattern_results = get_pattern_analysis(data_to_analyze)
+    
+    return jsonify({
+        'history': data_to_analyze,
+        'analysis': analysis,
+        'pattern_analysis': pattern_results
+    }).get_data()
+
+
+def _parse_windows(default):
+    """
+    解析 windows 查询参数
+    
+    Args:
+        default: 未指定时的窗口列表
+        
+    Returns:
+        list: 期数列表（None 表示全部历史），参数不合法时返回 None
+    """
+    text = request.args.get('windows', '')
+    windows = []
+    for part in text.split(','):
+        part = part.strip().lower()
+        if not part:
+            continue
+        if part == 'all':
+            windows.append(None)
+        elif part.isdigit() and int(part) > 0:
+            windows.append(int(part))
+        else:
+            return None
+    windows = windows or list(default)
+    if len(windows) > current_app.config['FREQUENCY_MAX_WINDOWS']:
+        return None
+    return windows
+
+
+def _windows_error():
+    return jsonify({
+        'success': False,
+        'message': f"windows 必须是逗号分隔的正整数或 all，最多 {current_app.config['FREQUENCY_MAX_WINDOWS']} 个"
+    }), 400
+
+
 def register_routes(app):
     """注册所有路由"""
     
@@ -23,33 +93,32 @@ def register_routes(app):
     
     @app.route('/api/data')
     def get_data():
-        """获取分析数据（实时读取模式）"""
-        limit = request.args.get('limit', default=50, type=int)
-        
-        # 强制实时从本地 CSV 读取
-        current_app.logger.info(f'实时分析请求: limit={limit}')
-        data_from_file = read_from_csv(limit if limit > 50 else 50)
-        
-        if not data_from_file:
-            return jsonify({
-                'error': True,
-                'message': '无法获取开奖数据，请检查 data/happy8_history.csv'
-            }), 503
+        """获取分析数据（按数据版本缓存，支持 ETag/304）"""
+        # 参数取值有限，缓存的响应数随之有界
+        limit = min(max(request.args.get('limit', default=50, type=int), 1),
+                    current_app.config.get('DATA_MAX_LIMIT', 500))
+        trend_format = 'compact' if request.args.get('format') == 'compact' else 'full'
         
-        # 切片数据
-        data_to_analyze = data_from_file[:limit]
+        # 输出只取决于数据文件、请求参数和模型版本
+        etag = make_etag(data_signature(), limit, trend_format, model_version())
+        if request.if_none_match.contains(etag):
+            response_cache.record_not_modified()
+            response = current_app.response_class(status=304)
+        else:
+            body = response_cache.get(etag)
+            if body is None:
+                body = _build_data_body(limit, trend_format)
+                if body is None:
+                    return jsonify({
+                        'error': True,
+                        'message': '无法获取开奖数据，请检查 data/happy8_history.csv'
+                    }), 503
+                response_cache.put(etag, body)
+            response = current_app.response_class(body, mimetype='application/json')
         
-        # 分析数据
-        analysis = get_analysis_results(data_to_analyze)
-        
-        # 添加模式分析
-        pattern_results = get_pattern_analysis(data_to_analyze)
-        
-        return jsonify({
-            'history': data_to_analyze,
-            'analysis': analysis,
-            'pattern_analysis': pattern_results
-        })
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
     
     @app.route('/api/refresh')
     def refresh_data():
@@ -57,6 +126,7 @@ def register_routes(app):
         global cached_data
         
         limit = request.args.get('num', default=50, type=int)
+        trend_format = request.args.get('format', default='full')
         
         # 强制从网络重新获取
         temp_data = fetch_data(limit=limit, force_network=True)
@@ -70,7 +140,7 @@ def register_routes(app):
         
         # 更新缓存
         cached_data = temp_data
-        analysis = get_analysis_results(cached_data)
+        analysis = get_analysis_results(cached_data, trend_format=trend_format)
         pattern_results = get_pattern_analysis(cached_data)
         
         current_app.logger.info(f'成功刷新 {limit} 期数据')
@@ -82,21 +152,241 @@ def register_routes(app):
             'message': f'成功更新 {limit} 期数据'
         })
     
+    @app.route('/api/frequency')
+    def get_frequency():
+        """
+        任意窗口的号码出现次数
+        
+        参数: windows（逗号分隔的期数，如 10,20,50,100，all 表示全部历史），end（截止期号，默认最新一期）
+        """
+        windows = _parse_windows(current_app.config['FREQUENCY_WINDOWS'])
+        if windows is None:
+            return _windows_error()
+        
+        try:
+            return jsonify(analyze_window_frequency(windows, request.args.get('end') or None))
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+        except Exception as e:
+            current_app.logger.error(f'频率统计失败: {e}')
+            return jsonify({'success': False, 'message': str(e)}), 500
+    
+    @app.route('/api/patterns')
+    def get_patterns():
+        """
+        多窗口连号、同尾统计
+        
+        参数: windows（逗号分隔的期数，all 表示全部历史），end（截止期号，默认最新一期）
+        """
+        windows = _parse_windows(current_app.config['PATTERN_WINDOWS'])
+        if windows is None:
+            return _windows_error()
+        
+        try:
+            return jsonify(analyze_pattern_windows(windows, request.args.get('end') or None))
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+        except Exception as e:
+            current_app.logger.error(f'模式统计失败: {e}')
+            return jsonify({'success': False, 'message': str(e)}), 500
+    
+    @app.route('/api/co_occurrence')
+    def get_co_occurrence():
+        """
+        号码同出分析
+        
+        参数: numbers（0-2 个逗号分隔的号码），window（最近期数，默认全部历史），
+        end（截止期号），top（返回条数，默认 10，最多 50）
+        """
+        try:
+            numbers = [int(n) for n in request.args.get('numbers', '').split(',') if n.strip()]
+        except ValueError:
+            numbers = None
+        if numbers is None or len(numbers) > 2 or len(set(numbers)) != len(numbers) \
+                or any(not 1 <= n <= 80 for n in numbers):
+            return jsonify({'success': False, 'message': 'numbers 必须是 0-2 个不同的号码 (1-80)'}), 400
+        
+        window = request.args.get('window', type=int)
+        top = request.args.get('top', default=10, type=int)
+        if (window is not None and window <= 0) or not 1 <= top <= 50:
+            return jsonify({'success': False, 'message': 'window 必须是正整数，top 取值 1-50'}), 400
+        
+        try:
+            return jsonify(analyze_co_occurrence(numbers, window, request.args.get('end') or None, top))
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+        except Exception as e:
+            current_app.logger.error(f'同出分析失败: {e}')
+            return jsonify({'success': False, 'message': str(e)}), 500
+    
+    @app.route('/api/scores', methods=['GET', 'POST'])
+    def get_scores():
+        """
+        多策略号码评分与选号
+        
+        GET 参数: k（每个策略选号个数），strategies（逗号分隔，只返回这些默认策略）
+        POST JSON: {"strategies": {策略名: {特征名: 权重}}, "k": 10}，替换默认策略
+        """
+        config = current_app.config
+        body = request.get_json(silent=True) if request.method == 'POST' else None
+        if not isinstance(body, dict):
+            body = {}
+        k = body.get('k', request.args.get('k', config['SCORING_PICK_SIZE'], type=int))
+        strategies = body.get('strategies')
+        
+        if strategies is None:
+            strategies = config['SCORING_STRATEGIES']
+            names = request.args.get('strategies')
+            if names:
+                names = [n.strip() for n in names.split(',') if n.strip()]
+                strategies = {n: strategies[n] for n in names if n in strategies}
+        
+        valid = isinstance(strategies, dict) and 0 < len(strategies) <= config['SCORING_MAX_STRATEGIES'] \
+            and all(isinstance(w, dict) and all(isinstance(v, (int, float)) and not isinstance(v, bool)
+                                                for v in w.values())
+                    for w in strategies.values())
+        if not valid or not isinstance(k, int) or not 1 <= k <= 80:
+            return jsonify({
+                'success': False,
+                'message': f"strategies 必须是 1-{config['SCORING_MAX_STRATEGIES']} 组 {{特征名: 数值权重}}，k 取值 1-80"
+            }), 400
+        
+        data = read_from_csv(config['SCORING_HISTORY_PERIODS'])
+        if not data:
+            return jsonify({'success': False, 'message': '无开奖数据'}), 503
+        
+        try:
+            return jsonify(score_strategies(data, strategies, k))
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+        except Exception as e:
+            current_app.logger.error(f'号码评分失败: {e}')
+            return jsonify({'success': False, 'message': str(e)}), 500
+    
+    @app.route('/api/tickets')
+    def get_tickets():
+        """
+        多注号码组合优化
+        
+        参数: pool（逗号分隔的号码池）或 strategy（all_candidates 或评分策略名）+ pool_size，
+        k（每注号码个数，默认 5），tickets（注数，默认 5），objective（pairs / triples / hits）
+        """
+        config = current_app.config
+        try:
+            pool = [int(n) for n in request.args.get('pool', '').split(',') if n.strip()]
+        except ValueError:
+            pool = None
+        if pool is None or len(pool) > config['TICKET_MAX_POOL'] or any(not 1 <= n <= 80 for n in pool):
+            return jsonify({
+                'success': False,
+                'message': f"pool 必须是不超过 {config['TICKET_MAX_POOL']} 个号码 (1-80)"
+            }), 400
+        
+        k = request.args.get('k', default=5, type=int)
+        tickets = request.args.get('tickets', default=5, type=int)
+        pool_size = request.args.get('pool_size', default=config['TICKET_POOL_SIZE'], type=int)
+        if not 1 <= k <= 10 or not 1 <= tickets <= config['TICKET_MAX_TICKETS'] \
+                or not 1 <= pool_size <= config['TICKET_MAX_POOL']:
+            return jsonify({
+                'success': False,
+                'message': f"k 取值 1-10，tickets 取值 1-{config['TICKET_MAX_TICKETS']}，"
+                           f"pool_size 取值 1-{config['TICKET_MAX_POOL']}"
+            }), 400
+        
+        data = read_from_csv(config['SCORING_HISTORY_PERIODS'])
+        if not data:
+            return jsonify({'success': False, 'message': '无开奖数据'}), 503
+        
+        try:
+            return jsonify(optimize_ticket_set(
+                data,
+                pool=[str(n).zfill(2) for n in pool],
+                strategy=request.args.get('strategy') or None,
+                pool_size=pool_size,
+                k=k,
+                tickets=tickets,
+                objective=request.args.get('objective', 'pairs')
+            ))
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+        except Exception as e:
+            current_app.logger.error(f'多注组合优化失败: {e}')
+            return jsonify({'success': False, 'message': str(e)}), 500
+    
+    @app.route('/api/odds')
+    def get_odds():
+        """
+        中奖概率与期望收益
+        
+        参数: k（逗号分隔的玩法，如 5,10，默认选一至选十），
+        tickets（自选号码，注内逗号分隔、注间分号分隔，如 01,02,03;04,05）
+        """
+        try:
+            picks = [int(k) for k in request.args.get('k', '').split(',') if k.strip()]
+            tickets = [
+                [str(int(n)).zfill(2) for n in ticket.split(',') if n.strip()]
+                for ticket in request.args.get('tickets', '').split(';') if ticket.strip()
+            ]
+        except ValueError:
+            picks = tickets = None
+        if picks is None or any(not 1 <= k <= 10 for k in picks) \
+                or any(not 1 <= len(set(t)) == len(t) <= 10 or any(not 1 <= int(n) <= 80 for n in t)
+                       for t in tickets):
+            return jsonify({
+                'success': False,
+                'message': 'k 取值 1-10；tickets 每注为 1-10 个不同的号码 (1-80)'
+            }), 400
+        
+        try:
+            data = read_from_csv(current_app.config['DEFAULT_LIMIT'])
+            return jsonify(get_ticket_odds(data, picks, tickets))
+        except Exception as e:
+            current_app.logger.error(f'中奖概率计算失败: {e}')
+            return jsonify({'success': False, 'message': str(e)}), 500
+    
     @app.route('/api/history')
     def get_history():
-        """获取推荐历史和验证记录"""
-        history = load_recommendation_history()
+        """
+        获取推荐历史和验证记录（按期号倒序分页）
         
-        # 将字典转换为列表并按期号倒序排序
-        history_list = []
-        for period, data in history.items():
-            data['period'] = period
-            history_list.append(data)
+        参数: page, page_size, cursor, start, end, strategies（逗号分隔）
+        总数和下一页游标通过 X-Total-Count / X-Next-Cursor 响应头返回
+        """
+        config = current_app.config
+        page = max(request.args.get('page', 1, type=int), 1)
+        page_size = request.args.get('page_size', config['HISTORY_PAGE_SIZE'], type=int)
+        page_size = min(max(page_size, 1), config['HISTORY_MAX_PAGE_SIZE'])
+        strategies = request.args.get('strategies')
+        if strategies is not None:
+            strategies = {s.strip() for s in strategies.split(',') if s.strip()}
         
-        # 按期号倒序
-        history_list.sort(key=lambda x: x['period'], reverse=True)
+        history_list, total, next_cursor = query_recommendation_history(
+            start=request.args.get('start') or None,
+            end=request.args.get('end') or None,
+            cursor=request.args.get('cursor') or None,
+            page=page,
+            page_size=page_size,
+            strategies=strategies
+        )
         
-        return jsonify(history_list)
+        response = jsonify(history_list)
+        response.headers['X-Total-Count'] = str(total)
+        if next_cursor:
+            response.headers['X-Next-Cursor'] = next_cursor
+        return response
+    
+    @app.route('/api/strategies/stats')
+    def strategies_stats():
+        """
+        各推荐策略的累计命中统计（排行榜）
+        
+        参数: window，按该滑动窗口的命中率排序（默认按累计命中率）
+        """
+        try:
+            return jsonify(get_strategy_stats(request.args.get('window', type=int)))
+        except Exception as e:
+            current_app.logger.error(f'获取策略统计失败: {e}')
+            return jsonify({'success': False, 'message': str(e)}), 500
     
     @app.route('/api/submit_data', methods=['POST'])
     def submit_data():
@@ -144,6 +434,8 @@ def register_routes(app):
         """获取调度器状态"""
         from app.services.scheduler import scheduler
         from app.services.auto_updater import auto_updater
+        from app.services.fetch_engine import fetch_engine
+        from app.utils.single_flight import single_flight
         
         if not scheduler.scheduler:
             return jsonify({
@@ -155,7 +447,10 @@ def register_routes(app):
             'enabled': True,
             'running': scheduler.scheduler.running,
             'jobs': scheduler.get_jobs(),
-            'updater_status': auto_updater.get_status()
+            'updater_status': auto_updater.get_status(),
+            'sources': fetch_engine.get_status(),
+            'single_flight': dict(single_flight.stats),
+            'response_cache': dict(response_cache.stats)
         })
     
     @app.route('/health')
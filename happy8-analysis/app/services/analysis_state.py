@@ -0,0 +1,270 @@
+"""
+增量分析状态
+常驻内存的遗漏计数、热号滑动窗口、重号/AC值/尾数滚动统计，
+新开奖只做 O(80) 的增量更新，仪表盘读取时直接返回当前状态
+"""
+import threading
+from collections import Counter, deque
+
+from flask import current_app
+
+from app.utils.bitmask import (
+    NUMBER_COUNT, TAIL_MASKS, encode, popcount, difference_mask
+)
+from app.utils.data_loader import data_version
+
+
+# 重号分析的期数（与 analyze_repeat_numbers 一致）
+REPEAT_PERIODS = 10
+
+
+def _ac_value(mask):
+    """位图的 AC 值（与 pattern.calculate_ac_value 一致）"""
+    count = popcount(mask)
+    if count < 2:
+        return 0
+    return popcount(difference_mask(mask)) - (count - 1)
+
+
+class AnalysisState:
+    """
+    按期号增量维护的分析状态
+
+    状态对应一段按时间连续的开奖历史（最新期号为 latest_period，共 count 期），
+    传入的 data（按期号倒序）以最新期号对齐，并以开奖数据版本 (最新期号, 总期数) 校验：
+    - 最新期号和数据版本都未变：直接读取
+    - data 更新，且总期数的增量恰为新增期数：只应用新增的几期
+    - data 更长、无法对齐或数据版本无法由新增期数解释（如中间补录了期号）：用 data 重建
+    - data 比状态旧（如历史切片）：返回 None，由调用方直接计算
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.reset()
+
+    def reset(self, windows=(20, 30, 50)):
+        """
+        清空状态
+
+        Args:
+            windows: (热号期数, 尾数分析期数, AC值分析期数)
+        """
+        with self._lock:
+            self.windows = windows
+            self.latest_period = None
+            self.count = 0
+            # 建立状态时的开奖数据版本，见 data_loader.data_version
+            self.version = None
+            # 号码 -> 当前遗漏期数、最近一次出现在该期号码中的位置、号码字符串
+            self._omission = [0] * (NUMBER_COUNT + 1)
+            self._hit_pos = [0] * (NUMBER_COUNT + 1)
+            self._labels = [None] * (NUMBER_COUNT + 1)
+            # 滑动窗口（左端为最新一期）
+            self._hot_window = deque()
+            self._hot_counts = [0] * (NUMBER_COUNT + 1)
+            self._tail_window = deque()
+            self._tail_counts = [0] * 10
+            self._ac_window = deque()
+            self._repeats = deque()
+            self._last_mask = None
+
+    def push(self, item):
+        """
+        应用一期新开奖（必须比当前最新期号更新）
+
+        Args:
+            item: 开奖数据，包含 period, numbers
+        """
+        hot_periods, tail_periods, ac_periods = self.windows
+        period = str(item['period']).strip()
+        numbers = [int(n) for n in item['numbers']]
+        mask = encode(numbers)
+
+        with self._lock:
+            # 遗漏：全部 +1，开出的号码归零
+            omission = self._omission
+            for n in range(1, NUMBER_COUNT + 1):
+                omission[n] += 1
+            for pos, (n, label) in reversed(list(enumerate(zip(numbers, item['numbers'])))):
+                omission[n] = 0
+                self._hit_pos[n] = pos
+                self._labels[n] = label
+
+            # 热号窗口
+            self._hot_window.appendleft(numbers)
+            for n in numbers:
+                self._hot_counts[n] += 1
+            if len(self._hot_window) > hot_periods:
+                for n in self._hot_window.pop():
+                    self._hot_counts[n] -= 1
+
+            # 尾数窗口
+            tails = [popcount(mask & TAIL_MASKS[tail]) for tail in range(10)]
+            self._tail_window.appendleft(tails)
+            for tail in range(10):
+                self._tail_counts[tail] += tails[tail]
+            if len(self._tail_window) > tail_periods:
+                for tail, count in enumerate(self._tail_window.pop()):
+                    self._tail_counts[tail] -= count
+
+            # AC值窗口
+            self._ac_window.appendleft({'period': item['period'], 'ac_value': _ac_value(mask)})
+            if len(self._ac_window) > ac_periods:
+                self._ac_window.pop()
+
+            # 与上期的重号
+            if self._last_mask is not None:
+                repeats = mask & self._last_mask
+                self._repeats.appendleft((item['period'], popcount(repeats), repeats))
+                if len(self._repeats) > REPEAT_PERIODS:
+                    self._repeats.pop()
+
+            self._last_mask = mask
+            self.latest_period = period
+            self.count += 1
+
+    def rebuild(self, data, windows=None, version=None):
+        """用 data（按期号倒序）重建状态"""
+        with self._lock:
+            self.reset(windows or self.windows)
+            for item in reversed(data):
+                self.push(item)
+            self.version = version
+
+    def sync(self, data, windows=None):
+        """
+        将状态与 data 对齐
+
+        Args:
+            data: 历史数据列表（按期号倒序）
+            windows: 窗口期数，默认读取配置
+
+        Returns:
+            bool: 状态能否代表 data（False 时调用方应直接计算）
+        """
+        if not data:
+            return False
+        windows = windows or _config_windows()
+        version = data_version()
+        head = str(data[0]['period']).strip()
+
+        with self._lock:
+            if windows != self.windows:
+                self.reset(windows)
+
+            if self.count:
+                # 状态的最新期号在 data 中的位置，即 data 新增的期数
+                added = next((k for k, item in enumerate(data)
+                              if str(item['period']).strip() == self.latest_period), None)
+
+                if added is not None and self._appended(version, added):
+                    for new_item in reversed(data[:added]):
+                        self.push(new_item)
+                    self.version = version
+                    if len(data) <= self.count:
+                        return True
+                elif not _is_newer_or_same(head, self.latest_period):
+                    return False
+
+            self.rebuild(data, windows, version)
+            return True
+
+    def _appended(self, version, added):
+        """数据版本的变化是否只是在最新一端追加了 added 期"""
+        if version == self.version:
+            return True
+        if self.version is None:
+            return False
+        return version[1] - self.version[1] == added
+
+    @staticmethod
+    def _covers(window, data_len, size):
+        """窗口是否恰好等于 data[:size]"""
+        return len(window) == min(data_len, size)
+
+    def omission(self, data):
+        """
+        当前遗漏（与 current_omission(draw_masks(data)) 相同）
+
+        Returns:
+            list: 长度 81 的遗漏列表，状态无法代表 data 时返回 None
+        """
+        with self._lock:
+            if not self.sync(data):
+                return None
+            limit = len(data)
+            values = [min(v, limit) for v in self._omission]
+            values[0] = 0
+            return values
+
+    def hot_counter(self, data):
+        """
+        最近热号期数内的号码计数（键顺序与按 data 顺序统计的 Counter 相同）
+
+        Returns:
+            Counter: 状态无法代表 data 时返回 None
+        """
+        with self._lock:
+            if not self.sync(data) or \
+                    not self._covers(self._hot_window, len(data), self.windows[0]):
+                return None
+            hit = [n for n in range(1, NUMBER_COUNT + 1) if self._hot_counts[n]]
+            # 最新一期中靠前的号码先出现
+            hit.sort(key=lambda n: (self._omission[n], self._hit_pos[n]))
+            return Counter({self._labels[n]: self._hot_counts[n] for n in hit})
+
+    def repeat_pairs(self, data):
+        """
+        最近 10 期与上期的重号
+
+        Returns:
+            list: (期号, 重号个数, 重号位图)，最新在前；状态无法代表 data 时返回 None
+        """
+        with self._lock:
+            if not self.sync(data) or \
+                    not self._covers(self._repeats, max(len(data) - 1, 0), REPEAT_PERIODS):
+                return None
+            return list(self._repeats)
+
+    def tail_counts(self, data):
+        """
+        尾数分析期数内各尾数的出现次数
+
+        Returns:
+            list: 长度 10，状态无法代表 data 时返回 None
+        """
+        with self._lock:
+            if not self.sync(data) or \
+                    not self._covers(self._tail_window, len(data), self.windows[1]):
+                return None
+            return list(self._tail_counts)
+
+    def ac_values(self, data):
+        """
+        AC值分析期数内每期的 AC 值
+
+        Returns:
+            list: [{'period', 'ac_value'}]，最新在前；状态无法代表 data 时返回 None
+        """
+        with self._lock:
+            if not self.sync(data) or \
+                    not self._covers(self._ac_window, len(data), self.windows[2]):
+                return None
+            return [dict(item) for item in self._ac_window]
+
+
+def _config_windows():
+    config = current_app.config
+    return (config['HOT_NUMBER_PERIODS'], config['PATTERN_ANALYSIS_PERIODS'],
+            config['AC_ANALYSIS_PERIODS'])
+
+
+def _is_newer_or_same(period, other):
+    try:
+        return int(period) >= int(other)
+    except (TypeError, ValueError):
+        return False
+
+
+# 全局实例
+analysis_state = AnalysisState()
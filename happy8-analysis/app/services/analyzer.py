@@ -4,9 +4,23 @@
 """
 from collections import Counter
 from flask import current_app
+import base64
 import json
 import os
-from datetime import datetime
+import numpy as np
+from app.utils.bitmask import draw_masks, encode, popcount, to_labels
+from app.utils.omission_matrix import current_omission_vector, trend_matrix
+from app.utils.odds import odds_table
+from app.utils.score_engine import label_vector, number_features, weight_matrix, top_numbers
+from app.utils import sqlite_store
+from app.utils.data_loader import data_version, read_from_csv
+from app.utils.history_index import history_index
+from app.services.analysis_state import analysis_state
+from app.services.frequency_index import frequency_index
+from app.services.co_occurrence import co_occurrence_index
+from app.services.recommendation_journal import recommendation_journal, build_validation
+from app.services.strategy_ledger import strategy_ledger
+from app.services.ticket_optimizer import optimize_tickets
 
 # ML预测器(可选,如果模型未训练则跳过)
 try:
@@ -17,25 +31,30 @@ except Exception as e:
     ml_predictor = None
 
 
+def model_version():
+    """当前使用的ML模型版本，未加载模型时为 None"""
+    if ML_AVAILABLE and ml_predictor and ml_predictor.is_trained:
+        return ml_predictor.model_version
+    return None
+
+
 def analyze_omission(data):
     """
     分析号码遗漏
     
+    遗漏值为号码距最近一次出现的期数（data[0] 为最新一期），
+    优先读取增量维护的 analysis_state
+    
     Args:
         data: 历史数据列表
         
     Returns:
         dict: 包含遗漏数据和排行的字典
     """
-    omission = {str(i).zfill(2): 0 for i in range(1, 81)}
-    
-    for item in data:
-        for num in range(1, 81):
-            num_str = str(num).zfill(2)
-            if num_str in item['numbers']:
-                omission[num_str] = 0
-            else:
-                omission[num_str] += 1
+    omission_list = analysis_state.omission(data)
+    if omission_list is None:
+        omission_list = current_omission_vector(data)
+    omission = {str(i).zfill(2): omission_list[i] for i in range(1, 81)}
     
     # 排序
     sorted_omission = sorted(omission.items(), key=lambda x: x[1], reverse=True)
@@ -56,12 +75,14 @@ def analyze_hot_numbers(data):
     Returns:
         dict: 包含热号数据和排行的字典
     """
-    periods = current_app.config['HOT_NUMBER_PERIODS']
-    counter = Counter()
-    
-    for item in data[:periods]:
-        for num in item['numbers']:
-            counter[num] += 1
+    counter = analysis_state.hot_counter(data)
+    if counter is None:
+        periods = current_app.config['HOT_NUMBER_PERIODS']
+        counter = Counter()
+        
+        for item in data[:periods]:
+            for num in item['numbers']:
+                counter[num] += 1
     
     hot_list = counter.most_common(10)
     
@@ -84,21 +105,20 @@ def analyze_repeat_numbers(data):
     if len(data) < 2:
         return {'recent_repeats': [], 'avg_repeat_count': 0}
     
-    repeat_counts = []
-    recent_repeats = []
-    
-    for i in range(min(10, len(data) - 1)):
-        current = set(data[i]['numbers'])
-        previous = set(data[i + 1]['numbers'])
-        repeats = list(current & previous)
-        
-        repeat_counts.append(len(repeats))
-        if i < 5:
-            recent_repeats.append({
-                'period': data[i]['period'],
-                'count': len(repeats),
-                'numbers': sorted(repeats)
-            })
+    # (期号, 重号个数, 重号位图)
+    pairs = analysis_state.repeat_pairs(data)
+    if pairs is None:
+        masks = draw_masks(data[:11])
+        pairs = []
+        for i in range(min(10, len(data) - 1)):
+            repeats = masks[i] & masks[i + 1]
+            pairs.append((data[i]['period'], popcount(repeats), repeats))
+    
+    repeat_counts = [count for _, count, _ in pairs]
+    recent_repeats = [
+        {'period': period, 'count': count, 'numbers': to_labels(repeats)}
+        for period, count, repeats in pairs[:5]
+    ]
     
     avg_count = sum(repeat_counts) / len(repeat_counts) if repeat_counts else 0
     
@@ -108,49 +128,68 @@ def analyze_repeat_numbers(data):
     }
 
 
-def generate_recommendations(data, omission, hot_numbers):
+def candidate_pool(omission_top, hot_top):
     """
-    生成推荐号码
+    智能选号池（与 build_recommendations 中的 all_candidates 相同）
     
     Args:
-        data: 历史数据
-        omission: 遗漏分析结果
-        hot_numbers: 热号分析结果
+        omission_top: 遗漏值从大到小的号码
+        hot_top: 出现次数从多到少的号码
+        
+    Returns:
+        list: 号码列表（升序）
+    """
+    # 与 build_recommendations 相同的输入截断
+    omission_top = list(omission_top[:5])
+    hot_top = list(hot_top[:10])
+    return sorted(list(set(omission_top[:8] + hot_top[:8])))
+
+
+def build_recommendations(omission_top, hot_top):
+    """
+    由遗漏排行和热号排行生成各策略推荐（不依赖应用上下文，回测与实时推荐共用）
+    
+    Args:
+        omission_top: 遗漏值从大到小的号码（至少 5 个）
+        hot_top: 出现次数从多到少的号码（至多 10 个）
         
     Returns:
         dict: 各种推荐策略的号码
     """
     # 胆码：结合遗漏和热度
-    omission_top = [item['number'] for item in omission['top10'][:5]]
-    hot_top = [item['number'] for item in hot_numbers['top10'][:10]]
+    omission_top = list(omission_top[:5])
+    hot_top = list(hot_top[:10])
     
     # 使用 sorted 确保确定性
     banker_codes = sorted(list(set(omission_top[:3] + hot_top[:3])))[:5]
     
     # 智能选号池
-    all_candidates = sorted(list(set(omission_top[:8] + hot_top[:8])))
+    all_candidates = candidate_pool(omission_top, hot_top)
     
     # 选十推荐
     smart_pick10 = []
-    smart_pick10.extend([item['number'] for item in hot_numbers['top10'][:7]])
+    smart_pick10.extend(hot_top[:7])
+    selected = set(smart_pick10)
     
-    cold = [item['number'] for item in omission['top10'][:5]]
+    cold = omission_top[:5]
     for c in cold:
-        if c not in smart_pick10:
+        if c not in selected:
             smart_pick10.append(c)
+            selected.add(c)
         if len(smart_pick10) >= 10:
             break
     
     # 补足10个
     for cand in all_candidates:
-        if cand not in smart_pick10:
+        if cand not in selected:
             smart_pick10.append(cand)
+            selected.add(cand)
         if len(smart_pick10) >= 10:
             break
     
     smart_pick10 = sorted(smart_pick10[:10])
     
-    recommendations = {
+    return {
         'banker_codes': banker_codes[:3],
         'pick4_3dan': sorted(list(set(hot_top[:5]))[:3]),
         'pick5_4dan': sorted(list(set(hot_top[:6]))[:4]),
@@ -160,6 +199,152 @@ def generate_recommendations(data, omission, hot_numbers):
         'smart_pick7': sorted(all_candidates[:7]),
         'smart_pick10': smart_pick10
     }
+
+
+def analyze_window_frequency(windows, end_period=None):
+    """
+    多个窗口的号码出现次数（读取前缀和索引，每个窗口 O(80)）
+    
+    Args:
+        windows: 期数列表，如 [10, 20, 50, 100]，None 表示全部历史
+        end_period: 截止期号（含），默认为最新一期
+        
+    Returns:
+        dict: 各窗口的出现次数和排行
+    """
+    frequency_index.sync(data_version(), read_from_csv)
+    end_period = frequency_index.resolve_period(end_period)
+    labels = [str(i).zfill(2) for i in range(1, 81)]
+    
+    result = {}
+    for window, (periods, counts) in frequency_index.window_counts(windows, end_period).items():
+        # 次数相同时号码小的在前
+        order = np.argsort(-counts, kind='stable')[:10]
+        result['all' if window is None else str(window)] = {
+            'periods': periods,
+            'data': dict(zip(labels, counts.tolist())),
+            'top10': [{'number': labels[i], 'count': int(counts[i])} for i in order]
+        }
+    
+    return {
+        'latest_period': frequency_index.latest_period,
+        'total_periods': len(frequency_index),
+        'end_period': end_period,
+        'windows': result
+    }
+
+
+def co_occurrence_history(data, numbers, limit=10):
+    """
+    指定号码在最近各期中的同出情况
+    
+    Args:
+        data: 历史数据列表
+        numbers: 号码列表（如最热 6 码）
+        limit: 最多返回的期数
+        
+    Returns:
+        list: [{'period', 'hits', 'hit_numbers'}]，只包含同出个数达到 CO_OCCURRENCE_MIN_HITS 的期号，最新在前
+    """
+    min_hits = current_app.config.get('CO_OCCURRENCE_MIN_HITS', 3)
+    target = encode(numbers)
+    periods = current_app.config['HOT_NUMBER_PERIODS']
+    
+    history = []
+    for item, mask in zip(data[:periods], draw_masks(data[:periods])):
+        common = mask & target
+        if popcount(common) >= min_hits:
+            history.append({'period': item['period'], 'hits': popcount(common),
+                            'hit_numbers': to_labels(common)})
+            if len(history) >= limit:
+                break
+    return history
+
+
+def analyze_co_occurrence(numbers=None, window=None, end_period=None, top=10):
+    """
+    号码同出分析（读取增量维护的同出索引）
+    
+    - 不指定号码：同出次数最多的号码对和三码组合
+    - 指定 1 个号码：与它同出次数最多的号码
+    - 指定 2 个号码：两者同出的次数，以及与这一对三码同出最多的号码
+    
+    Args:
+        numbers: 号码列表（0-2 个，如 ['07', '21']）
+        window: 最近期数，None 表示全部历史
+        end_period: 截止期号（含），默认为最新一期
+        top: 返回的条数
+        
+    Returns:
+        dict: 同出分析结果
+    """
+    co_occurrence_index.sync(data_version(), read_from_csv)
+    end_period = co_occurrence_index.resolve_period(end_period)
+    labels = [str(i).zfill(2) for i in range(1, 81)]
+    numbers = [int(n) - 1 for n in numbers or []]
+    
+    periods, pairs = co_occurrence_index.pair_matrix(window, end_period)
+    result = {
+        'latest_period': co_occurrence_index.latest_period,
+        'end_period': end_period,
+        'periods': periods
+    }
+    
+    if not numbers:
+        # 号码对按 (a, b) 字典序排列，次数相同时号码小的在前
+        first, second = np.triu_indices(80, 1)
+        counts = pairs[first, second]
+        order = np.argsort(-counts, kind='stable')[:top]
+        result['pairs'] = [
+            {'numbers': [labels[first[i]], labels[second[i]]], 'count': int(counts[i])}
+            for i in order
+        ]
+        
+        _, triples = co_occurrence_index.triple_counts(window, end_period)
+        kth = np.partition(triples, -top)[-top] if top < len(triples) else 0
+        candidates = np.flatnonzero(triples >= max(kth, 1))
+        candidates = candidates[np.lexsort((candidates, -triples[candidates]))][:top]
+        result['triples'] = [
+            {'numbers': [labels[code // 6400], labels[code // 80 % 80], labels[code % 80]],
+             'count': int(triples[code])}
+            for code in candidates.tolist()
+        ]
+        return result
+    
+    if len(numbers) == 1:
+        n = numbers[0]
+        counts = pairs[n].copy()
+        counts[n] = -1
+        result['number'] = labels[n]
+        result['appearances'] = int(pairs[n, n])
+    else:
+        a, b = sorted(numbers[:2])
+        _, counts = co_occurrence_index.triple_partners(a, b, window, end_period)
+        counts[[a, b]] = -1
+        result['numbers'] = [labels[a], labels[b]]
+        result['together'] = int(pairs[a, b])
+    
+    order = np.argsort(-counts, kind='stable')[:top]
+    result['partners'] = [{'number': labels[i], 'count': int(counts[i])} for i in order if counts[i] > 0]
+    return result
+
+
+def generate_recommendations(data, omission, hot_numbers):
+    """
+    生成推荐号码
+    
+    Args:
+        data: 历史数据
+        omission: 遗漏分析结果
+        hot_numbers: 热号分析结果
+        
+    Returns:
+        dict: 各种推荐策略的号码
+    """
+    recommendations = build_recommendations(
+        [item['number'] for item in omission['top10']],
+        [item['number'] for item in hot_numbers['top10']]
+    )
     
     # 添加ML推荐(如果可用)
     if ML_AVAILABLE and ml_predictor and ml_predictor.is_trained:
@@ -179,6 +364,8 @@ def generate_trend_rows(data, limit=50):
     """
     生成走势图行数据
     
+    命中和遗漏由 omission_matrix 一次性向量化计算
+    
     Args:
         data: 历史数据
         limit: 返回的行数限制
@@ -190,46 +377,55 @@ def generate_trend_rows(data, limit=50):
         return []
     
     # 预热数据
-    warmup = 50
-    total_needed = limit + warmup
+    periods, _, omission = trend_matrix(data, limit=limit, warmup=50)
     
-    # 按时间正序排列
-    effective_data = data[:total_needed][::-1]
+    # 遗漏为 0 即当期命中；每个单元格单独建字典，调用方修改某一行不会影响其他行
+    rows = []
+    for period, omission_row in zip(periods, omission.tolist()):
+        rows.append({
+            'period': period,
+            'data': {n: {'hit': v == 0, 'omission': v} for n, v in enumerate(omission_row, 1)}
+        })
     
-    # 初始化遗漏计数器
-    current_omission = {str(i).zfill(2): 0 for i in range(1, 81)}
+    return rows
+
+
+def generate_trend_compact(data, limit=50):
+    """
+    生成紧凑格式的走势图行数据（?format=compact）
     
-    rows = []
+    每行包含：
+    - hits: 80 位命中位图的十六进制字符串（20 位，号码 n 对应第 n-1 位）
+    - omission: 80 个号码遗漏值的 base64（每个值 omission_width 字节，小端）
     
-    for idx, row in enumerate(effective_data):
-        period = row['period']
-        winning_numbers = set(row['numbers'])
-        
-        row_data = {}
-        for i in range(1, 81):
-            num_str = str(i).zfill(2)
-            is_hit = num_str in winning_numbers
-            
-            if is_hit:
-                current_omission[num_str] = 0
-                cell_data = {'hit': True, 'omission': 0}
-            else:
-                current_omission[num_str] += 1
-                cell_data = {'hit': False, 'omission': current_omission[num_str]}
-            
-            row_data[i] = cell_data
+    Args:
+        data: 历史数据
+        limit: 返回的行数限制
         
-        # 只收集请求数量的行
-        if idx >= len(effective_data) - limit:
-            rows.append({
-                'period': period,
-                'data': row_data
-            })
-    
-    return rows
+    Returns:
+        dict: {'format': 'compact', 'omission_width': 1 或 2, 'rows': [...]}
+    """
+    periods, hits, omission = trend_matrix(data, limit=limit, warmup=50) if data else ([], None, None)
+    if not periods:
+        return {'format': 'compact', 'omission_width': 1, 'rows': []}
+    
+    # 位图字节按小端排列，反转后即为整数的十六进制
+    packed = np.packbits(hits, axis=1, bitorder='little')
+    width = 1 if omission.max() <= 0xFF else 2
+    packed_omission = omission.astype('<u1' if width == 1 else '<u2')
+    
+    rows = [
+        {
+            'period': period,
+            'hits': hit_bytes[::-1].tobytes().hex(),
+            'omission': base64.b64encode(omission_row.tobytes()).decode('ascii')
+        }
+        for period, hit_bytes, omission_row in zip(periods, packed, packed_omission)
+    ]
+    return {'format': 'compact', 'omission_width': width, 'rows': rows}
 
 
-def generate_prediction_scores(hot_numbers, omission, limit=None):
+def generate_prediction_scores(hot_numbers, omission, limit=None, weights=None):
     """
     生成预测分数
     
@@ -237,85 +433,202 @@ def generate_prediction_scores(hot_numbers, omission, limit=None):
         hot_numbers: 热号分析结果
         omission: 遗漏分析结果
         limit: 返回数量限制
+        weights: 特征权重 {'hot': ..., 'omission': ...}，默认读取 PREDICTION_SCORE_WEIGHTS
         
     Returns:
-        list: 预测分数列表
+        list: 预测分数列表，按分数降序，同分时号码小的在前
     """
-    scores = []
-    hot_data = hot_numbers.get('data', {})
-    omission_data = omission.get('data', {})
+    if weights is None:
+        weights = current_app.config['PREDICTION_SCORE_WEIGHTS']
+    
+    names = ['hot', 'omission']
+    features = np.vstack([
+        label_vector(hot_numbers.get('data', {})),
+        label_vector(omission.get('data', {}))
+    ])
+    scores = (weight_matrix({'prediction': weights}, names) @ features)[0]
+    
+    labels = [str(i).zfill(2) for i in range(1, 81)]
+    order = top_numbers(scores, limit or len(scores))
+    return [{'num': labels[i], 'score': scores[i].item()} for i in order]
+
+
+def score_strategies(data, strategies=None, k=None):
+    """
+    按多组特征权重同时为全部号码评分并选号（一次矩阵乘法得到所有策略的得分）
     
-    for i in range(1, 81):
-        num_str = str(i).zfill(2)
-        hot_val = hot_data.get(num_str, 0)
-        miss_val = omission_data.get(num_str, 0)
+    Args:
+        data: 历史数据列表（按期号倒序）
+        strategies: {策略名: {特征名: 权重}}，默认读取 SCORING_STRATEGIES
+        k: 每个策略的选号个数，默认 SCORING_PICK_SIZE
         
-        # 权重：热度优先，遗漏次要
-        score = (hot_val * 10) + (miss_val * 3)
-        scores.append({'num': num_str, 'score': score})
-    
-    # 按分数降序排列
-    sorted_scores = sorted(scores, key=lambda x: x['score'], reverse=True)
+    Returns:
+        dict: 特征名列表和各策略的选号、得分
+        
+    Raises:
+        ValueError: 权重中包含未知特征
+    """
+    config = current_app.config
+    strategies = strategies or config['SCORING_STRATEGIES']
+    k = k or config['SCORING_PICK_SIZE']
+    
+    # ML推理较慢，只在有策略使用 ml 特征时调用
+    probabilities = None
+    uses_ml = any(weights.get('ml') for weights in strategies.values())
+    if uses_ml and ML_AVAILABLE and ml_predictor and ml_predictor.is_trained:
+        try:
+            probabilities = ml_predictor.predict_probabilities(data)
+        except Exception as e:
+            current_app.logger.warning(f'ML概率预测失败: {e}')
+    
+    names, features = number_features(
+        data,
+        windows=config['SCORING_WINDOWS'],
+        hot_periods=config['HOT_NUMBER_PERIODS'],
+        co_window=config['SCORING_CO_OCCURRENCE_PERIODS'],
+        probabilities=probabilities
+    )
+    scores = weight_matrix(strategies, names) @ features
+    picks = top_numbers(scores, k)
+    
+    labels = [str(i).zfill(2) for i in range(1, 81)]
+    result = {}
+    for (name, weights), row, pick in zip(strategies.items(), scores, picks):
+        result[name] = {
+            'weights': weights,
+            'numbers': sorted(labels[i] for i in pick),
+            'scores': [{'num': labels[i], 'score': round(row[i].item(), 4)} for i in pick]
+        }
     
-    if limit:
-        return sorted_scores[:limit]
-    return sorted_scores
+    return {
+        'latest_period': data[0]['period'] if data else None,
+        'periods': len(data),
+        'features': names,
+        'ml_available': probabilities is not None,
+        'k': k,
+        'strategies': result
+    }
 
 
-def validate_recommendations(current_data):
+def optimize_ticket_set(data, pool=None, strategy=None, pool_size=None, k=5, tickets=5,
+                        objective='pairs'):
     """
-    验证历史推荐
-    对比已保存的推荐号码与实际开奖号码
+    在号码池内生成覆盖最优的多注号码
+    
+    Args:
+        data: 历史数据列表（按期号倒序）
+        pool: 号码池，不指定时由 strategy 生成
+        strategy: 'all_candidates'（智能选号池）或评分策略名（取得分前 pool_size 名），
+            默认 TICKET_POOL_STRATEGY
+        pool_size: 评分策略生成号码池的大小，默认 TICKET_POOL_SIZE
+        k: 每注号码个数
+        tickets: 注数
+        objective: 'pairs'、'triples' 或 'hits'
+        
+    Returns:
+        dict: 号码池来源、各注号码和覆盖统计
+        
+    Raises:
+        ValueError: 参数不合法或策略不存在
+    """
+    config = current_app.config
+    source = 'custom'
+    if not pool:
+        source = strategy or config['TICKET_POOL_STRATEGY']
+        if source == 'all_candidates':
+            # 与仪表盘相同的分析期数
+            recent = data[:config['DEFAULT_LIMIT']]
+            pool = candidate_pool(
+                [item['number'] for item in analyze_omission(recent)['top10']],
+                [item['number'] for item in analyze_hot_numbers(recent)['top10']]
+            )
+        else:
+            weights = config['SCORING_STRATEGIES'].get(source)
+            if weights is None:
+                raise ValueError(f'未知的评分策略: {source}')
+            scored = score_strategies(data, {source: weights}, pool_size or config['TICKET_POOL_SIZE'])
+            pool = scored['strategies'][source]['numbers']
+    
+    result = optimize_tickets(
+        pool, k, tickets, objective,
+        restarts=config['TICKET_RESTARTS'],
+        time_budget=config['TICKET_TIME_BUDGET'],
+        workers=config['TICKET_WORKERS']
+    )
+    result['source'] = source
+    result['latest_period'] = data[0]['period'] if data else None
+    return result
+
+
+# 胆拖推荐的实际玩法：策略 -> 选几（推荐号码全部作胆码，其余号码全拖）
+# 胆码推荐与选四 3胆全拖同为 3 个胆码，按选四计
+BANKER_PLAYS = {
+    'banker_codes': 4,
+    'pick4_3dan': 4,
+    'pick5_4dan': 5,
+}
+
+
+def get_ticket_odds(data, picks=None, tickets=None):
     """
-    history_file = current_app.config['RECOMMENDATIONS_FILE']
-    if not os.path.exists(history_file):
-        return
+    各玩法和各推荐号码的中奖概率、期望收益（查预先计算的概率表）
     
-    try:
-        with open(history_file, 'r', encoding='utf-8') as f:
-            history = json.load(f)
+    推荐号码优先读取仪表盘为下一期保存的推荐（含ML推荐），尚未保存时生成一次并保存
+    
+    Args:
+        data: 历史数据列表（按期号倒序），用于确定下一期期号
+        picks: 返回概率表的玩法（选几），默认选一至选十
+        tickets: 额外计算的号码列表，如 [['01', '02', '03']]
         
-        updated = False
-        # 遍历历史记录进行验证
-        for item in current_data:
-            period = str(item['period']).strip() # 强制转换并去除空格
-            if period in history:
-                # 即使已经有 validation，如果 actual_result 缺失也补上
-                if 'validation' not in history[period] or 'actual_result' not in history[period]:
-                    actual = item['numbers']
-                    recommendations = history[period].get('recommendations', {})
-                    
-                    validation = {}
-                    for key, predicted in recommendations.items():
-                        if isinstance(predicted, list):
-                            # 对比推荐号码与实际开奖号码
-                            hits = [n for n in predicted if n in actual]
-                            validation[key] = {
-                                'predicted': predicted,
-                                'hits': hits,
-                                'hit_count': len(hits),
-                                'hit_rate': f"{len(hits)/len(predicted)*100:.1f}%" if predicted else "0%"
-                            }
-                    
-                    history[period]['actual_result'] = actual
-                    history[period]['validation'] = validation
-                    updated = True
-                    current_app.logger.info(f"强制验证期号 {period} 成功")
+    Returns:
+        dict: {'tables', 'recommendations', 'tickets'}
+    """
+    picks = picks or list(range(1, 11))
+    result = {
+        'latest_period': data[0]['period'] if data else None,
+        'tables': {str(k): odds_table.summary(k) for k in picks}
+    }
+    
+    recommendations = {}
+    if data:
+        next_period = str(int(data[0]['period']) + 1)
+        records, _, _ = query_recommendation_history(next_period, next_period, page_size=1)
+        if records:
+            picks_by_strategy = records[0].get('recommendations', {})
+        else:
+            recent = data[:current_app.config['DEFAULT_LIMIT']]
+            picks_by_strategy = generate_recommendations(
+                recent, analyze_omission(recent), analyze_hot_numbers(recent))
+            save_recommendation(next_period, picks_by_strategy)
         
-        if updated:
-            with open(history_file, 'w', encoding='utf-8') as f:
-                json.dump(history, f, ensure_ascii=False, indent=2)
-                
-    except Exception as e:
-        current_app.logger.error(f"验证推荐失败: {e}")
+        for name, numbers in picks_by_strategy.items():
+            if not numbers:
+                continue
+            k = BANKER_PLAYS.get(name)
+            if k is not None and len(set(numbers)) < k:
+                recommendations[name] = odds_table.banker_ticket(numbers, k)
+            elif 1 <= len(numbers) <= 10:
+                recommendations[name] = odds_table.ticket(numbers)
+    result['recommendations'] = recommendations
+    result['tickets'] = [odds_table.ticket(numbers) for numbers in tickets or []]
+    return result
 
 
-def get_analysis_results(data):
+def validate_recommendations(current_data):
+    """
+    验证历史推荐
+    对比已保存的推荐号码与实际开奖号码（登记到写入队列，由后台线程批量写入）
+    """
+    recommendation_journal.record_actuals(current_data)
+
+
+def get_analysis_results(data, trend_format='full'):
     """
     获取完整的分析结果
     
     Args:
         data: 历史数据列表
+        trend_format: 走势图格式，'full' 或 'compact'（见 generate_trend_compact）
         
     Returns:
         dict: 完整的分析结果
@@ -353,10 +666,11 @@ def get_analysis_results(data):
         'last_period': data[0]['period'],  # 传出最新期号供前端显示
         'next_period': str(int(data[0]['period']) + 1),  # 预测期号
         'omission': omission,
-        'omission_data': {
-            'rows': generate_trend_rows(data),
-            'stats': omission['data']
-        },
+        'omission_data': dict(
+            generate_trend_compact(data) if trend_format == 'compact'
+            else {'rows': generate_trend_rows(data)},
+            stats=omission['data']
+        ),
         'hot_numbers': hot_numbers,
         'hot_nums': hot_numbers['top10'],
         'cold_nums': omission['top10'][:6],
@@ -366,7 +680,7 @@ def get_analysis_results(data):
         'least_common': [[item['number'], item['omission']] for item in omission['top10'][:10]],
         'co_occurrence': {
             'top_hot_nums': [item['number'] for item in hot_numbers['top10'][:6]],
-            'history': []
+            'history': co_occurrence_history(data, [item['number'] for item in hot_numbers['top10'][:6]])
         },
         'full_frequency': [[str(i).zfill(2), hot_numbers['data'].get(str(i).zfill(2), 0)] for i in range(1, 81)],
         'total_periods': len(data),
@@ -411,7 +725,7 @@ def get_analysis_results(data):
 
 def save_recommendation(period, recommendations):
     """
-    保存推荐到历史
+    保存推荐到历史（登记到写入队列，由后台线程批量写入）
     
     Args:
         period: 期号
@@ -421,24 +735,7 @@ def save_recommendation(period, recommendations):
         bool: 是否成功
     """
     try:
-        history_file = current_app.config['RECOMMENDATIONS_FILE']
-        
-        if os.path.exists(history_file):
-            with open(history_file, 'r', encoding='utf-8') as f:
-                history = json.load(f)
-        else:
-            history = {}
-        
-        history[period] = {
-            'date': datetime.now().strftime('%Y-%m-%d'),
-            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'recommendations': recommendations
-        }
-        
-        with open(history_file, 'w', encoding='utf-8') as f:
-            json.dump(history, f, ensure_ascii=False, indent=2)
-        
-        current_app.logger.info(f'保存期号 {period} 推荐成功')
+        recommendation_journal.record_recommendation(period, recommendations)
         return True
         
     except Exception as e:
@@ -446,14 +743,24 @@ def save_recommendation(period, recommendations):
         return False
 
 
-def load_recommendation_history():
+def load_recommendation_history(flush=True):
     """
     加载推荐历史
     
+    Args:
+        flush: 是否先等待队列中的推荐写入（持有策略台账锁时须为 False）
+        
     Returns:
         dict: 推荐历史
     """
     try:
+        # 先等待队列中的推荐写入，保证读到最新记录
+        if flush:
+            recommendation_journal.flush(timeout=5)
+        
+        if sqlite_store.is_enabled():
+            return sqlite_store.load_recommendation_history()
+        
         history_file = current_app.config['RECOMMENDATIONS_FILE']
         
         if os.path.exists(history_file):
@@ -464,3 +771,61 @@ def load_recommendation_history():
     except Exception as e:
         current_app.logger.error(f'加载历史失败: {e}')
         return {}
+
+
+def get_strategy_stats(sort_window=None):
+    """
+    各推荐策略的累计表现（读取增量维护的策略台账）
+    
+    Args:
+        sort_window: 按该滑动窗口的命中率排序，None 表示按累计命中率
+        
+    Returns:
+        dict: {'windows', 'validated_periods', 'strategies': [...]}
+    """
+    # 在持有台账锁之前等待写入队列，写入线程记入验证时需要同一把锁
+    recommendation_journal.flush(timeout=5)
+    # 首次使用时由完整历史建立台账，此后随验证增量更新
+    strategy_ledger.ensure(lambda: load_recommendation_history(flush=False))
+    return strategy_ledger.stats(sort_window)
+
+
+def query_recommendation_history(start=None, end=None, cursor=None, page=1, page_size=50,
+                                 strategies=None):
+    """
+    分页查询推荐历史（按期号倒序，只解析当页记录）
+
+    Args:
+        start: 起始期号（含）
+        end: 结束期号（含）
+        cursor: 游标，返回期号小于该值的记录（指定后忽略 page）
+        page: 页码，从 1 开始
+        page_size: 每页记录数
+        strategies: 只保留这些策略的推荐和验证，None 表示全部
+
+    Returns:
+        tuple: (记录列表, 期号范围内的总数, 下一页游标或 None)
+    """
+    offset = 0 if cursor else (page - 1) * page_size
+    try:
+        recommendation_journal.flush(timeout=5)
+
+        if sqlite_store.is_enabled():
+            items, total, next_cursor = sqlite_store.query_recommendation_history(
+                start, end, cursor, offset, page_size)
+        else:
+            items, total, next_cursor = history_index.query(
+                current_app.config['RECOMMENDATIONS_FILE'], start, end, cursor, offset, page_size)
+    except Exception as e:
+        current_app.logger.error(f'加载历史失败: {e}')
+        return [], 0, None
+
+    records = []
+    for period, record in items:
+        if strategies is not None:
+            for field in ('recommendations', 'validation'):
+                if field in record:
+                    record[field] = {k: v for k, v in record[field].items() if k in strategies}
+        record['period'] = period
+        records.append(record)
+    return records, total, next_cursor
@@ -1,10 +1,43 @@
 """
 自动数据更新服务
 定期从网络获取最新的快乐8开奖数据
+只获取本地缺失的期数（缺口较大时分页），按期号增量合并
 """
 from datetime import datetime
 from flask import current_app
-from app.utils.data_loader import fetch_from_network, save_to_csv, read_from_csv
+from app.utils.data_loader import fetch_from_network, merge_history, read_from_csv
+
+
+# 每年最多开奖期数（跨年时按上限估算缺口，宁多勿少）
+MAX_PERIODS_PER_YEAR = 366
+
+
+def estimate_period_gap(local_period, remote_period):
+    """
+    估算本地与网络最新期号之间缺失的期数
+
+    期号格式为 年份 + 3 位序号（如 2024001），同年直接相减，
+    跨年时按每年最多期数估算上限
+
+    Args:
+        local_period: 本地最新期号
+        remote_period: 网络最新期号
+
+    Returns:
+        int: 缺失期数（估算值，可能偏大），无法解析时返回 None
+    """
+    try:
+        local_year, local_seq = divmod(int(local_period), 1000)
+        remote_year, remote_seq = divmod(int(remote_period), 1000)
+    except (TypeError, ValueError):
+        return None
+
+    if remote_year == local_year:
+        return max(0, remote_seq - local_seq)
+    if remote_year < local_year:
+        return 0
+    return (remote_year - local_year - 1) * MAX_PERIODS_PER_YEAR + \
+        max(0, MAX_PERIODS_PER_YEAR - local_seq) + remote_seq
 
 
 class AutoUpdater:
@@ -13,6 +46,7 @@ class AutoUpdater:
     def __init__(self):
         self.last_update_time = None
         self.last_period = None
+        self.last_added = 0
     
     def check_and_update(self):
         """检查并更新数据"""
@@ -23,8 +57,8 @@ class AutoUpdater:
             local_data = read_from_csv(limit=1)
             local_period = local_data[0]['period'] if local_data else None
             
-            # 从网络获取最新数据
-            network_data = fetch_from_network(limit=10)
+            # 只获取网络最新一期，比较期号
+            network_data = fetch_from_network(limit=1, force=True)
             
             if not network_data:
                 current_app.logger.warning('无法从网络获取数据')
@@ -33,18 +67,28 @@ class AutoUpdater:
             network_period = network_data[0]['period']
             
             # 检查是否有新数据
-            if local_period and network_period == local_period:
+            if local_period and int(network_period) <= int(local_period):
                 current_app.logger.info(f'数据已是最新 (期号: {local_period})')
                 return False
             
-            # 发现新数据,获取完整历史并保存
-            current_app.logger.info(f'发现新数据! 本地: {local_period}, 网络: {network_period}')
-            full_data = fetch_from_network(limit=100)
+            # 发现新数据,只获取缺失的期数并按期号合并
+            gap = estimate_period_gap(local_period, network_period)
+            current_app.logger.info(f'发现新数据! 本地: {local_period}, 网络: {network_period}, 缺失约 {gap} 期')
             
-            if full_data and save_to_csv(full_data):
+            if gap == 1:
+                missing = network_data
+            else:
+                missing = self._fetch_missing(local_period, gap)
+            if not missing:
+                current_app.logger.info(f'未获取到 {local_period} 之后的开奖数据，新增 0 期')
+                return False
+            added = merge_history(missing)
+            
+            if added >= 0:
                 self.last_update_time = datetime.now()
                 self.last_period = network_period
-                current_app.logger.info(f'✓ 数据更新成功! 最新期号: {network_period}')
+                self.last_added = added
+                current_app.logger.info(f'✓ 数据更新成功! 新增 {added} 期, 最新期号: {network_period}')
                 return True
             else:
                 current_app.logger.error('数据保存失败')
@@ -54,11 +98,50 @@ class AutoUpdater:
             current_app.logger.error(f'自动更新失败: {e}')
             return False
     
+    def _fetch_missing(self, local_period, gap):
+        """
+        获取本地最新期号之后的开奖数据
+
+        缺口不超过一页时一次获取；否则按页获取，直到某页覆盖本地最新期号
+
+        Args:
+            local_period: 本地最新期号（无本地数据时为 None）
+            gap: 估算的缺失期数
+
+        Returns:
+            list: 本地缺失的开奖数据
+        """
+        config = current_app.config
+        if local_period is None or gap is None:
+            # 本地无数据或期号无法解析，获取固定期数
+            return fetch_from_network(limit=config.get('UPDATE_INITIAL_PERIODS', 100))
+
+        # 多取一期，使第一页包含本地最新期号，缺口估算准确时一次请求即可结束
+        page_size = min(gap + 1, config.get('UPDATE_PAGE_SIZE', 100))
+        max_pages = config.get('UPDATE_MAX_PAGES', 50)
+        local = int(local_period)
+        missing = []
+
+        for page in range(1, max_pages + 1):
+            data = fetch_from_network(limit=page_size, page=page)
+            if not data:
+                break
+
+            missing.extend(item for item in data if int(item['period']) > local)
+            # 本页已包含本地最新期号（或更早），缺口已补齐
+            if min(int(item['period']) for item in data) <= local or len(data) < page_size:
+                break
+        else:
+            current_app.logger.warning(f'缺失期数超过 {max_pages} 页，剩余部分请使用历史回填')
+
+        return missing
+    
     def get_status(self):
         """获取更新状态"""
         return {
             'last_update_time': self.last_update_time.isoformat() if self.last_update_time else None,
-            'last_period': self.last_period
+            'last_period': self.last_period,
+            'last_added': self.last_added
         }
 
 
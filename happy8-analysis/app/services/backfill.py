@@ -0,0 +1,265 @@
+"""
+历史数据回填服务
+按页并发获取全部快乐8开奖历史，按期号去重后批量写入历史存储
+- 有界并发：同时进行的页请求不超过 concurrency
+- 失败重试：指数退避，重试耗尽的页记录为失败，下次运行时重新获取
+- 断点续传：已写入的页记录在 checkpoint 文件中，中断后从断点继续
+"""
+import json
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from flask import current_app
+
+from app.services.fetch_engine import is_valid_result, parser_for
+from app.utils.data_loader import REQUEST_HEADERS, merge_history
+from app.utils.file_lock import atomic_write
+from app.utils.http_client import http_client
+
+
+def load_checkpoint(checkpoint_file):
+    """
+    读取断点文件
+
+    Returns:
+        dict: 包含 page_size, anchor_period, done_pages；文件不存在或损坏时返回 None
+    """
+    if not os.path.exists(checkpoint_file):
+        return None
+    try:
+        with open(checkpoint_file, 'r', encoding='utf-8') as f:
+            checkpoint = json.load(f)
+        checkpoint['done_pages'] = set(checkpoint.get('done_pages', []))
+        return checkpoint
+    except (OSError, ValueError):
+        return None
+
+
+def save_checkpoint(checkpoint_file, checkpoint):
+    """原子写入断点文件"""
+    data = dict(checkpoint, done_pages=sorted(checkpoint['done_pages']))
+    atomic_write(checkpoint_file, lambda f: json.dump(data, f, ensure_ascii=False, indent=2),
+                 'w', encoding='utf-8')
+
+
+def shift_done_pages(done_pages, page_size, shift):
+    """
+    新开奖使分页整体后移 shift 期后，换算仍然完整覆盖的页码
+
+    Args:
+        done_pages: 原页码集合
+        page_size: 每页期数
+        shift: 新增的期数
+
+    Returns:
+        set: 新分页下已完整获取的页码
+    """
+    if shift == 0:
+        return set(done_pages)
+
+    # 已获取的位置区间（按新分页的位置）
+    covered = sorted(((page - 1) * page_size + shift, page * page_size + shift)
+                     for page in done_pages)
+    merged = []
+    for start, end in covered:
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+
+    result = set()
+    for start, end in merged:
+        first = -(-start // page_size) + 1  # 第一个起点 >= start 的页
+        last = end // page_size  # 最后一个终点 <= end 的页
+        result.update(range(first, last + 1))
+    return result
+
+
+class Backfiller:
+    """分页并发回填开奖历史"""
+
+    def __init__(self, sources, page_size=100, concurrency=4, max_retries=3,
+                 backoff=1.0, timeout=15, logger=None):
+        # 只使用配置了分页接口且已适配解析逻辑的数据源
+        self.sources = [s for s in sources if s.get('page_url') and parser_for(s)]
+        self.page_size = page_size
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.logger = logger
+
+    def fetch_page(self, page):
+        """
+        获取一页开奖数据（失败按指数退避重试，依次尝试各数据源）
+
+        Args:
+            page: 页码，从 1 开始
+
+        Returns:
+            list: 开奖数据列表，超出历史范围时为空列表
+
+        Raises:
+            Exception: 重试耗尽仍然失败
+        """
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                time.sleep(self.backoff * (2 ** (attempt - 1)) * (1 + random.random() * 0.5))
+
+            for source in self.sources:
+                try:
+                    url = source['page_url'].format(page=page, size=self.page_size)
+                    resp_json = http_client.get_json(
+                        source['name'], url, headers=REQUEST_HEADERS, timeout=self.timeout,
+                        cache_timeout=0, verify=False
+                    )
+                    data = parser_for(source)(resp_json)
+                    if data and not is_valid_result(data):
+                        raise ValueError('解析结果号码不完整')
+                    return data
+                except Exception as e:
+                    last_error = e
+                    if self.logger:
+                        self.logger.warning(f"第 {page} 页 {source['name']} 获取失败 "
+                                            f"(第 {attempt + 1} 次): {str(e)[:100]}")
+
+        raise last_error or ValueError('没有配置分页接口的数据源')
+
+    def _resume(self, checkpoint, first_page):
+        """根据第一页数据换算断点，分页已整体后移时调整已完成页码"""
+        if not checkpoint or checkpoint.get('page_size') != self.page_size or not first_page:
+            return set()
+
+        anchor = int(checkpoint.get('anchor_period') or 0)
+        shift = sum(1 for item in first_page if int(item['period']) > anchor)
+        if shift >= len(first_page):
+            # 新增期数超过一页，无法准确换算，重新开始
+            return set()
+        return shift_done_pages(checkpoint['done_pages'], self.page_size, shift)
+
+    def run(self, checkpoint_file=None, batch_pages=20, max_pages=None):
+        """
+        执行回填（需在应用上下文中调用，写入使用 merge_history）
+
+        Args:
+            checkpoint_file: 断点文件路径，None 表示不使用断点
+            batch_pages: 累积多少页后批量写入一次
+            max_pages: 最多获取的页数，None 表示直到历史末尾
+
+        Returns:
+            dict: fetched（获取期数）, added（新增期数）, pages（完成页数）, failed_pages（失败页码）
+        """
+        if not self.sources:
+            raise ValueError('没有配置分页接口 (page_url) 的数据源')
+
+        first_page = self.fetch_page(1)
+        checkpoint = load_checkpoint(checkpoint_file) if checkpoint_file else None
+        done_pages = self._resume(checkpoint, first_page)
+        anchor_period = first_page[0]['period'] if first_page else None
+
+        state = {'page_size': self.page_size, 'anchor_period': anchor_period,
+                 'done_pages': done_pages}
+        stats = {'fetched': 0, 'added': 0, 'pages': 0, 'failed_pages': []}
+        pending_draws = {}
+        pending_pages = []
+
+        def flush():
+            if pending_draws:
+                added = merge_history(list(pending_draws.values()))
+                if added < 0:
+                    raise IOError('写入历史数据失败')
+                stats['added'] += added
+            state['done_pages'].update(pending_pages)
+            if checkpoint_file:
+                save_checkpoint(checkpoint_file, state)
+            pending_draws.clear()
+            pending_pages.clear()
+
+        def collect(page, data):
+            for item in data:
+                pending_draws.setdefault(item['period'], item)
+            pending_pages.append(page)
+            stats['fetched'] += len(data)
+            stats['pages'] += 1
+            if len(pending_pages) >= batch_pages:
+                flush()
+
+        # 第一页已获取；短页或空页表示已到历史末尾
+        end_page = 1 if len(first_page) < self.page_size else None
+        if 1 not in done_pages:
+            collect(1, first_page)
+
+        next_page = 2
+        futures = {}
+        with ThreadPoolExecutor(max_workers=self.concurrency,
+                                thread_name_prefix='backfill') as executor:
+            while True:
+                while len(futures) < self.concurrency:
+                    if end_page is not None and next_page > end_page:
+                        break
+                    if max_pages is not None and next_page > max_pages:
+                        break
+                    if next_page not in done_pages:
+                        futures[executor.submit(self.fetch_page, next_page)] = next_page
+                    next_page += 1
+
+                if not futures:
+                    break
+
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    page = futures.pop(future)
+                    try:
+                        data = future.result()
+                    except Exception as e:
+                        stats['failed_pages'].append(page)
+                        if self.logger:
+                            self.logger.error(f'第 {page} 页获取失败，已跳过: {str(e)[:100]}')
+                        continue
+
+                    if len(data) < self.page_size:
+                        end_page = page if end_page is None else min(end_page, page)
+                    collect(page, data)
+
+                    if self.logger and stats['pages'] % 10 == 0:
+                        self.logger.info(f"已获取 {stats['pages']} 页, {stats['fetched']} 期")
+
+        flush()
+        stats['failed_pages'].sort()
+        return stats
+
+
+def backfill_history(page_size=None, concurrency=None, reset=False, max_pages=None):
+    """
+    按配置回填全部开奖历史（需在应用上下文中调用）
+
+    Args:
+        page_size: 每页期数，默认 BACKFILL_PAGE_SIZE
+        concurrency: 并发页数，默认 BACKFILL_CONCURRENCY
+        reset: 是否忽略已有断点重新开始
+        max_pages: 最多获取的页数
+
+    Returns:
+        dict: 回填统计
+    """
+    config = current_app.config
+    checkpoint_file = str(config['BACKFILL_CHECKPOINT_FILE'])
+    if reset and os.path.exists(checkpoint_file):
+        os.remove(checkpoint_file)
+
+    backfiller = Backfiller(
+        config['DATA_SOURCES'],
+        page_size=page_size or config.get('BACKFILL_PAGE_SIZE', 100),
+        concurrency=concurrency or config.get('BACKFILL_CONCURRENCY', 4),
+        max_retries=config.get('BACKFILL_MAX_RETRIES', 3),
+        backoff=config.get('BACKFILL_BACKOFF', 1.0),
+        timeout=config['REQUEST_TIMEOUT'],
+        logger=current_app.logger
+    )
+    stats = backfiller.run(checkpoint_file, max_pages=max_pages)
+    current_app.logger.info(f"历史回填完成: 获取 {stats['fetched']} 期, 新增 {stats['added']} 期, "
+                            f"失败页 {stats['failed_pages']}")
+    return stats
@@ -0,0 +1,160 @@
+"""
+推荐策略回测
+按时间顺序逐期重放开奖历史：每期只使用该期之前的数据生成各策略推荐（与仪表盘相同的
+build_recommendations），再与该期开奖结果比对。
+遗漏和热号由命中矩阵的前缀和 / maximum.accumulate 一次性向量化计算，
+期号区间切分后由进程池并行处理
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from app.utils.bitmask import NUMBER_COUNT, encode, popcount
+from app.utils.omission_matrix import number_matrix, omission_matrix
+from app.services.analyzer import build_recommendations
+
+
+LABELS = np.array([str(n).zfill(2) for n in range(1, NUMBER_COUNT + 1)])
+
+
+def _rankings(numbers, lookback, hot_periods):
+    """
+    每一期回测时的遗漏排行和热号排行
+
+    Args:
+        numbers: (T, 20) 号码矩阵，按时间正序
+        lookback: 每期可见的历史期数（仪表盘默认分析 50 期）
+        hot_periods: 热号统计期数
+
+    Returns:
+        tuple: (omission_top, hot_top)，均为 (T - lookback, 10) 号码下标（0 起），
+            第 i 行对应第 lookback + i 期（只用到它之前的 lookback 期）
+    """
+    total = len(numbers)
+    hits = np.zeros((total, NUMBER_COUNT + 1), dtype=bool)
+    positions = np.full((total, NUMBER_COUNT + 1), 99, dtype=np.int16)
+    rows = np.repeat(np.arange(total), numbers.shape[1])
+    hits[rows, numbers.ravel()] = True
+    positions[rows, numbers.ravel()] = np.tile(np.arange(numbers.shape[1], dtype=np.int16), total)
+    hits, positions = hits[:, 1:], positions[:, 1:]
+
+    # 第 t 期可见数据的最新一期为 t-1
+    omission = omission_matrix(hits)[lookback - 1:total - 1]
+    last_hit = np.arange(lookback - 1, total - 1)[:, None] - omission
+    omission = np.minimum(omission, lookback)
+
+    # 热号计数：前缀和相减
+    prefix = np.zeros((total + 1, NUMBER_COUNT), dtype=np.int32)
+    np.cumsum(hits, axis=0, out=prefix[1:])
+    targets = np.arange(lookback, total)
+    hot_window = min(hot_periods, lookback)
+    counts = prefix[targets] - prefix[targets - hot_window]
+
+    # 遗漏排行：遗漏值降序，相同时号码小的在前（稳定排序）
+    omission_top = np.argsort(-omission, axis=1, kind='stable')[:, :10]
+
+    # 热号排行：次数降序，相同时按在数据中首次出现的顺序（最近出现的期、期内位置）
+    hit_pos = np.take_along_axis(positions, np.maximum(last_hit, 0), axis=0) \
+        if len(last_hit) else last_hit
+    hot_top = np.lexsort((hit_pos, omission, -counts), axis=1)[:, :10]
+    return omission_top, hot_top
+
+
+def _run_shard(numbers, start, end, lookback, hot_periods):
+    """
+    回测 [start, end) 期（时间正序下标）
+
+    Returns:
+        dict: {策略: (每期命中个数列表, 推荐号码数列表)}
+    """
+    # 只需要起始期之前 lookback 期的数据
+    window = numbers[start - lookback:end]
+    omission_top, hot_top = _rankings(window, lookback, hot_periods)
+
+    results = {}
+    for row, draw in enumerate(window[lookback:]):
+        actual = encode(draw.tolist())
+        picks = build_recommendations(LABELS[omission_top[row]].tolist(),
+                                      LABELS[hot_top[row]].tolist())
+        for key, predicted in picks.items():
+            hit_counts, sizes = results.setdefault(key, ([], []))
+            hit_counts.append(popcount(encode(predicted) & actual))
+            sizes.append(len(predicted))
+    return results
+
+
+def _summary(hit_counts, sizes):
+    hit_counts = np.asarray(hit_counts)
+    hits = int(hit_counts.sum())
+    attempts = int(np.sum(sizes))
+    histogram = np.bincount(hit_counts)
+    return {
+        'periods': len(hit_counts),
+        'attempts': attempts,
+        'hits': hits,
+        'hit_rate': round(hits / attempts, 4) if attempts else 0,
+        'avg_hits': round(hits / len(hit_counts), 3) if len(hit_counts) else 0,
+        'max_hits': int(hit_counts.max()) if len(hit_counts) else 0,
+        'histogram': {str(k): int(v) for k, v in enumerate(histogram) if v}
+    }
+
+
+def run_backtest(data, start_period=None, end_period=None, lookback=50, hot_periods=20,
+                 workers=None, shard_size=2000):
+    """
+    回测各推荐策略
+
+    Args:
+        data: 历史数据列表（按期号倒序，与 read_from_csv 相同）
+        start_period: 回测起始期号（含），默认为有足够历史的第一期
+        end_period: 回测结束期号（含），默认为最新一期
+        lookback: 每期生成推荐时可见的历史期数
+        hot_periods: 热号统计期数
+        workers: 进程数，默认为 CPU 核数；1 表示在当前进程中计算
+        shard_size: 每个分片的期数
+
+    Returns:
+        dict: {'periods', 'first_period', 'last_period', 'lookback', 'elapsed', 'strategies': {...}}
+    """
+    started = time.perf_counter()
+    data = data[::-1]
+    periods = [str(item['period']).strip() for item in data]
+    numbers = number_matrix(data)
+
+    first = lookback
+    if start_period is not None:
+        first = max(first, next((i for i, p in enumerate(periods) if p >= str(start_period)),
+                                len(periods)))
+    last = len(periods)
+    if end_period is not None:
+        last = next((i for i, p in enumerate(periods) if p > str(end_period)), len(periods))
+
+    shards = [(s, min(s + shard_size, last)) for s in range(first, last, shard_size)]
+    workers = workers or os.cpu_count() or 1
+
+    merged = {}
+    if workers == 1 or len(shards) <= 1:
+        outputs = [_run_shard(numbers, s, e, lookback, hot_periods) for s, e in shards]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(shards))) as pool:
+            futures = [pool.submit(_run_shard, numbers, s, e, lookback, hot_periods)
+                       for s, e in shards]
+            outputs = [f.result() for f in futures]
+
+    # 分片按期号顺序合并
+    for output in outputs:
+        for key, (hit_counts, sizes) in output.items():
+            merged_hits, merged_sizes = merged.setdefault(key, ([], []))
+            merged_hits.extend(hit_counts)
+            merged_sizes.extend(sizes)
+
+    return {
+        'periods': max(last - first, 0),
+        'first_period': periods[first] if first < last else None,
+        'last_period': periods[last - 1] if first < last else None,
+        'lookback': lookback,
+        'elapsed': round(time.perf_counter() - started, 3),
+        'strategies': {key: _summary(*value) for key, value in merged.items()}
+    }
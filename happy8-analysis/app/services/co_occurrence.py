@@ -0,0 +1,211 @@
+"""
+号码同出索引
+- 两两同出：80×80 累计计数矩阵，每 SNAPSHOT_INTERVAL 期保存一次前缀快照，
+  任意窗口的同出次数 = 两端前缀相减，前缀由最近的快照加上不足一个间隔的期数得到
+- 三码同出：按三元组编码 (a*80+b)*80+c（a<b<c，0 起）的计数表
+新开奖只做一期的增量更新，开奖数据无法对齐时重建
+"""
+import threading
+from itertools import combinations
+
+import numpy as np
+
+from app.utils.bitmask import NUMBER_COUNT
+from app.utils.omission_matrix import hit_matrix
+from app.services.frequency_index import locate_period
+
+
+# 每隔多少期保存一次两两同出的前缀快照
+SNAPSHOT_INTERVAL = 256
+
+# 一期 20 个号码中的全部三元组（号码在期内排序后的下标）
+_TRIPLE_POSITIONS = np.array(list(combinations(range(20), 3)), dtype=np.int64)
+
+
+def _pair_counts(hits):
+    """命中矩阵各行的两两同出次数之和（对角线为出现次数）"""
+    hits = hits.astype(np.float64)
+    return np.rint(hits.T @ hits).astype(np.int64)
+
+
+def _triple_codes(hits):
+    """命中矩阵各行全部三元组的编码"""
+    if not len(hits):
+        return np.zeros(0, dtype=np.int64)
+    rows, numbers = np.nonzero(hits)
+    if len(rows) != len(hits) * 20:
+        # 个别期号码数不是 20：逐行计算
+        return np.concatenate([
+            _triple_codes(hits[i:i + 1]) if hits[i].sum() == 20
+            else np.array([(a * NUMBER_COUNT + b) * NUMBER_COUNT + c
+                           for a, b, c in combinations(np.flatnonzero(hits[i]), 3)], dtype=np.int64)
+            for i in range(len(hits))
+        ])
+    # np.nonzero 按行、按列升序返回，每行恰好 20 个
+    numbers = numbers.reshape(-1, 20).astype(np.int64)
+    triples = numbers[:, _TRIPLE_POSITIONS]
+    return ((triples[..., 0] * NUMBER_COUNT + triples[..., 1]) * NUMBER_COUNT
+            + triples[..., 2]).ravel()
+
+
+class CoOccurrenceIndex:
+    """按期号增量维护的号码同出索引"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.reset()
+
+    def reset(self):
+        """清空索引"""
+        with self._lock:
+            self.version = None
+            self._periods = []  # 时间正序期号
+            self._keys = []  # 整数期号，按数值定位截止期号
+            self._hits = np.zeros((1024, NUMBER_COUNT), dtype=bool)
+            self._size = 0
+            self._pairs = np.zeros((NUMBER_COUNT, NUMBER_COUNT), dtype=np.int64)
+            # 第 k 个快照为前 k * SNAPSHOT_INTERVAL 期的两两同出次数
+            self._snapshots = [self._pairs.copy()]
+            self._triples = np.zeros(NUMBER_COUNT ** 3, dtype=np.int32)
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def latest_period(self):
+        return self._periods[-1] if self._periods else None
+
+    def extend(self, data):
+        """
+        追加新开奖（必须比当前最新期号更新）
+
+        Args:
+            data: 历史数据列表（按期号倒序），每项包含 period, numbers
+        """
+        if not data:
+            return
+        rows = data[::-1]
+        hits = hit_matrix(rows)
+        with self._lock:
+            needed = self._size + len(rows)
+            if needed > len(self._hits):
+                grown = np.zeros((max(needed, len(self._hits) * 2), NUMBER_COUNT), dtype=bool)
+                grown[:self._size] = self._hits[:self._size]
+                self._hits = grown
+            self._hits[self._size:needed] = hits
+
+            # 按快照边界分段累加两两同出
+            pos = self._size
+            while pos < needed:
+                boundary = min((pos // SNAPSHOT_INTERVAL + 1) * SNAPSHOT_INTERVAL, needed)
+                self._pairs += _pair_counts(self._hits[pos:boundary])
+                pos = boundary
+                if pos % SNAPSHOT_INTERVAL == 0:
+                    self._snapshots.append(self._pairs.copy())
+
+            self._triples += np.bincount(_triple_codes(hits),
+                                         minlength=NUMBER_COUNT ** 3).astype(np.int32)
+            self._periods.extend(str(item['period']).strip() for item in rows)
+            self._keys.extend(int(period) for period in self._periods[self._size:])
+            self._size = needed
+
+    def sync(self, version, load):
+        """
+        与开奖数据对齐
+
+        Args:
+            version: (最新期号, 总期数)，见 data_loader.data_version
+            load: 按期数读取最近开奖数据的函数（按期号倒序），如 read_from_csv
+        """
+        latest, count = version
+        with self._lock:
+            if version == self.version:
+                return
+            gap = count - self._size
+            if self._size and gap > 0:
+                # 多读一期用于确认新数据接在当前最新期号之后
+                rows = load(gap + 1)
+                if len(rows) == gap + 1 and str(rows[-1]['period']).strip() == self.latest_period:
+                    self.extend(rows[:-1])
+                    self.version = version
+                    return
+
+            self.reset()
+            self.extend(load(count) if count else [])
+            self.version = version
+
+    def resolve_period(self, end_period):
+        """
+        实际截止期号（不晚于 end_period 的最后一期）
+
+        Raises:
+            ValueError: 期号不是数字或早于最早一期
+        """
+        with self._lock:
+            return locate_period(self._keys, self._periods, end_period)[1]
+
+    def _range(self, window=None, end_period=None):
+        """窗口对应的时间正序下标区间 [start, end)"""
+        end = locate_period(self._keys, self._periods, end_period)[0]
+        start = 0 if window is None else max(end - window, 0)
+        return start, end
+
+    def _prefix_pairs(self, t):
+        """前 t 期的两两同出次数"""
+        if t == self._size:
+            return self._pairs
+        k = t // SNAPSHOT_INTERVAL
+        return self._snapshots[k] + _pair_counts(self._hits[k * SNAPSHOT_INTERVAL:t])
+
+    def pair_matrix(self, window=None, end_period=None):
+        """
+        两两同出次数矩阵
+
+        Args:
+            window: 最近期数，None 表示全部历史
+            end_period: 截止期号（含），默认为最新一期
+
+        Returns:
+            tuple: (实际期数, 80×80 矩阵)，[i, j] 为号码 i+1 与 j+1 同出的期数，对角线为出现期数
+        """
+        with self._lock:
+            start, end = self._range(window, end_period)
+            if start == 0:
+                return end, self._prefix_pairs(end).copy()
+            return end - start, self._prefix_pairs(end) - self._prefix_pairs(start)
+
+    def triple_partners(self, a, b, window=None, end_period=None):
+        """
+        与号码对 (a, b) 三码同出的次数
+
+        Args:
+            a, b: 号码下标（0 起）
+
+        Returns:
+            tuple: (实际期数, 长度 80 的计数数组)
+        """
+        with self._lock:
+            start, end = self._range(window, end_period)
+            hits = self._hits[start:end]
+            both = hits[:, a] & hits[:, b]
+            counts = hits[both].sum(axis=0)
+            counts[[a, b]] = 0
+            return end - start, counts
+
+    def triple_counts(self, window=None, end_period=None):
+        """
+        三码同出计数表
+
+        Returns:
+            tuple: (实际期数, 长度 80**3 的计数数组，按三元组编码索引)
+        """
+        with self._lock:
+            start, end = self._range(window, end_period)
+            if start == 0 and end == self._size:
+                return end, self._triples
+            return end - start, np.bincount(_triple_codes(self._hits[start:end]),
+                                            minlength=NUMBER_COUNT ** 3)
+
+
+# 全局实例
+co_occurrence_index = CoOccurrenceIndex()
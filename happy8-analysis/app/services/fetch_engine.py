@@ -0,0 +1,246 @@
+"""
+多数据源并发获取引擎
+- 首选数据源超过对冲延迟仍未返回时，并发请求下一个数据源（hedged request）
+- 任一数据源失败立即切换下一个，取最先返回的有效解析结果（未适配解析逻辑的数据源不参与）
+- 每个数据源独立熔断：连续失败达到阈值后冷却一段时间内直接跳过
+- 请求经由 http_client 复用连接池，并按 ETag / Last-Modified 缓存响应
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from app.utils.http_client import http_client
+
+
+class CircuitBreaker:
+    """单个数据源的熔断器"""
+
+    def __init__(self, failure_threshold=3, cooldown=300):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.last_error = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """是否允许请求（熔断冷却结束后放行一次试探请求）"""
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at >= self.cooldown:
+                # 半开状态：重新计时，试探失败会再次熔断
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.last_error = None
+
+    def record_failure(self, error):
+        with self._lock:
+            self.failures += 1
+            self.last_error = str(error)[:100]
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+    def get_status(self):
+        with self._lock:
+            if self.opened_at is None:
+                state = 'closed'
+            elif time.monotonic() - self.opened_at >= self.cooldown:
+                state = 'half_open'
+            else:
+                state = 'open'
+            return {
+                'state': state,
+                'failures': self.failures,
+                'last_error': self.last_error
+            }
+
+
+def parse_cwl_response(resp_json):
+    """
+    解析福彩官网返回数据
+
+    Args:
+        resp_json: 接口返回的 JSON
+
+    Returns:
+        list: 开奖数据列表
+    """
+    parsed_data = []
+    for item in resp_json.get('result') or []:
+        # 格式化日期: "2024-01-21(日)" -> "2024-01-21"
+        raw_date = item.get('date', '')
+        clean_date = raw_date.split('(')[0] if '(' in raw_date else raw_date
+
+        # 转换号码: "01,02,03..." -> ["01", "02", "03"...]
+        raw_nums = item.get('red', '').split(',')
+
+        parsed_data.append({
+            'period': item.get('code', ''),
+            'date': clean_date,
+            'numbers': [n.strip().zfill(2) for n in raw_nums if n.strip()]
+        })
+    return parsed_data
+
+
+# 数据源名称（或数据源配置中的 parser 字段）-> 解析函数
+PARSERS = {
+    '福彩官网': parse_cwl_response,
+}
+
+
+def parser_for(source):
+    """数据源对应的解析函数，未适配时返回 None"""
+    return PARSERS.get(source.get('parser', source['name']))
+
+
+def is_valid_result(data):
+    """解析结果是否可用：非空且每期都有 20 个号码"""
+    return bool(data) and all(len(item['numbers']) == 20 and item['period'] for item in data)
+
+
+class FetchEngine:
+    """多数据源并发获取引擎"""
+
+    def __init__(self, max_workers=4):
+        self.max_workers = max_workers
+        self._breakers = {}
+        self._breakers_lock = threading.Lock()
+        self._executor = None
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                thread_name_prefix='fetch')
+        return self._executor
+
+    def breaker(self, name, failure_threshold=3, cooldown=300):
+        """获取数据源对应的熔断器"""
+        with self._breakers_lock:
+            breaker = self._breakers.get(name)
+            if breaker is None:
+                breaker = CircuitBreaker(failure_threshold, cooldown)
+                self._breakers[name] = breaker
+            breaker.failure_threshold = failure_threshold
+            breaker.cooldown = cooldown
+            return breaker
+
+    def _fetch_source(self, source, url, headers, timeout, logger, cache_options):
+        """在工作线程中请求并解析单个数据源"""
+        breaker = self._breakers[source['name']]
+        started = time.monotonic()
+        try:
+            parser = parser_for(source)
+
+            # 共享连接池 + 条件缓存；verify=False 绕过某些环境下的 SSL 证书问题
+            resp_json = http_client.get_json(source['name'], url, headers=headers,
+                                             timeout=timeout, verify=False, **cache_options)
+            data = parser(resp_json)
+            if not is_valid_result(data):
+                raise ValueError('解析结果为空或号码不完整')
+
+            breaker.record_success()
+            logger.info(f"{source['name']} 解析成功，获取 {len(data)} 期数据 "
+                        f"({(time.monotonic() - started) * 1000:.0f}ms)")
+            return data
+
+        except Exception as e:
+            breaker.record_failure(e)
+            logger.error(f"{source['name']} 请求失败: {str(e)[:100]}")
+            raise
+
+    def fetch(self, sources, limit, headers, timeout, logger,
+              hedge_delay=2.0, failure_threshold=3, cooldown=300,
+              cache_ttl=60, cache_timeout=3600, force=False, page=1):
+        """
+        并发获取数据，返回最先成功的数据源结果
+
+        Args:
+            sources: 数据源配置列表（按优先级排序）
+            limit: 获取期数
+            headers: 请求头
+            timeout: 单个请求超时（秒），也是整体等待上限
+            logger: 日志对象
+            hedge_delay: 对冲延迟（秒），超过后并发请求下一个数据源
+            failure_threshold: 连续失败多少次后熔断
+            cooldown: 熔断冷却时间（秒）
+            cache_ttl: 响应默认新鲜期（秒）
+            cache_timeout: 响应缓存最长保留时间（秒）
+            force: 跳过新鲜期，强制向数据源确认（条件请求）
+            page: 页码（每页 limit 期），大于 1 时只使用配置了 page_url 的数据源
+
+        Returns:
+            list: 开奖数据列表，全部失败返回空列表
+        """
+        candidates = []
+        for source in sources:
+            if page > 1 and not source.get('page_url'):
+                continue
+            if parser_for(source) is None:
+                # 未适配解析逻辑的数据源不参与请求，也不计入熔断
+                logger.debug(f"{source['name']} 解析逻辑未适配，跳过")
+                continue
+            breaker = self.breaker(source['name'], failure_threshold, cooldown)
+            if breaker.allow():
+                candidates.append(source)
+            else:
+                logger.debug(f"{source['name']} 熔断中，跳过")
+
+        if not candidates:
+            logger.warning('所有数据源均处于熔断状态')
+            return []
+
+        executor = self._get_executor()
+        deadline = time.monotonic() + timeout
+        pending = set()
+        cache_options = {'fresh_ttl': cache_ttl, 'cache_timeout': cache_timeout, 'force': force}
+
+        def launch(source):
+            if page > 1:
+                url = source['page_url'].format(page=page, size=limit)
+            else:
+                url = source['url'].format(limit=limit)
+            logger.debug(f"尝试数据源: {source['name']}")
+            pending.add(executor.submit(self._fetch_source, source, url, headers,
+                                        timeout, logger, cache_options))
+
+        launch(candidates.pop(0))
+
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+
+            wait_time = min(hedge_delay, remaining) if candidates else remaining
+            done, _ = wait(pending, timeout=wait_time, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                pending.discard(future)
+                if future.exception() is None:
+                    # 其余仍在进行的请求在后台结束，只更新熔断状态
+                    return future.result()
+
+            # 超过对冲延迟仍未返回，或已有数据源失败：启动下一个数据源
+            if candidates:
+                launch(candidates.pop(0))
+
+        return []
+
+    def get_status(self):
+        """各数据源熔断状态和缓存统计"""
+        cache_stats = http_client.get_stats()
+        with self._breakers_lock:
+            return {
+                name: dict(breaker.get_status(), cache=cache_stats.get(name, {}))
+                for name, breaker in self._breakers.items()
+            }
+
+
+# 全局实例
+fetch_engine = FetchEngine()
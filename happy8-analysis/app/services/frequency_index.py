@@ -0,0 +1,166 @@
+"""
+号码频率前缀和索引
+累计计数矩阵 C[t, n] = 前 t 期（按时间正序）中号码 n+1 的出现次数，
+任意区间 [a, b) 内的出现次数为 C[b] - C[a]，多个窗口同时查询也只需 O(80)。
+新开奖只追加一行，开奖数据无法对齐（如整表覆盖）时重建
+"""
+import threading
+from bisect import bisect_right
+
+import numpy as np
+
+from app.utils.bitmask import NUMBER_COUNT
+from app.utils.omission_matrix import hit_matrix
+
+
+def locate_period(keys, periods, end_period):
+    """
+    截止期号（含）在时间正序期号中的前缀下标
+
+    Args:
+        keys: 时间正序的整数期号
+        periods: 对应的期号字符串
+        end_period: 截止期号，None 表示最新一期
+
+    Returns:
+        tuple: (前缀下标, 实际截止期号)，实际截止期号为不晚于 end_period 的最后一期
+
+    Raises:
+        ValueError: 期号不是数字或早于最早一期
+    """
+    if end_period is None:
+        return len(keys), (periods[-1] if periods else None)
+    try:
+        end = int(str(end_period).strip())
+    except ValueError:
+        raise ValueError(f'end 必须是数字期号: {end_period}')
+    position = bisect_right(keys, end)
+    if position == 0:
+        raise ValueError(f'end 早于最早一期 {periods[0]}' if periods else '暂无开奖数据')
+    return position, periods[position - 1]
+
+
+class FrequencyIndex:
+    """按期号增量维护的频率前缀和矩阵（子类可通过 WIDTH 和 _features 累计其他逐期特征）"""
+
+    # 每期特征的列数
+    WIDTH = NUMBER_COUNT
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.reset()
+
+    def reset(self):
+        """清空索引"""
+        with self._lock:
+            self.version = None
+            self._periods = []  # 时间正序期号
+            self._keys = []  # 整数期号，按数值定位截止期号
+            # 预留容量，追加时按倍数扩容；第 0 行为全零
+            self._prefix = np.zeros((1024, self.WIDTH), dtype=np.int32)
+            self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def latest_period(self):
+        return self._periods[-1] if self._periods else None
+
+    def _features(self, rows):
+        """逐期特征矩阵（时间正序），默认为命中矩阵"""
+        return hit_matrix(rows)
+
+    def extend(self, data):
+        """
+        追加新开奖（必须比当前最新期号更新）
+
+        Args:
+            data: 历史数据列表（按期号倒序），每项包含 period, numbers
+        """
+        if not data:
+            return
+        rows = data[::-1]
+        features = self._features(rows)
+        with self._lock:
+            needed = self._size + len(rows) + 1
+            if needed > len(self._prefix):
+                capacity = max(needed, len(self._prefix) * 2)
+                prefix = np.zeros((capacity, self.WIDTH), dtype=np.int32)
+                prefix[:self._size + 1] = self._prefix[:self._size + 1]
+                self._prefix = prefix
+
+            start = self._size + 1
+            np.cumsum(features, axis=0, out=self._prefix[start:start + len(rows)])
+            self._prefix[start:start + len(rows)] += self._prefix[self._size]
+            self._periods.extend(str(item['period']).strip() for item in rows)
+            self._keys.extend(int(period) for period in self._periods[self._size:])
+            self._size += len(rows)
+
+    def sync(self, version, load):
+        """
+        与开奖数据对齐
+
+        Args:
+            version: (最新期号, 总期数)，见 data_loader.data_version
+            load: 按期数读取最近开奖数据的函数（按期号倒序），如 read_from_csv
+        """
+        latest, count = version
+        with self._lock:
+            if version == self.version:
+                return
+            gap = count - self._size
+            if self._size and gap > 0:
+                # 多读一期用于确认新数据接在当前最新期号之后
+                rows = load(gap + 1)
+                if len(rows) == gap + 1 and str(rows[-1]['period']).strip() == self.latest_period:
+                    self.extend(rows[:-1])
+                    self.version = version
+                    return
+
+            self.reset()
+            self.extend(load(count) if count else [])
+            self.version = version
+
+    def resolve_period(self, end_period):
+        """
+        实际截止期号（不晚于 end_period 的最后一期）
+
+        Raises:
+            ValueError: 期号不是数字或早于最早一期
+        """
+        with self._lock:
+            return locate_period(self._keys, self._periods, end_period)[1]
+
+    def range_counts(self, start, end):
+        """
+        时间正序下标区间 [start, end) 内各号码的出现次数
+
+        Returns:
+            numpy.ndarray: 长度 WIDTH
+        """
+        with self._lock:
+            return self._prefix[end] - self._prefix[start]
+
+    def window_counts(self, windows, end_period=None):
+        """
+        最近若干期（截至 end_period）各号码的出现次数
+
+        Args:
+            windows: 期数列表，如 [10, 20, 50, 100]，None 表示全部历史
+            end_period: 截止期号（含），默认为最新一期
+
+        Returns:
+            dict: {期数: (实际期数, 长度 WIDTH 的计数数组)}，历史不足时实际期数小于窗口
+        """
+        with self._lock:
+            end = locate_period(self._keys, self._periods, end_period)[0]
+            result = {}
+            for window in windows:
+                start = 0 if window is None else max(end - window, 0)
+                result[window] = (end - start, self._prefix[end] - self._prefix[start])
+            return result
+
+
+# 全局实例
+frequency_index = FrequencyIndex()
@@ -3,7 +3,11 @@
 从历史开奖数据中提取用于预测的特征
 """
 import numpy as np
-from collections import Counter
+from app.utils.bitmask import (
+    TAIL_MASKS, encode, popcount, intersect_count,
+    difference_mask, draw_masks, current_omission
+)
+from app.utils.ac_engine import ac_cache
 
 
 def extract_basic_features(numbers):
@@ -97,25 +101,19 @@ def extract_pattern_features(numbers):
     Returns:
         dict: 模式特征
     """
-    nums = sorted([int(n) for n in numbers])
+    mask = encode(numbers)
     
     features = {}
     
-    # 连号数量
-    consecutive_count = 0
-    for i in range(len(nums) - 1):
-        if nums[i+1] - nums[i] == 1:
-            consecutive_count += 1
-    features['consecutive_count'] = consecutive_count
+    # 连号数量(号码 n 与 n+1 同时出现的对数)
+    features['consecutive_count'] = popcount(mask & (mask >> 1))
     
-    # 同尾号数量
-    tail_counter = Counter([n % 10 for n in nums])
-    same_tail_count = sum(1 for count in tail_counter.values() if count > 1)
+    # 同尾号数量(出现不止一个号码的尾数个数)
+    same_tail_count = sum(1 for tail_mask in TAIL_MASKS if popcount(mask & tail_mask) > 1)
     features['same_tail_count'] = same_tail_count
     
-    # AC值(号码离散度)
-    ac_value = calculate_ac_value(nums)
-    features['ac_value'] = ac_value
+    # AC值(号码离散度)，按号码缓存
+    features['ac_value'] = ac_cache.value(numbers)
     
     return features
 
@@ -134,12 +132,8 @@ def calculate_ac_value(nums):
     if len(nums) < 2:
         return 0
     
-    differences = set()
-    for i in range(len(nums)):
-        for j in range(i + 1, len(nums)):
-            differences.add(abs(nums[i] - nums[j]))
-    
-    return len(differences) - (len(nums) - 1)
+    mask = encode(nums)
+    return popcount(difference_mask(mask)) - (popcount(mask) - 1)
 
 
 def extract_repeat_features(current_numbers, previous_numbers):
@@ -156,10 +150,7 @@ def extract_repeat_features(current_numbers, previous_numbers):
     if not previous_numbers:
         return {'repeat_count': 0}
     
-    current_set = set(current_numbers)
-    previous_set = set(previous_numbers)
-    
-    repeat_count = len(current_set & previous_set)
+    repeat_count = intersect_count(encode(current_numbers), encode(previous_numbers))
     
     return {'repeat_count': repeat_count}
 
@@ -194,18 +185,8 @@ def extract_number_omission(history_data):
     Returns:
         dict: 每个号码的遗漏期数
     """
-    omission = {str(i).zfill(2): 0 for i in range(1, 81)}
-    
-    for item in history_data:
-        for num in range(1, 81):
-            num_str = str(num).zfill(2)
-            if num_str in item['numbers']:
-                # 找到了,停止计数
-                break
-            else:
-                omission[num_str] += 1
-    
-    return omission
+    omission_list = current_omission(draw_masks(history_data))
+    return {str(i).zfill(2): omission_list[i] for i in range(1, 81)}
 
 
 def extract_all_features(history_data, target_index=0):
@@ -279,6 +260,9 @@ def create_training_dataset(history_data, window_size=10):
     X = []
     y = []
     
+    # 一次性批量计算全部期号的AC值，逐期提取特征时直接读取缓存
+    ac_cache.values([item['numbers'] for item in history_data])
+    
     # 为每个可以作为目标的期号创建样本
     for i in range(len(history_data) - window_size):
         # 提取特征(基于前window_size期的数据)
@@ -291,11 +275,8 @@ def create_training_dataset(history_data, window_size=10):
         X.append(feature_vector)
         
         # 创建标签向量(80个号码的出现情况)
-        target_numbers = history_data[i]['numbers']
-        label_vector = []
-        for num in range(1, 81):
-            num_str = str(num).zfill(2)
-            label_vector.append(1 if num_str in target_numbers else 0)
+        target_mask = encode(history_data[i]['numbers'])
+        label_vector = [(target_mask >> bit) & 1 for bit in range(80)]
         y.append(label_vector)
     
     return np.array(X), np.array(y), [str(i).zfill(2) for i in range(1, 81)]
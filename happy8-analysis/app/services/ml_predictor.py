@@ -29,6 +29,7 @@ class LotteryMLPredictor:
         self.models = {}  # 为每个号码存储一个模型
         self.model_path = model_path or 'data/ml_models'
         self.is_trained = False
+        self.model_version = None  # 模型版本（文件修改时间或训练时间），用于响应缓存
         
     def train(self, history_data, test_size=0.2):
         """
@@ -84,6 +85,7 @@ class LotteryMLPredictor:
             }
         
         self.is_trained = True
+        self.model_version = f'trained-{id(self.models)}'
         
         # 计算平均得分
         avg_train_score = np.mean([r['train_score'] for r in results.values()])
@@ -253,6 +255,7 @@ class LotteryMLPredictor:
             with open(model_file, 'rb') as f:
                 self.models = pickle.load(f)
             self.is_trained = True
+            self.model_version = str(os.stat(model_file).st_mtime_ns)
             current_app.logger.info(f'模型已加载: {len(self.models)}个分类器')
             return True
         except Exception as e:
@@ -4,6 +4,15 @@
 """
 from collections import Counter
 from flask import current_app
+from app.utils.bitmask import encode, popcount, difference_mask, consecutive_runs
+from app.utils.ac_engine import ac_cache
+from app.utils.omission_matrix import hit_matrix
+from app.utils.pattern_matrix import (
+    RUN_LABELS, run_length_counts, tail_counts as tail_count_matrix, top_consecutive_zones
+)
+from app.utils.data_loader import data_version, read_from_csv
+from app.services.analysis_state import analysis_state
+from app.services.pattern_index import pattern_index
 
 
 def analyze_consecutive_numbers(data):
@@ -19,66 +28,24 @@ def analyze_consecutive_numbers(data):
     if not data:
         return {}
     
-    consecutive_stats = {
-        '2连': 0,
-        '3连': 0,
-        '4连': 0,
-        '5连及以上': 0
-    }
+    # 连号段个数和区间连号对由命中矩阵批量计算
+    hits = hit_matrix(data[:20])
+    consecutive_stats = dict(zip(RUN_LABELS, run_length_counts(hits[:10]).sum(axis=0).tolist()))
     
+    # 记录近期连号
     recent_consecutive = []
-    
-    # 分析每期的连号情况
     for item in data[:10]:
-        numbers = sorted([int(n) for n in item['numbers']])
-        
-        # 查找连号
-        consecutive_groups = []
-        current_group = [numbers[0]]
-        
-        for i in range(1, len(numbers)):
-            if numbers[i] == numbers[i-1] + 1:
-                current_group.append(numbers[i])
-            else:
-                if len(current_group) >= 2:
-                    consecutive_groups.append(current_group[:])
-                current_group = [numbers[i]]
-        
-        # 检查最后一组
-        if len(current_group) >= 2:
-            consecutive_groups.append(current_group)
-        
-        # 统计连号长度
-        for group in consecutive_groups:
-            length = len(group)
-            if length == 2:
-                consecutive_stats['2连'] += 1
-            elif length == 3:
-                consecutive_stats['3连'] += 1
-            elif length == 4:
-                consecutive_stats['4连'] += 1
-            else:
-                consecutive_stats['5连及以上'] += 1
-            
-            # 记录近期连号
+        for group in consecutive_runs(encode(item['numbers'])):
             if len(recent_consecutive) < 5:
                 recent_consecutive.append({
                     'period': item['period'],
                     'numbers': [str(n).zfill(2) for n in group]
                 })
+        if len(recent_consecutive) >= 5:
+            break
     
-    # 推荐连号组合
-    hot_zones = []
-    for item in data[:20]:
-        numbers = sorted([int(n) for n in item['numbers']])
-        for i in range(len(numbers) - 1):
-            if numbers[i+1] == numbers[i] + 1:
-                zone = (numbers[i] // 10) * 10
-                hot_zones.append(zone)
-    
-    # 找出最热的区间
-    zone_counter = Counter(hot_zones)
-    top_zones = [z for z, _ in zone_counter.most_common(3)]
+    # 找出最热的区间（号码 n 与 n+1 同时出现最多的十位区间）
+    top_zones = top_consecutive_zones(hits)
     
     # 推荐连号
     recommended = []
@@ -108,16 +75,13 @@ def analyze_same_tail_numbers(data):
     if not data:
         return {}
     
-    periods = current_app.config['PATTERN_ANALYSIS_PERIODS']
-    
-    # 统计每个尾数的出现次数
-    tail_counter = {str(i): 0 for i in range(10)}
+    # 统计每个尾数的出现次数（优先读取增量维护的滚动统计）
+    tail_counts = analysis_state.tail_counts(data)
+    if tail_counts is None:
+        periods = current_app.config['PATTERN_ANALYSIS_PERIODS']
+        tail_counts = tail_count_matrix(hit_matrix(data[:periods])).sum(axis=0).tolist()
     
-    for item in data[:periods]:
-        numbers = [int(n) for n in item['numbers']]
-        for num in numbers:
-            tail = str(num % 10)
-            tail_counter[tail] += 1
+    tail_counter = {str(i): tail_counts[i] for i in range(10)}
     
     # 排序找出热尾和冷尾
     sorted_tails = sorted(tail_counter.items(), key=lambda x: x[1], reverse=True)
@@ -157,17 +121,13 @@ def calculate_ac_value(numbers):
     if len(numbers) < 2:
         return 0
     
-    nums = sorted([int(n) for n in numbers])
+    mask = encode(numbers)
     
-    # 计算所有两两之差的绝对值
-    differences = set()
-    for i in range(len(nums)):
-        for j in range(i + 1, len(nums)):
-            diff = abs(nums[i] - nums[j])
-            differences.add(diff)
+    # 所有两两之差的位图，差值个数即为 1 的个数
+    differences = difference_mask(mask)
     
     # AC值 = 差值个数 - (号码个数 - 1)
-    ac_value = len(differences) - (len(nums) - 1)
+    ac_value = popcount(differences) - (popcount(mask) - 1)
     return ac_value
 
 
@@ -184,16 +144,15 @@ def analyze_ac_distribution(data):
     if not data:
         return {}
     
-    periods = current_app.config['AC_ANALYSIS_PERIODS']
-    ac_values = []
-    
-    # 计算每期的AC值
-    for item in data[:periods]:
-        ac = calculate_ac_value(item['numbers'])
-        ac_values.append({
-            'period': item['period'],
-            'ac_value': ac
-        })
+    # 每期的AC值（优先读取增量维护的滚动统计）
+    ac_values = analysis_state.ac_values(data)
+    if ac_values is None:
+        # 历史切片等无法增量读取的情况：读取按号码缓存的 AC 值，未缓存的批量计算
+        recent = data[:current_app.config['AC_ANALYSIS_PERIODS']]
+        ac_values = [
+            {'period': item['period'], 'ac_value': ac}
+            for item, ac in zip(recent, ac_cache.values([item['numbers'] for item in recent]))
+        ]
     
     # 统计AC值分布
     ac_nums = [item['ac_value'] for item in ac_values]
@@ -216,6 +175,28 @@ def analyze_ac_distribution(data):
     }
 
 
+def analyze_pattern_windows(windows, end_period=None):
+    """
+    多个窗口（可到全部历史）的连号、同尾统计（读取模式特征前缀和索引）
+    
+    Args:
+        windows: 期数列表，None 表示全部历史
+        end_period: 截止期号（含），默认为最新一期
+        
+    Returns:
+        dict: 各窗口的统计结果
+    """
+    pattern_index.sync(data_version(), read_from_csv)
+    end_period = pattern_index.resolve_period(end_period)
+    stats = pattern_index.window_stats(windows, end_period)
+    return {
+        'latest_period': pattern_index.latest_period,
+        'total_periods': len(pattern_index),
+        'end_period': end_period,
+        'windows': {('all' if w is None else str(w)): v for w, v in stats.items()}
+    }
+
+
 def get_pattern_analysis(data):
     """
     获取完整的模式分析结果
@@ -0,0 +1,66 @@
+"""
+连号、同尾模式的前缀和索引
+每期的连号段个数、各区间连号对数、各尾数号码个数等特征由 pattern_matrix 批量计算，
+按期号累计后任意窗口的合计为两端前缀相减，新开奖只追加一行
+"""
+import numpy as np
+
+from app.utils.omission_matrix import hit_matrix
+from app.utils.pattern_matrix import (
+    RUN_LABELS, ZONE_COUNT, run_length_counts, consecutive_zone_counts, tail_counts
+)
+from app.services.frequency_index import FrequencyIndex
+
+
+# 特征列：连号段(4) | 区间连号对(8) | 尾数(10) | 同尾组数 | 有连号的期数
+RUN_COLUMNS = slice(0, 4)
+ZONE_COLUMNS = slice(4, 4 + ZONE_COUNT)
+TAIL_COLUMNS = slice(4 + ZONE_COUNT, 14 + ZONE_COUNT)
+SAME_TAIL_COLUMN = 14 + ZONE_COUNT
+CONSECUTIVE_DRAW_COLUMN = 15 + ZONE_COUNT
+
+
+class PatternIndex(FrequencyIndex):
+    """按期号增量维护的模式特征前缀和"""
+
+    WIDTH = 16 + ZONE_COUNT
+
+    def _features(self, rows):
+        hits = hit_matrix(rows)
+        runs = run_length_counts(hits)
+        tails = tail_counts(hits)
+        features = np.zeros((len(rows), self.WIDTH), dtype=np.int32)
+        features[:, RUN_COLUMNS] = runs
+        features[:, ZONE_COLUMNS] = consecutive_zone_counts(hits)
+        features[:, TAIL_COLUMNS] = tails
+        features[:, SAME_TAIL_COLUMN] = (tails > 1).sum(axis=1)
+        features[:, CONSECUTIVE_DRAW_COLUMN] = runs.sum(axis=1) > 0
+        return features
+
+    def window_stats(self, windows, end_period=None):
+        """
+        多个窗口的连号、同尾统计
+
+        Args:
+            windows: 期数列表，None 表示全部历史
+            end_period: 截止期号（含），默认为最新一期
+
+        Returns:
+            dict: {窗口: 统计结果}
+        """
+        result = {}
+        for window, (periods, totals) in self.window_counts(windows, end_period).items():
+            totals = totals.tolist()
+            result[window] = {
+                'periods': periods,
+                'consecutive': dict(zip(RUN_LABELS, totals[RUN_COLUMNS])),
+                'consecutive_periods': totals[CONSECUTIVE_DRAW_COLUMN],
+                'consecutive_zones': {str(z * 10): c for z, c in enumerate(totals[ZONE_COLUMNS])},
+                'tail_frequency': {str(t): c for t, c in enumerate(totals[TAIL_COLUMNS])},
+                'avg_same_tail_groups': round(totals[SAME_TAIL_COLUMN] / periods, 2) if periods else 0
+            }
+        return result
+
+
+# 全局实例
+pattern_index = PatternIndex()
@@ -0,0 +1,301 @@
+"""
+推荐记录写入队列 (write-behind)
+请求线程只把“保存第 P 期推荐”“验证第 P 期”事件放入队列，
+后台单线程合并一段时间内的事件并去重，持文件锁后一次性写入，
+GET 请求不再读写整个 recommendations_history.json，多个 worker 之间也不会相互覆盖
+"""
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+from flask import current_app
+
+from app.utils import sqlite_store
+from app.utils.file_lock import file_lock, atomic_write
+from app.services.strategy_ledger import strategy_ledger
+
+
+def build_validation(recommendations, actual):
+    """
+    对比推荐号码与实际开奖号码
+
+    Args:
+        recommendations: {策略: 号码列表}
+        actual: 实际开奖号码
+
+    Returns:
+        dict: {策略: {predicted, hits, hit_count, hit_rate}}
+    """
+    validation = {}
+    for key, predicted in recommendations.items():
+        if isinstance(predicted, list):
+            hits = [n for n in predicted if n in actual]
+            validation[key] = {
+                'predicted': predicted,
+                'hits': hits,
+                'hit_count': len(hits),
+                'hit_rate': f"{len(hits)/len(predicted)*100:.1f}%" if predicted else "0%"
+            }
+    return validation
+
+
+class RecommendationJournal:
+    """推荐记录的后台批量写入器"""
+
+    def __init__(self):
+        self._app = None
+        self._queue = queue.Queue()
+        self._thread = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+        # 未写入的事件数，flush 时等待归零
+        self._pending = 0
+        self._idle = threading.Condition()
+        # 请求侧去重：已入队的推荐内容、已验证（或无需验证）的期号
+        self._queued_recommendations = {}
+        self._settled = set()
+        # 推荐历史文件缓存 (文件签名, 内容)
+        self._history_cache = (None, None)
+        self.stats = {'events': 0, 'batches': 0, 'writes': 0}
+
+    def init_app(self, app):
+        """绑定应用（后台线程在应用上下文中写入）"""
+        self._app = app
+        atexit.register(self.flush, 5)
+
+    @property
+    def delay(self):
+        return self._app.config.get('RECOMMENDATION_JOURNAL_DELAY', 0.5) if self._app else 0
+
+    # ------------------------------------------------------------ 请求侧
+
+    def record_recommendation(self, period, recommendations):
+        """
+        登记某期的推荐号码（内容与上次登记相同时忽略）
+
+        Args:
+            period: 期号
+            recommendations: 推荐号码
+        """
+        period = str(period)
+        fingerprint = self._fingerprint(recommendations)
+        if self._queued_recommendations.get(period) == fingerprint:
+            return
+        self._queued_recommendations[period] = fingerprint
+
+        record = {
+            'date': datetime.now().strftime('%Y-%m-%d'),
+            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'recommendations': recommendations
+        }
+        self._put(('recommend', period, record))
+
+    def record_actuals(self, data):
+        """
+        登记开奖结果，用于验证这些期号的推荐
+
+        Args:
+            data: 历史数据列表，每项包含 period, numbers
+        """
+        for item in data:
+            period = str(item['period']).strip()
+            if period not in self._settled:
+                self._put(('validate', period, item['numbers']))
+
+    def _put(self, event):
+        if self._app is None:
+            # 未绑定应用（如脚本中直接调用）时同步写入
+            try:
+                self.apply([event])
+            except Exception:
+                self._forget([event])
+                raise
+            return
+        with self._idle:
+            self._pending += 1
+        self._queue.put(event)
+        self._ensure_writer()
+
+    def flush(self, timeout=None):
+        """
+        等待已登记的事件写入完成
+
+        Args:
+            timeout: 最长等待秒数
+
+        Returns:
+            bool: 是否全部写入
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+
+    @staticmethod
+    def _fingerprint(recommendations):
+        return json.dumps(recommendations, sort_keys=True, ensure_ascii=False)
+
+    def _forget(self, events):
+        """写入失败时撤销这些推荐的去重标记，相同内容再次登记时重新入队"""
+        for kind, period, payload in events:
+            if kind == 'recommend' and \
+                    self._queued_recommendations.get(period) == self._fingerprint(payload['recommendations']):
+                self._queued_recommendations.pop(period, None)
+
+    # ------------------------------------------------------------ 写入侧
+
+    def _ensure_writer(self):
+        with self._start_lock:
+            # fork 出的 worker 不会继承线程，按进程号重新启动
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='recommendation-journal',
+                                            daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.delay
+            while True:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(self._queue.get(timeout=remaining) if remaining > 0
+                                 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                with self._app.app_context():
+                    self.apply(batch)
+            except Exception as e:
+                self._forget(batch)
+                try:
+                    self._app.logger.error(f'写入推荐记录失败: {e}')
+                except Exception:
+                    pass
+            finally:
+                with self._idle:
+                    self._pending -= len(batch)
+                    self._idle.notify_all()
+
+    def apply(self, events):
+        """
+        合并并写入一批事件（需在应用上下文中调用）
+
+        同一期号只保留最后一次推荐；先写推荐，再验证
+
+        Args:
+            events: (类型, 期号, 内容) 列表
+        """
+        recommendations = {}
+        actuals = {}
+        for kind, period, payload in events:
+            if kind == 'recommend':
+                recommendations[period] = payload
+            else:
+                actuals[period] = payload
+
+        self.stats['events'] += len(events)
+        self.stats['batches'] += 1
+
+        if sqlite_store.is_enabled():
+            self._apply_sqlite(recommendations, actuals)
+        else:
+            self._apply_file(recommendations, actuals)
+
+    def _apply_sqlite(self, recommendations, actuals):
+        for period, record in recommendations.items():
+            sqlite_store.save_recommendation(period, record)
+            self._settled.discard(period)
+
+        pending = sqlite_store.pending_validations(actuals.keys())
+        validated = {}
+        for period, recs in pending.items():
+            actual = actuals[period]
+            validated[period] = build_validation(recs, actual)
+            sqlite_store.save_validation(period, actual, validated[period])
+            current_app.logger.info(f"强制验证期号 {period} 成功")
+        self._settled.update(actuals.keys())
+        if recommendations or pending:
+            self.stats['writes'] += 1
+        self._record_stats(validated)
+
+    def _apply_file(self, recommendations, actuals):
+        history_file = str(current_app.config['RECOMMENDATIONS_FILE'])
+        with file_lock(history_file + '.lock'):
+            try:
+                self._write_file(history_file, recommendations, actuals)
+            except Exception:
+                # 内存中的内容可能已部分修改，下次重新读取文件
+                self._history_cache = (None, None)
+                raise
+
+    def _write_file(self, history_file, recommendations, actuals):
+        history = self._load(history_file)
+        updated = False
+        validated = {}
+
+        for period, record in recommendations.items():
+            history[period] = record
+            self._settled.discard(period)
+            updated = True
+            current_app.logger.info(f'保存期号 {period} 推荐成功')
+
+        for period, actual in actuals.items():
+            record = history.get(period)
+            # 即使已经有 validation，如果 actual_result 缺失也补上
+            if record is not None and \
+                    ('validation' not in record or 'actual_result' not in record):
+                record['actual_result'] = actual
+                record['validation'] = build_validation(record.get('recommendations', {}), actual)
+                validated[period] = record['validation']
+                updated = True
+                current_app.logger.info(f"强制验证期号 {period} 成功")
+            self._settled.add(period)
+
+        if updated:
+            atomic_write(history_file,
+                         lambda f: json.dump(history, f, ensure_ascii=False, indent=2),
+                         'w', encoding='utf-8')
+            self._history_cache = (self._signature(history_file), history)
+            self.stats['writes'] += 1
+        self._record_stats(validated)
+
+    @staticmethod
+    def _record_stats(validated):
+        """验证结果记入策略表现台账"""
+        skipped = strategy_ledger.record(validated)
+        if skipped:
+            current_app.logger.warning(
+                f"期号 {', '.join(skipped)} 不晚于策略统计最后记入的期号，验证结果不计入策略表现")
+
+    @staticmethod
+    def _signature(path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def _load(self, history_file):
+        """读取推荐历史（文件未被其他进程修改时复用内存中的内容）"""
+        signature = self._signature(history_file)
+        cached_signature, history = self._history_cache
+        if signature is not None and signature == cached_signature:
+            return history
+
+        if signature is None:
+            history = {}
+        else:
+            with open(history_file, 'r', encoding='utf-8') as f:
+                history = json.load(f)
+        self._history_cache = (signature, history)
+        return history
+
+
+# 全局实例
+recommendation_journal = RecommendationJournal()
@@ -0,0 +1,260 @@
+"""
+策略表现台账
+按推荐策略（smart_pick5、ml_pick10 等）累计验证结果：
+期数、推荐号码数、命中数、命中个数分布，以及最近 N 期的滑动窗口合计。
+每验证一期只做 O(策略数) 的增量更新并持久化，排行榜读取时不再遍历全部历史；
+文件只保存各策略合计和最后记入的期号，不早于该期号的验证视为已记入
+"""
+import json
+import os
+import threading
+from collections import deque
+
+from app.utils.file_lock import file_lock, atomic_write
+
+
+class _StrategyStats:
+    """单个策略的累计统计"""
+
+    def __init__(self, windows):
+        self.windows = windows
+        self.periods = 0
+        self.attempts = 0
+        self.hits = 0
+        self.histogram = {}
+        # 最近的验证结果 (期号, 命中个数, 推荐号码数)，左端为最新
+        self.recent = deque(maxlen=max(windows))
+        # 窗口 -> [期数, 命中数, 推荐号码数]
+        self.window_sums = {w: [0, 0, 0] for w in windows}
+
+    def add(self, period, hit_count, size):
+        """记入比 recent 中各期都新的一期（较早期号的补验证由台账在调用前丢弃）"""
+        self.periods += 1
+        self.attempts += size
+        self.hits += hit_count
+        self.histogram[hit_count] = self.histogram.get(hit_count, 0) + 1
+
+        # 新的一期：进入每个窗口，同时把刚好移出窗口的那期减掉
+        for w, sums in self.window_sums.items():
+            if len(self.recent) >= w:
+                _, old_hits, old_size = self.recent[w - 1]
+                sums[0] -= 1
+                sums[1] -= old_hits
+                sums[2] -= old_size
+            sums[0] += 1
+            sums[1] += hit_count
+            sums[2] += size
+        self.recent.appendleft((period, hit_count, size))
+
+    def _recompute(self):
+        entries = list(self.recent)
+        for w in self.windows:
+            window = entries[:w]
+            self.window_sums[w] = [len(window), sum(e[1] for e in window), sum(e[2] for e in window)]
+
+    def to_dict(self):
+        return {
+            'periods': self.periods,
+            'attempts': self.attempts,
+            'hits': self.hits,
+            'histogram': {str(k): v for k, v in self.histogram.items()},
+            'recent': [list(e) for e in self.recent]
+        }
+
+    @classmethod
+    def from_dict(cls, data, windows):
+        stats = cls(windows)
+        stats.periods = data.get('periods', 0)
+        stats.attempts = data.get('attempts', 0)
+        stats.hits = data.get('hits', 0)
+        stats.histogram = {int(k): v for k, v in data.get('histogram', {}).items()}
+        stats.recent.extend(tuple(e) for e in data.get('recent', []))
+        stats._recompute()
+        return stats
+
+    def summary(self):
+        result = {
+            'periods': self.periods,
+            'attempts': self.attempts,
+            'hits': self.hits,
+            'hit_rate': round(self.hits / self.attempts, 4) if self.attempts else 0,
+            'avg_hits': round(self.hits / self.periods, 3) if self.periods else 0,
+            'histogram': {str(k): self.histogram[k] for k in sorted(self.histogram)},
+            'last_period': self.recent[0][0] if self.recent else None,
+            'windows': {}
+        }
+        for w, (periods, hits, attempts) in self.window_sums.items():
+            result['windows'][str(w)] = {
+                'periods': periods,
+                'hits': hits,
+                'hit_rate': round(hits / attempts, 4) if attempts else 0,
+                'avg_hits': round(hits / periods, 3) if periods else 0
+            }
+        return result
+
+
+class StrategyLedger:
+    """各策略的表现台账（JSON 文件持久化，多进程写入时持文件锁）"""
+
+    def __init__(self):
+        self.windows = (10, 50)
+        self.ledger_file = None
+        self._signature = None
+        self._validated = 0
+        self._last_validated = None
+        self._strategies = {}
+        self._lock = threading.RLock()
+
+    def configure(self, ledger_file, windows=(10, 50)):
+        """
+        设置台账文件和滑动窗口期数
+
+        Args:
+            ledger_file: 台账 JSON 文件
+            windows: 滑动窗口期数
+        """
+        with self._lock:
+            self.ledger_file = str(ledger_file)
+            self.windows = tuple(sorted(set(windows)))
+            self._signature = None
+            self._validated = 0
+            self._last_validated = None
+            self._strategies = {}
+
+    def _file_signature(self):
+        try:
+            stat = os.stat(self.ledger_file)
+        except OSError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def _reload(self):
+        """文件被其他进程更新后重新读取"""
+        signature = self._file_signature()
+        if signature == self._signature:
+            return
+        self._validated = 0
+        self._last_validated = None
+        self._strategies = {}
+        if signature is not None:
+            with open(self.ledger_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if 'validated' in data:
+                # 旧格式保存的是全部已验证期号
+                periods = data['validated']
+                self._validated = len(periods)
+                self._last_validated = max(periods, key=int) if periods else None
+            else:
+                self._validated = data.get('validated_periods', 0)
+                self._last_validated = data.get('last_validated')
+            # 窗口配置变化时由保存的最近结果重算窗口合计
+            self._strategies = {key: _StrategyStats.from_dict(value, self.windows)
+                                for key, value in data.get('strategies', {}).items()}
+        self._signature = signature
+
+    def _save(self):
+        data = {
+            'windows': list(self.windows),
+            'validated_periods': self._validated,
+            'last_validated': self._last_validated,
+            'strategies': {key: stats.to_dict() for key, stats in sorted(self._strategies.items())}
+        }
+        atomic_write(self.ledger_file, lambda f: json.dump(data, f, ensure_ascii=False),
+                     'w', encoding='utf-8')
+        self._signature = self._file_signature()
+
+    def _add(self, period, validation):
+        period = str(period)
+        if self._last_validated is not None and int(period) <= int(self._last_validated):
+            return False
+        for key, result in validation.items():
+            stats = self._strategies.get(key)
+            if stats is None:
+                stats = self._strategies[key] = _StrategyStats(self.windows)
+            stats.add(period, result.get('hit_count', 0), len(result.get('predicted', [])))
+        self._validated += 1
+        self._last_validated = period
+        return True
+
+    def record(self, validations):
+        """
+        记入新验证的期号（台账尚未建立时由 ensure 从完整历史建立）
+        不晚于最后记入期号的验证（如补验证较早的期号）不计入统计，由调用方记录日志
+
+        Args:
+            validations: {期号: {策略: 验证结果}}
+
+        Returns:
+            list: 未计入统计的期号
+        """
+        if not self.ledger_file or not validations:
+            return []
+        with self._lock, file_lock(self.ledger_file + '.lock'):
+            if not os.path.exists(self.ledger_file):
+                return []
+            self._reload()
+            skipped = []
+            for period in sorted(validations, key=int):
+                if not self._add(period, validations[period]):
+                    skipped.append(period)
+            if len(skipped) < len(validations):
+                self._save()
+            return skipped
+
+    def ensure(self, load_history):
+        """
+        台账文件不存在时由完整推荐历史建立
+
+        Args:
+            load_history: 返回 {期号: 推荐记录} 的函数（持锁后调用，避免漏掉并发写入的验证）；
+                不能等待推荐记录写入队列，写入线程记入验证时需要同一把锁，
+                调用方应在此之前 flush
+        """
+        if os.path.exists(self.ledger_file):
+            return
+        with self._lock, file_lock(self.ledger_file + '.lock'):
+            if not os.path.exists(self.ledger_file):
+                self._rebuild(load_history())
+
+    def _rebuild(self, history):
+        self._validated = 0
+        self._last_validated = None
+        self._strategies = {}
+        for period in sorted(history, key=int):
+            validation = history[period].get('validation')
+            if validation:
+                self._add(period, validation)
+        self._save()
+
+    def stats(self, sort_window=None):
+        """
+        各策略表现，按命中率从高到低排列
+
+        Args:
+            sort_window: 按该滑动窗口的命中率排序，None 表示按累计命中率
+
+        Returns:
+            dict: {'windows', 'validated_periods', 'strategies': [...]}
+        """
+        with self._lock:
+            self._reload()
+            strategies = []
+            for key, stats in self._strategies.items():
+                item = stats.summary()
+                item['strategy'] = key
+                strategies.append(item)
+            validated = self._validated
+
+        if sort_window in self.windows:
+            strategies.sort(key=lambda s: (-s['windows'][str(sort_window)]['hit_rate'], s['strategy']))
+        else:
+            strategies.sort(key=lambda s: (-s['hit_rate'], s['strategy']))
+        return {
+            'windows': list(self.windows),
+            'validated_periods': validated,
+            'strategies': strategies
+        }
+
+
+# 全局实例
+strategy_ledger = StrategyLedger()
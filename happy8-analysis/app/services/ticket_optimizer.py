@@ -0,0 +1,267 @@
+"""
+多注号码组合优化
+从号码池中选出若干注 k 码号码，使整组号码覆盖尽可能多的号码对 / 三码组合，
+或使开出号码落在任一注中的期望个数最大。
+
+号码池内的号码用下标 0..n-1 表示，每注号码是 n 位位图；覆盖情况同样用位图记录：
+- 号码对：covered[a] 为已与 a 同注的号码位图
+- 三码组合：covered[a][b] 为已与 (a, b) 同注的号码位图
+一注号码新增覆盖的组合数只需 C(k, t-1) 次位运算和 popcount。
+
+每次重启先贪心逐个加号（按新增覆盖数，相同时优先使用次数少的号码，再随机），
+再逐注做单号替换的局部搜索直到无改进；多次重启取最优，可分到多个进程并行
+"""
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+from math import comb
+
+from app.utils.bitmask import popcount, union
+
+
+# 目标 -> 覆盖的组合大小
+OBJECTIVES = {'hits': 1, 'pairs': 2, 'triples': 3}
+
+
+def _members(mask):
+    """位图中为 1 的下标（升序）"""
+    result = []
+    while mask:
+        low = mask & -mask
+        result.append(low.bit_length() - 1)
+        mask ^= low
+    return result
+
+
+class _Coverage:
+    """已覆盖的 t 码组合（t = 1, 2, 3）"""
+
+    def __init__(self, size, t, weights=None):
+        self.size = size
+        self.t = t
+        self.weights = weights
+        if t == 1:
+            self.covered = 0
+        elif t == 2:
+            self.covered = [0] * size
+        else:
+            self.covered = [[0] * size for _ in range(size)]
+
+    def gain(self, ticket):
+        """一注号码（位图）新增覆盖的组合数（hits 目标为新增号码的权重和）"""
+        if self.t == 1:
+            new = ticket & ~self.covered
+            if self.weights is None:
+                return popcount(new)
+            return sum(self.weights[i] for i in _members(new))
+
+        members = _members(ticket)
+        total = 0
+        if self.t == 2:
+            for a in members:
+                # 只统计比 a 大的号码，每对计一次
+                total += popcount((ticket >> (a + 1) << (a + 1)) & ~self.covered[a])
+        else:
+            for i, a in enumerate(members):
+                row = self.covered[a]
+                for b in members[i + 1:]:
+                    total += popcount((ticket >> (b + 1) << (b + 1)) & ~row[b])
+        return total
+
+    def add(self, ticket):
+        """记录一注号码覆盖的组合"""
+        if self.t == 1:
+            self.covered |= ticket
+        elif self.t == 2:
+            for a in _members(ticket):
+                self.covered[a] |= ticket & ~(1 << a)
+        else:
+            members = _members(ticket)
+            for a, b in combinations(members, 2):
+                rest = ticket & ~(1 << a) & ~(1 << b)
+                self.covered[a][b] |= rest
+                self.covered[b][a] |= rest
+
+
+def _evaluate(tickets, size, t, weights=None):
+    """整组号码覆盖的组合数（hits 目标为覆盖号码的权重和）"""
+    coverage = _Coverage(size, t, weights)
+    total = 0
+    for ticket in tickets:
+        total += coverage.gain(ticket)
+        coverage.add(ticket)
+    return total
+
+
+def _greedy(size, k, count, t, weights, rng):
+    """贪心构造初始组合"""
+    coverage = _Coverage(size, t, weights)
+    usage = [0] * size
+    tickets = []
+    for _ in range(count):
+        ticket = 0
+        for _ in range(k):
+            best = None
+            for x in range(size):
+                if ticket >> x & 1:
+                    continue
+                key = (coverage.gain(ticket | 1 << x), -usage[x], rng.random())
+                if best is None or key > best[0]:
+                    best = (key, x)
+            ticket |= 1 << best[1]
+            usage[best[1]] += 1
+        coverage.add(ticket)
+        tickets.append(ticket)
+    return tickets
+
+
+def _local_search(tickets, size, t, weights, deadline):
+    """逐注尝试替换一个号码，直到一轮内没有改进或超时"""
+    full = (1 << size) - 1
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        for index in range(len(tickets)):
+            # 其余各注的覆盖情况
+            others = _Coverage(size, t, weights)
+            for j, other in enumerate(tickets):
+                if j != index:
+                    others.add(other)
+
+            ticket = tickets[index]
+            current = others.gain(ticket)
+            while True:
+                best, best_ticket = current, None
+                for a in _members(ticket):
+                    base = ticket & ~(1 << a)
+                    for b in _members(full & ~ticket):
+                        value = others.gain(base | 1 << b)
+                        if value > best:
+                            best, best_ticket = value, base | 1 << b
+                if best_ticket is None:
+                    break
+                ticket, current = best_ticket, best
+                improved = True
+            tickets[index] = ticket
+
+            if time.perf_counter() >= deadline:
+                break
+    return tickets
+
+
+def _search(size, k, count, t, weights, seeds, deadline):
+    """
+    按给定随机种子依次重启
+
+    Returns:
+        tuple: (最优覆盖值, 最优组合, 完成的重启次数)
+    """
+    # 覆盖值上限：达到后不再重启
+    if t == 1 and weights is not None:
+        bound = sum(sorted(weights)[-count * k:])
+    else:
+        bound = min(comb(size, t), count * comb(k, t))
+
+    best_value, best_tickets, runs = -1, None, 0
+    for seed in seeds:
+        if runs and time.perf_counter() >= deadline:
+            break
+        rng = random.Random(seed)
+        tickets = _local_search(_greedy(size, k, count, t, weights, rng), size, t, weights, deadline)
+        value = _evaluate(tickets, size, t, weights)
+        runs += 1
+        if value > best_value:
+            best_value, best_tickets = value, tickets
+        if best_value >= bound:
+            break
+    return best_value, best_tickets, runs
+
+
+def optimize_tickets(pool, k, count, objective='pairs', weights=None, restarts=8,
+                     time_budget=0.2, workers=1, seed=0):
+    """
+    选出覆盖最优的多注号码
+
+    Args:
+        pool: 号码池（如 ['03', '07', ...]，20-30 个时可在约 200ms 内返回）
+        k: 每注号码个数
+        count: 注数
+        objective: 'pairs'（号码对覆盖）、'triples'（三码组合覆盖）或 'hits'（期望命中号码数）
+        weights: hits 目标下各号码开出的概率，与 pool 一一对应，默认均为 20/80
+        restarts: 重启次数（时间用尽时提前结束）
+        time_budget: 搜索时间上限（秒）
+        workers: 并行重启的进程数，1 表示在当前进程中计算
+        seed: 随机种子，相同参数且未超时时结果相同
+
+    Returns:
+        dict: 各注号码、覆盖统计和期望命中数
+
+    Raises:
+        ValueError: 参数不合法
+    """
+    started = time.perf_counter()
+    labels = [str(n).zfill(2) for n in pool]
+    if weights is None:
+        weights = [20 / 80] * len(labels)
+    # 去重并按号码排序，权重随号码移动
+    weighted = sorted(dict(zip(labels, weights)).items())
+    pool = [number for number, _ in weighted]
+    weights = [weight for _, weight in weighted]
+    size = len(pool)
+    t = OBJECTIVES.get(objective)
+    if t is None:
+        raise ValueError(f'未知的优化目标: {objective}')
+    if not t <= k <= size:
+        raise ValueError(f'每注号码个数须在 {t} 到号码池大小 {size} 之间')
+    if count < 1:
+        raise ValueError('注数至少为 1')
+    # 覆盖目标不区分号码权重
+    search_weights = list(weights) if t == 1 else None
+
+    deadline = started + time_budget
+    seeds = [seed + r for r in range(max(restarts, 1))]
+    workers = min(workers or os.cpu_count() or 1, len(seeds))
+
+    if workers == 1:
+        outputs = [_search(size, k, count, t, search_weights, seeds, deadline)]
+    else:
+        # 重启按种子轮流分到各进程，进程内的截止时间由剩余预算换算
+        remaining = max(deadline - time.perf_counter(), 0)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(_run_worker, size, k, count, t, search_weights,
+                                seeds[i::workers], remaining)
+                for i in range(workers)
+            ]
+            outputs = [f.result() for f in futures]
+
+    # 覆盖值相同时取靠前进程（单进程时为靠前种子）的结果
+    _, tickets, _ = max(outputs, key=lambda o: o[0])
+    runs = sum(o[2] for o in outputs)
+
+    tickets = sorted(sorted(_members(ticket)) for ticket in tickets)
+    masks = [sum(1 << i for i in ticket) for ticket in tickets]
+    coverage = {}
+    for name, size_t in (('numbers', 1), ('pairs', 2), ('triples', 3)):
+        covered = _evaluate(masks, size, size_t)
+        total = comb(size, size_t)
+        coverage[name] = {'covered': covered, 'total': total,
+                          'ratio': round(covered / total, 4) if total else 0}
+
+    return {
+        'pool': pool,
+        'k': k,
+        'objective': objective,
+        'tickets': [[pool[i] for i in ticket] for ticket in tickets],
+        'coverage': coverage,
+        'expected_hits': round(sum(weights[i] for i in _members(union(masks))), 4),
+        'restarts': runs,
+        'elapsed': round(time.perf_counter() - started, 3)
+    }
+
+
+def _run_worker(size, k, count, t, weights, seeds, time_budget):
+    """子进程入口（截止时间按本进程的计时器重新计算）"""
+    return _search(size, k, count, t, weights, seeds, time.perf_counter() + time_budget)
@@ -0,0 +1,87 @@
+"""
+AC值批量计算
+AC值 = 两两之差的不同取值个数 - (号码个数 - 1)。
+对排序后的号码矩阵一次性求出每期全部 190 个差值，写入 (n, 80) 差值位图后按行计数；
+结果按开奖号码缓存，同一期号码只计算一次
+"""
+import threading
+
+import numpy as np
+
+from app.utils.bitmask import NUMBER_COUNT
+from app.utils.omission_matrix import number_matrix
+
+
+def batch_ac_values(numbers):
+    """
+    批量计算 AC 值（与 pattern.calculate_ac_value 一致）
+
+    Args:
+        numbers: (n, k) 整数号码矩阵，0 表示空位
+
+    Returns:
+        numpy.ndarray: 长度 n 的 AC 值
+    """
+    numbers = np.sort(np.asarray(numbers, dtype=np.int16), axis=1)
+    if not len(numbers):
+        return np.zeros(0, dtype=np.int16)
+
+    # 每行去重后的号码个数（空位和重复号码不计）
+    distinct = numbers > 0
+    distinct[:, 1:] &= numbers[:, 1:] != numbers[:, :-1]
+    counts = distinct.sum(axis=1)
+
+    # 两两之差写入差值位图
+    first, second = np.triu_indices(numbers.shape[1], 1)
+    low, high = numbers[:, first], numbers[:, second]
+    differences = high - low
+    valid = (low > 0) & (differences > 0)
+    present = np.zeros((len(numbers), NUMBER_COUNT), dtype=bool)
+    rows = np.broadcast_to(np.arange(len(numbers))[:, None], differences.shape)
+    present[rows[valid], differences[valid]] = True
+
+    ac = present.sum(axis=1) - (counts - 1)
+    return np.where(counts < 2, 0, ac).astype(np.int16)
+
+
+class ACValueCache:
+    """按开奖号码缓存的 AC 值"""
+
+    def __init__(self, max_entries=100000):
+        self.max_entries = max_entries
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def values(self, draws):
+        """
+        多期开奖号码的 AC 值（未缓存的号码一次性批量计算）
+
+        Args:
+            draws: 号码列表的列表，如 [item['numbers'] for item in data]
+
+        Returns:
+            list: 与 draws 顺序一致的 AC 值
+        """
+        keys = [tuple(numbers) for numbers in draws]
+        unique = set(keys)
+        with self._lock:
+            result = {key: self._values[key] for key in unique if key in self._values}
+
+        missing = [key for key in unique if key not in result]
+        if missing:
+            computed = batch_ac_values(number_matrix([{'numbers': key} for key in missing]))
+            result.update(zip(missing, computed.tolist()))
+            with self._lock:
+                if len(self._values) + len(missing) > self.max_entries:
+                    self._values.clear()
+                self._values.update(zip(missing, computed.tolist()))
+
+        return [result[key] for key in keys]
+
+    def value(self, numbers):
+        """单期开奖号码的 AC 值"""
+        return self.values([numbers])[0]
+
+
+# 全局实例
+ac_cache = ACValueCache()
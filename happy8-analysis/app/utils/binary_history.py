@@ -0,0 +1,211 @@
+"""
+开奖历史二进制格式
+定长记录的 .npy 文件（期号 int64 + 日期 + 20 个 uint8 号码 + 80 位位图），
+通过 numpy.memmap 加载，gunicorn 各 worker 经由系统页缓存共享同一份数据。
+记录按期号升序存储，新开奖直接追加到文件末尾并改写文件头中的记录数，不重写整个文件
+"""
+import os
+
+import numpy as np
+from numpy.lib import format as npy_format
+
+from app.utils.file_lock import atomic_write, file_lock
+
+
+# 每期一条定长记录，按期号升序存储
+DRAW_DTYPE = np.dtype([
+    ('period', '<i8'),
+    ('date', 'S10'),
+    ('numbers', 'u1', (20,)),
+    ('masks', '<u8', (2,)),
+])
+
+
+def binary_path_for(history_file):
+    """CSV 文件对应的二进制文件路径（同目录同名 .npy）"""
+    return os.path.splitext(str(history_file))[0] + '.npy'
+
+
+def is_binary_fresh(binary_file, history_file):
+    """
+    判断二进制文件是否比 CSV 新
+
+    Args:
+        binary_file: 二进制文件路径
+        history_file: CSV 文件路径
+
+    Returns:
+        bool: 二进制文件存在且比 CSV 新
+    """
+    try:
+        binary_mtime = os.stat(binary_file).st_mtime_ns
+    except OSError:
+        return False
+    try:
+        # 修改时间精度有限，二者相同时 CSV 可能在二进制文件之后写入，按过期处理
+        return binary_mtime > os.stat(history_file).st_mtime_ns
+    except OSError:
+        return True
+
+
+def _to_records(periods, dates, numbers, masks):
+    records = np.zeros(len(periods), dtype=DRAW_DTYPE)
+    records['period'] = periods
+    if len(dates):
+        dates = np.asarray(dates)
+        records['date'] = dates if dates.dtype.kind == 'S' else np.char.encode(dates.astype(str), 'utf-8')
+    records['numbers'] = numbers
+    records['masks'] = masks
+    return records
+
+
+def save_binary(binary_file, periods, dates, numbers, masks):
+    """
+    原子写入二进制历史文件
+
+    Args:
+        binary_file: 目标路径
+        periods: (n,) 期号（升序）
+        dates: (n,) 日期
+        numbers: (n, 20) 号码
+        masks: (n, 2) 位图
+    """
+    records = _to_records(periods, dates, numbers, masks)
+    atomic_write(binary_file, lambda f: np.save(f, records, allow_pickle=False), 'wb')
+
+
+def append_binary(binary_file, count, periods, dates, numbers, masks):
+    """
+    在二进制历史文件末尾追加记录，并原地改写文件头中的记录数
+
+    先写记录并落盘，再改写文件头；中途失败时文件头仍是原记录数，多写的尾部下次追加时覆盖
+
+    Args:
+        binary_file: 二进制文件路径
+        count: 预期的现有记录数，与文件不一致（如其他进程已追加）时不写入
+        periods: (m,) 新增期号（升序，均大于现有期号）
+        dates: (m,) 日期
+        numbers: (m, 20) 号码
+        masks: (m, 2) 位图
+
+    Returns:
+        bool: 是否追加成功；文件不存在、格式不匹配或文件头容纳不下新的记录数时返回 False
+    """
+    records = _to_records(periods, dates, numbers, masks)
+    try:
+        with file_lock(binary_file + '.lock'), open(binary_file, 'r+b') as f:
+            version = npy_format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran_order, dtype = npy_format.read_array_header_1_0(f)
+            elif version == (2, 0):
+                shape, fortran_order, dtype = npy_format.read_array_header_2_0(f)
+            else:
+                return False
+            if dtype != DRAW_DTYPE or fortran_order or shape != (count,):
+                return False
+
+            offset = f.tell()
+            header = _array_header(version, count + len(records), offset)
+            if header is None:
+                return False
+
+            f.seek(offset + count * DRAW_DTYPE.itemsize)
+            f.write(records.tobytes())
+            f.truncate()
+            f.flush()
+            os.fsync(f.fileno())
+
+            f.seek(0)
+            f.write(header)
+            f.flush()
+            os.fsync(f.fileno())
+            return True
+    except (OSError, ValueError):
+        return False
+
+
+def _array_header(version, count, length):
+    """
+    记录数为 count 的 .npy 文件头（魔数 + 长度 + 描述字典，用空格补齐到原长度）
+
+    Returns:
+        bytes: 文件头，原长度放不下时返回 None
+    """
+    text = repr({'descr': npy_format.dtype_to_descr(DRAW_DTYPE),
+                 'fortran_order': False, 'shape': (count,)})
+    prefix_length = 10 if version == (1, 0) else 12
+    padding = length - prefix_length - len(text) - 1
+    if padding < 0:
+        return None
+    text = (text + ' ' * padding + '\n').encode('latin1')
+    size = len(text).to_bytes(2 if version == (1, 0) else 4, 'little')
+    return npy_format.magic(*version) + size + text
+
+
+def load_binary(binary_file):
+    """
+    以只读 memmap 方式加载二进制历史文件
+
+    Args:
+        binary_file: 二进制文件路径
+
+    Returns:
+        numpy.memmap: DRAW_DTYPE 结构化数组
+
+    Raises:
+        ValueError: 文件格式不匹配
+    """
+    records = np.load(binary_file, mmap_mode='r', allow_pickle=False)
+    if records.dtype != DRAW_DTYPE:
+        raise ValueError(f'二进制历史文件格式不匹配: {records.dtype}')
+    return records
+
+
+def csv_to_binary(history_file, binary_file=None):
+    """
+    CSV 转换为二进制格式
+
+    Args:
+        history_file: CSV 文件路径
+        binary_file: 输出路径，默认与 CSV 同名 .npy
+
+    Returns:
+        int: 转换的期数
+    """
+    from app.utils.draw_store import DrawStore
+
+    store = DrawStore()
+    store.refresh(history_file)
+    snap = store.snapshot
+    # 快照按期号倒序，文件按升序存储
+    save_binary(binary_file or binary_path_for(history_file),
+                snap.periods[::-1], snap.dates[::-1], snap.numbers[::-1], snap.masks[::-1])
+    return len(store)
+
+
+def binary_to_csv(binary_file, history_file):
+    """
+    二进制格式导出为 CSV
+
+    Args:
+        binary_file: 二进制文件路径
+        history_file: 输出 CSV 路径
+
+    Returns:
+        int: 导出的期数
+    """
+    from app.utils.history_writer import write_full_csv
+
+    # 按期号倒序导出
+    records = load_binary(binary_file)[::-1]
+    draws = [
+        {
+            'period': str(period),
+            'date': date.decode('utf-8'),
+            'numbers': [str(n).zfill(2) for n in row]
+        }
+        for period, date, row in zip(records['period'].tolist(), records['date'].tolist(),
+                                     records['numbers'].tolist())
+    ]
+    write_full_csv(history_file, draws)
+    return len(draws)
@@ -0,0 +1,227 @@
+"""
+号码位图编码模块
+将一期开奖号码编码为 80 位位图：号码 n 对应第 n-1 位
+标量使用 Python int，批量使用 (n, 2) uint64 数组（低 64 位 + 高 16 位）
+"""
+import numpy as np
+
+
+NUMBER_COUNT = 80
+FULL_MASK = (1 << NUMBER_COUNT) - 1
+
+# 单个号码的位 (下标 0 占位)
+NUMBER_BITS = [0] + [1 << (n - 1) for n in range(1, NUMBER_COUNT + 1)]
+
+# 每个尾数 (0-9) 对应的号码位图
+TAIL_MASKS = [
+    sum(NUMBER_BITS[n] for n in range(1, NUMBER_COUNT + 1) if n % 10 == tail)
+    for tail in range(10)
+]
+
+# 字节级 popcount 查找表（兼容 numpy < 2.0，无 bitwise_count）
+_BYTE_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+if hasattr(int, 'bit_count'):
+    def popcount(mask):
+        """统计位图中 1 的个数"""
+        return mask.bit_count()
+else:  # Python < 3.10
+    def popcount(mask):
+        """统计位图中 1 的个数"""
+        return bin(mask).count('1')
+
+
+def encode(numbers):
+    """
+    将号码列表编码为位图
+
+    Args:
+        numbers: 号码列表，元素可为 int 或 '01' 形式的字符串
+
+    Returns:
+        int: 80 位位图
+    """
+    mask = 0
+    for n in numbers:
+        mask |= NUMBER_BITS[int(n)]
+    return mask
+
+
+def decode(mask):
+    """
+    将位图解码为升序号码列表
+
+    Args:
+        mask: 80 位位图
+
+    Returns:
+        list: 升序整数号码
+    """
+    numbers = []
+    while mask:
+        low = mask & -mask
+        numbers.append(low.bit_length())
+        mask ^= low
+    return numbers
+
+
+def to_labels(mask):
+    """将位图解码为 '01' 形式的升序字符串列表"""
+    return [str(n).zfill(2) for n in decode(mask)]
+
+
+def has_number(mask, number):
+    """判断号码是否命中"""
+    return bool(mask & NUMBER_BITS[int(number)])
+
+
+def intersect_count(a, b):
+    """两个位图交集的号码个数（如重号个数、命中个数）"""
+    return popcount(a & b)
+
+
+def union(masks):
+    """多个位图的并集"""
+    result = 0
+    for mask in masks:
+        result |= mask
+    return result
+
+
+def hit_count(ticket_mask, draw_masks):
+    """
+    统计一注号码在多期开奖中的命中个数
+
+    Args:
+        ticket_mask: 投注号码位图
+        draw_masks: 开奖位图列表
+
+    Returns:
+        list: 每期命中个数
+    """
+    return [popcount(ticket_mask & mask) for mask in draw_masks]
+
+
+def difference_mask(mask):
+    """
+    号码两两之差的位图：第 d-1 位表示差值 d 出现过
+
+    每个号码 n 将整个位图右移 n 位，命中位即为比 n 大的号码与 n 之差
+    """
+    result = 0
+    remaining = mask
+    while remaining:
+        low = remaining & -remaining
+        result |= mask >> low.bit_length()
+        remaining ^= low
+    return result
+
+
+def consecutive_runs(mask):
+    """
+    拆分位图中的连号段
+
+    Args:
+        mask: 号码位图
+
+    Returns:
+        list: 每个连号段（长度 >= 2）的升序号码列表
+    """
+    runs = []
+    remaining = mask
+    while remaining:
+        low = remaining & -remaining
+        start = low.bit_length()
+        # 从最低位开始的连续 1 的长度
+        length = ((remaining >> (start - 1)) ^ ((remaining >> (start - 1)) + 1)).bit_length() - 1
+        if length >= 2:
+            runs.append(list(range(start, start + length)))
+        remaining &= ~(((1 << length) - 1) << (start - 1))
+    return runs
+
+
+def encode_matrix(numbers):
+    """
+    批量编码号码矩阵
+
+    Args:
+        numbers: (n, 20) 整数号码矩阵
+
+    Returns:
+        numpy.ndarray: (n, 2) uint64 位图，[:, 0] 为号码 1-64，[:, 1] 为号码 65-80
+    """
+    numbers = np.asarray(numbers, dtype=np.int64)
+    bits = numbers - 1
+    low = np.where(bits < 64, np.left_shift(np.uint64(1), np.clip(bits, 0, 63).astype(np.uint64)), np.uint64(0))
+    high = np.where(bits >= 64, np.left_shift(np.uint64(1), np.clip(bits - 64, 0, 63).astype(np.uint64)), np.uint64(0))
+
+    words = np.zeros((numbers.shape[0], 2), dtype=np.uint64)
+    words[:, 0] = np.bitwise_or.reduce(low, axis=1) if numbers.size else 0
+    words[:, 1] = np.bitwise_or.reduce(high, axis=1) if numbers.size else 0
+    return words
+
+
+def popcount_words(words):
+    """
+    uint64 位图数组的逐行 popcount
+
+    Args:
+        words: (n, 2) uint64 数组
+
+    Returns:
+        numpy.ndarray: (n,) 每行 1 的个数
+    """
+    words = np.ascontiguousarray(words, dtype=np.uint64)
+    as_bytes = words.view(np.uint8).reshape(words.shape[0], -1)
+    return _BYTE_POPCOUNT[as_bytes].sum(axis=1, dtype=np.int64)
+
+
+def words_to_int(words):
+    """(2,) uint64 位图转换为 Python int"""
+    return int(words[0]) | (int(words[1]) << 64)
+
+
+def int_to_words(mask):
+    """Python int 位图转换为 (2,) uint64 数组"""
+    return np.array([mask & 0xFFFFFFFFFFFFFFFF, mask >> 64], dtype=np.uint64)
+
+
+def draw_masks(data):
+    """
+    将历史数据列表批量编码为位图列表
+
+    Args:
+        data: 历史数据列表，每项包含 numbers
+
+    Returns:
+        list: 与 data 顺序一致的位图列表
+    """
+    return [encode(item['numbers']) for item in data]
+
+
+def current_omission(masks):
+    """
+    计算每个号码的当前遗漏期数
+
+    Args:
+        masks: 位图列表（按时间倒序，masks[0] 为最新一期）
+
+    Returns:
+        list: 长度 81 的遗漏列表（下标 0 占位），窗口内未出现的号码遗漏为窗口长度
+    """
+    omission = [len(masks)] * (NUMBER_COUNT + 1)
+    omission[0] = 0
+    remaining = FULL_MASK
+
+    for idx, mask in enumerate(masks):
+        newly_hit = remaining & mask
+        while newly_hit:
+            low = newly_hit & -newly_hit
+            omission[low.bit_length()] = idx
+            newly_hit ^= low
+        remaining &= ~mask
+        if not remaining:
+            break
+
+    return omission
@@ -2,57 +2,58 @@
 数据加载模块
 负责从 CSV 文件和网络 API 获取彩票数据
 """
-import csv
 import os
-import requests
 from datetime import datetime
 from flask import current_app
+from app.services.fetch_engine import fetch_engine
+from app.utils.draw_store import draw_store
+from app.utils.file_lock import file_lock
+from app.utils.history_writer import merge_draws, normalize_draws, write_full_csv
+from app.utils.single_flight import single_flight
+from app.utils.response_cache import response_cache
+from app.utils import sqlite_store
+
+
+# 福彩官网必须带上 Referer
+REQUEST_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Referer': 'http://www.cwl.gov.cn/ygkj/kjgg/kl8/'
+}
 
 
 def read_from_csv(limit=50):
     """
     从CSV文件读取历史数据
     
+    数据由进程级的 draw_store 缓存，文件未变化时不会重新解析；
+    启用 SQLite 后端时直接按期号索引查询
+    
     Args:
         limit: 读取的数据条数
         
     Returns:
         list: 历史数据列表，每项包含 period, date, numbers
     """
+    if sqlite_store.is_enabled():
+        try:
+            data = sqlite_store.read_draws(limit)
+            current_app.logger.info(f'从SQLite读取 {len(data)} 期数据')
+            return data
+        except Exception as e:
+            current_app.logger.error(f'读取SQLite数据失败: {e}')
+            return []
+    
     history_file = current_app.config['HISTORY_FILE']
     
     if not os.path.exists(history_file):
         current_app.logger.warning(f'数据文件不存在: {history_file}')
         return []
     
-    data = []
     try:
-        with open(history_file, 'r', encoding='utf-8-sig') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                # 提取号码
-                numbers = []
-                for key in row.keys():
-                    if key.startswith('号码') or (key.isdigit() or key[1:].isdigit() if len(key) > 1 else False):
-                        if row[key]:
-                            numbers.append(row[key].zfill(2))
-                
-                # 如果没有找到号码列，尝试从所有列中提取
-                if not numbers:
-                    for key, value in row.items():
-                        if value and value.isdigit() and 1 <= int(value) <= 80:
-                            numbers.append(value.zfill(2))
-                
-                if len(numbers) >= 20:
-                    data.append({
-                        'period': row.get('期号', row.get(list(row.keys())[0], '')),
-                        'date': row.get('日期', row.get(list(row.keys())[1], '')),
-                        'numbers': numbers[:20]
-                    })
-                
-                if len(data) >= limit:
-                    break
-                    
+        if draw_store.refresh(history_file):
+            current_app.logger.info(f'重新加载CSV数据文件, 共 {len(draw_store)} 期')
+        
+        data = draw_store.to_records(limit)
         current_app.logger.info(f'从CSV读取 {len(data)} 期数据')
         return data
         
@@ -63,7 +64,9 @@ def read_from_csv(limit=50):
 
 def save_to_csv(data):
     """
-    保存数据到CSV文件
+    整表保存数据到CSV文件（原子替换）
+    
+    会覆盖已有历史，日常新增数据请使用 merge_history
     
     Args:
         data: 要保存的数据列表
@@ -74,19 +77,9 @@ def save_to_csv(data):
     history_file = current_app.config['HISTORY_FILE']
     
     try:
-        with open(history_file, 'w', encoding='utf-8-sig', newline='') as f:
-            fieldnames = ['期号', '日期'] + [f'号码{i+1}' for i in range(20)]
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            
-            for item in data:
-                row = {
-                    '期号': item['period'],
-                    '日期': item['date']
-                }
-                for i, num in enumerate(item['numbers'][:20]):
-                    row[f'号码{i+1}'] = num
-                writer.writerow(row)
+        with file_lock(f'{history_file}.lock'):
+            write_full_csv(history_file, data)
+        response_cache.invalidate()
                 
         current_app.logger.info(f'保存 {len(data)} 期数据到CSV')
         return True
@@ -96,6 +89,98 @@ def save_to_csv(data):
         return False
 
 
+def merge_history(data):
+    """
+    按期号增量合并数据到CSV文件（或SQLite），只写入本地不存在的期号
+    
+    Args:
+        data: 开奖数据列表
+        
+    Returns:
+        int: 新增期数，失败返回 -1
+    """
+    history_file = current_app.config['HISTORY_FILE']
+    
+    try:
+        if sqlite_store.is_enabled():
+            added = sqlite_store.insert_draws(normalize_draws(data))
+        else:
+            added = merge_draws(history_file, data)
+        if added:
+            # 开奖数据变化，已缓存的接口响应失效
+            response_cache.invalidate()
+            current_app.logger.info(f'新增 {len(added)} 期开奖数据')
+        return len(added)
+        
+    except Exception as e:
+        current_app.logger.error(f'合并CSV数据失败: {e}')
+        return -1
+
+
+def data_version():
+    """
+    开奖数据版本，用于接口响应缓存的键
+    
+    Returns:
+        tuple: (最新期号, 总期数)，无数据时为 (None, 0)
+    """
+    if sqlite_store.is_enabled():
+        return sqlite_store.draw_version()
+    
+    history_file = current_app.config['HISTORY_FILE']
+    if not os.path.exists(history_file):
+        return (None, 0)
+    
+    draw_store.refresh(history_file)
+    return (draw_store.latest_period(), len(draw_store))
+
+
+def _stat_signature(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def data_signature():
+    """
+    开奖数据文件签名，用于接口响应缓存的键
+    
+    与 data_version 不同，数据文件在应用外被改写（期号和期数不变，只更正号码）时也会变化
+    
+    Returns:
+        tuple: CSV 文件的 (inode, mtime, size)；SQLite 后端为数据库及 WAL 文件的签名；无数据时为 None
+    """
+    if sqlite_store.is_enabled():
+        db_file = str(current_app.config['DATABASE_FILE'])
+        return (_stat_signature(db_file), _stat_signature(db_file + '-wal'))
+    
+    history_file = current_app.config['HISTORY_FILE']
+    if not os.path.exists(history_file):
+        return None
+    
+    draw_store.refresh(history_file)
+    return draw_store.signature
+
+
+def period_exists(period):
+    """
+    检查期号是否已存在
+    
+    Args:
+        period: 期号
+        
+    Returns:
+        bool: 是否存在
+    """
+    if sqlite_store.is_enabled():
+        return sqlite_store.has_draw(period)
+    
+    draw_store.refresh(current_app.config['HISTORY_FILE'])
+    return period in draw_store
+
+
 def save_manual_data(period, numbers):
     """
     保存手动录入的数据
@@ -108,12 +193,9 @@ def save_manual_data(period, numbers):
         dict: 包含 success 和 message 的结果字典
     """
     try:
-        current_data = read_from_csv(limit=1000)
-        
         # 检查期号是否已存在
-        for item in current_data:
-            if item['period'] == period:
-                return {'success': False, 'message': f'期号 {period} 已存在'}
+        if period_exists(period):
+            return {'success': False, 'message': f'期号 {period} 已存在'}
         
         # 添加新数据
         today = datetime.now().strftime('%Y-%m-%d')
@@ -123,12 +205,14 @@ def save_manual_data(period, numbers):
             'numbers': [str(n).zfill(2) for n in numbers]
         }
         
-        current_data.insert(0, new_item)
-        current_data.sort(key=lambda x: x['period'], reverse=True)
-        
-        if save_to_csv(current_data):
+        added = merge_history([new_item])
+        if added > 0:
             current_app.logger.info(f'手动录入期号 {period} 成功')
             return {'success': True, 'message': '保存成功'}
+        elif added == 0:
+            if period_exists(period):
+                return {'success': False, 'message': f'期号 {period} 已存在'}
+            return {'success': False, 'message': '数据格式错误: 期号或号码无效'}
         else:
             return {'success': False, 'message': '保存失败'}
             
@@ -137,69 +221,53 @@ def save_manual_data(period, numbers):
         return {'success': False, 'message': str(e)}
 
 
-def fetch_from_network(limit=50):
+def fetch_from_network(limit=50, force=False, page=1):
     """
     从网络API获取数据
     
     Args:
-        limit: 获取的数据条数
+        limit: 获取的数据条数（分页时为每页条数）
+        force: 是否跳过响应缓存的新鲜期（仍会使用条件请求）
+        page: 页码，从 1 开始
         
     Returns:
         list: 获取的数据列表，失败返回空列表
     """
-    current_app.logger.info(f'从网络获取最近 {limit} 期数据')
+    if page > 1:
+        current_app.logger.info(f'从网络获取第 {page} 页数据 (每页 {limit} 期)')
+    else:
+        current_app.logger.info(f'从网络获取最近 {limit} 期数据')
     
     # 清除代理
     os.environ.pop('HTTP_PROXY', None)
     os.environ.pop('HTTPS_PROXY', None)
     
-    sources = current_app.config['DATA_SOURCES']
-    # 福彩官网必须带上 Referer
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-        'Referer': 'http://www.cwl.gov.cn/ygkj/kjgg/kl8/'
-    }
-    timeout = current_app.config['REQUEST_TIMEOUT']
+    config = current_app.config
+    logger = current_app.logger
     
-    for source in sources:
-        try:
-            url = source['url'].format(limit=limit)
-            current_app.logger.debug(f"尝试数据源: {source['name']}")
-            
-            # 使用 verify=False 绕过某些环境下的 SSL 证书问题
-            response = requests.get(url, headers=headers, timeout=timeout, verify=False)
-            
-            if response.status_code == 200:
-                resp_json = response.json()
-                
-                # 解析福彩官网格式
-                if source['name'] == '福彩官网' and 'result' in resp_json:
-                    parsed_data = []
-                    for item in resp_json['result']:
-                        # 格式化日期: "2024-01-21(日)" -> "2024-01-21"
-                        raw_date = item.get('date', '')
-                        clean_date = raw_date.split('(')[0] if '(' in raw_date else raw_date
-                        
-                        # 转换号码: "01,02,03..." -> ["01", "02", "03"...]
-                        raw_nums = item.get('red', '').split(',')
-                        
-                        parsed_data.append({
-                            'period': item.get('code', ''),
-                            'date': clean_date,
-                            'numbers': [n.zfill(2) for n in raw_nums if n.strip()]
-                        })
-                    
-                    if parsed_data:
-                        current_app.logger.info(f"{source['name']} 解析成功，获取 {len(parsed_data)} 期数据")
-                        return parsed_data
-                
-                # TODO: 实现其他数据源解析
-                current_app.logger.warning(f"{source['name']} 返回数据，但解析逻辑未适配")
-                
-        except Exception as e:
-            current_app.logger.error(f"{source['name']} 请求失败: {str(e)[:100]}")
+    # 多数据源并发获取：慢源触发对冲请求，失败源熔断跳过
+    def fetch():
+        return fetch_engine.fetch(
+            config['DATA_SOURCES'],
+            limit,
+            headers=REQUEST_HEADERS,
+            timeout=config['REQUEST_TIMEOUT'],
+            logger=logger,
+            hedge_delay=config.get('FETCH_HEDGE_DELAY', 2.0),
+            failure_threshold=config.get('CIRCUIT_BREAKER_THRESHOLD', 3),
+            cooldown=config.get('CIRCUIT_BREAKER_COOLDOWN', 300),
+            cache_ttl=config.get('FETCH_CACHE_TTL', 60),
+            cache_timeout=config['CACHE_TIMEOUT'],
+            force=force,
+            page=page
+        )
     
-    return []
+    # 并发的相同请求（含其他 worker）合并为一次，冷却期内直接复用结果
+    return single_flight.do(
+        f'fetch_{limit}_{page}', fetch,
+        state_dir=config['SINGLE_FLIGHT_DIR'],
+        cooldown=config.get('FETCH_COOLDOWN', 30)
+    )
 
 
 def fetch_data(limit=50, force_network=False):
@@ -222,10 +290,22 @@ def fetch_data(limit=50, force_network=False):
     else:
         current_app.logger.info('强制刷新模式，跳过本地缓存')
     
-    # 尝试网络获取
-    network_data = fetch_from_network(limit)
+    # 尝试网络获取并合并；强制刷新时并发调用共享同一次获取和写入
+    def fetch_and_merge():
+        network_data = fetch_from_network(limit, force=force_network)
+        if network_data:
+            merge_history(network_data)
+        return network_data
+    
+    if force_network:
+        network_data = single_flight.do(
+            f'refresh_{limit}', fetch_and_merge,
+            state_dir=current_app.config['SINGLE_FLIGHT_DIR'],
+            cooldown=current_app.config.get('FETCH_COOLDOWN', 30)
+        )
+    else:
+        network_data = fetch_and_merge()
     if network_data:
-        save_to_csv(network_data)
         return network_data
     
     # 降级使用本地数据
@@ -0,0 +1,520 @@
+"""
+开奖数据存储模块
+进程级的列式开奖数据缓存：号码矩阵 (n, 20) uint8 + 位图 (n, 2) uint64 + 期号/日期数组
+只在数据文件的 inode/mtime/size 变化时重新加载，可选 memmap 二进制格式。
+数据按期号升序存储（预留容量，或直接引用升序的二进制文件），快照是倒序视图，
+按期号追加的新开奖只写入尾部，不复制已有数据
+"""
+import csv
+import io
+import os
+import threading
+from collections import namedtuple
+
+import numpy as np
+
+from app.utils.binary_history import (
+    append_binary, binary_path_for, is_binary_fresh, load_binary, save_binary
+)
+from app.utils.bitmask import encode_matrix
+
+
+# 号码整数 -> 两位字符串 ("01" ~ "80")，下标 0 占位
+NUMBER_LABELS = [str(i).zfill(2) for i in range(81)]
+
+# 一次加载的完整快照，整体替换以保证并发读取的一致性
+DrawSnapshot = namedtuple('DrawSnapshot', ['periods', 'dates', 'numbers', 'masks', 'index'])
+
+# latest(n) 返回的视图
+DrawView = namedtuple('DrawView', ['periods', 'dates', 'numbers', 'masks'])
+
+
+class _PeriodPositions:
+    """
+    期号 -> 升序存储中的位置，首次查询时才构建字典
+
+    追加新开奖时位置不变，新期号直接加入同一字典，由各快照共用
+    """
+
+    def __init__(self, periods, count):
+        self._periods = periods
+        self._count = count
+        self._map = None
+        self._lock = threading.Lock()
+
+    def get(self, period):
+        positions = self._map
+        if positions is None:
+            with self._lock:
+                if self._map is None:
+                    self._map = {p: i for i, p in enumerate(self._periods[:self._count].tolist())}
+                positions = self._map
+        return positions.get(period)
+
+    def extend(self, periods, storage):
+        """
+        登记追加的期号
+
+        Args:
+            periods: 新增期号（升序）
+            storage: 追加后的升序期号存储
+        """
+        with self._lock:
+            start = self._count
+            self._periods = storage
+            self._count = start + len(periods)
+            if self._map is not None:
+                for offset, period in enumerate(np.asarray(periods).tolist()):
+                    self._map[period] = start + offset
+
+
+class _PeriodIndex:
+    """期号 -> 快照行号（倒序）索引"""
+
+    def __init__(self, positions, count):
+        self._positions = positions
+        self._count = count
+
+    def get(self, period, default=None):
+        position = self._positions.get(period)
+        # 快照之后追加的期号不属于本快照
+        if position is None or position >= self._count:
+            return default
+        return self._count - 1 - position
+
+    def __contains__(self, period):
+        return self.get(period) is not None
+
+
+# 升序存储的一组列
+DrawRows = namedtuple('DrawRows', ['periods', 'dates', 'numbers', 'masks'])
+
+
+def _empty_rows():
+    return DrawRows(
+        periods=np.zeros(0, dtype=np.int64),
+        dates=np.array([], dtype='<U10'),
+        numbers=np.zeros((0, 20), dtype=np.uint8),
+        masks=np.zeros((0, 2), dtype=np.uint64)
+    )
+
+
+def _empty_snapshot():
+    rows = _empty_rows()
+    return DrawSnapshot(*rows, index=_PeriodIndex(_PeriodPositions(rows.periods, 0), 0))
+
+
+def _sorted_rows(periods, dates, numbers, masks=None):
+    """
+    按期号升序排列并去重（重复期号保留先出现的一行）
+
+    Returns:
+        DrawRows: 升序的各列
+    """
+    periods = np.asarray(periods, dtype=np.int64)
+    dates = np.asarray(dates, dtype=str)
+    numbers = np.asarray(numbers, dtype=np.uint8).reshape(-1, 20)
+    if masks is None:
+        masks = encode_matrix(numbers)
+    if len(periods) == 0:
+        return _empty_rows()
+
+    order = np.argsort(periods, kind='stable')
+    sorted_periods = periods[order]
+    keep = np.ones(len(order), dtype=bool)
+    keep[1:] = sorted_periods[1:] != sorted_periods[:-1]
+    order = order[keep]
+
+    if len(order) != len(periods) or np.any(order != np.arange(len(periods))):
+        periods, dates, numbers, masks = periods[order], dates[order], numbers[order], masks[order]
+    return DrawRows(periods, dates, numbers, masks)
+
+
+def _decode_dates(dates):
+    """二进制文件中的日期为 bytes，统一转换为 str 数组"""
+    if dates.dtype.kind == 'S':
+        return np.char.decode(dates, 'utf-8')
+    return dates
+
+
+def _is_number_column(key):
+    """判断表头是否为号码列（"号码N" 或纯数字列名）"""
+    if not key:
+        return False
+    if key.startswith('号码'):
+        return True
+    return key.isdigit() or key[1:].isdigit() if len(key) > 1 else False
+
+
+# CSV 表头解析结果：期号列、日期列、号码列下标
+CsvLayout = namedtuple('CsvLayout', ['period_col', 'date_col', 'number_cols'])
+
+
+def read_csv_layout(header):
+    """
+    解析CSV表头
+
+    Args:
+        header: 表头字段列表
+
+    Returns:
+        CsvLayout: 各列下标
+    """
+    return CsvLayout(
+        period_col=header.index('期号') if '期号' in header else 0,
+        date_col=header.index('日期') if '日期' in header else 1,
+        number_cols=[i for i, key in enumerate(header) if _is_number_column(key)]
+    )
+
+
+def parse_history_csv(history_file, offset=0, layout=None):
+    """
+    解析历史数据CSV文件
+
+    Args:
+        history_file: CSV 文件路径
+        offset: 起始字节偏移，大于 0 时只解析追加部分（需同时传入 layout）
+        layout: 已知的表头布局
+
+    Returns:
+        tuple: (periods, dates, numbers, layout)，号码为整数列表
+    """
+    periods, dates, numbers = [], [], []
+
+    if offset:
+        with open(history_file, 'rb') as f:
+            f.seek(offset)
+            reader = csv.reader(io.StringIO(f.read().decode('utf-8'), newline=''))
+    else:
+        with open(history_file, 'r', encoding='utf-8-sig', newline='') as f:
+            reader = csv.reader(io.StringIO(f.read(), newline=''))
+        header = next(reader, None)
+        if not header:
+            return periods, dates, numbers, None
+        # 表头只解析一次
+        layout = read_csv_layout(header)
+
+    for row in reader:
+        if not row:
+            continue
+
+        if layout.number_cols:
+            nums = [row[i] for i in layout.number_cols if i < len(row) and row[i]]
+        else:
+            # 没有号码列，尝试从所有列中提取
+            nums = [v for v in row if v and v.isdigit() and 1 <= int(v) <= 80]
+
+        if len(nums) < 20:
+            continue
+
+        try:
+            period = int(row[layout.period_col].strip())
+            draw = [int(n) for n in nums[:20]]
+        except (ValueError, IndexError):
+            continue
+
+        periods.append(period)
+        dates.append(row[layout.date_col] if layout.date_col < len(row) else '')
+        numbers.append(draw)
+
+    return periods, dates, numbers, layout
+
+
+class DrawStore:
+    """
+    进程级开奖数据存储（按文件签名惰性重载）
+
+    数据文件按期号做追加写入时（inode 不变、文件变大），只解析新增的尾部；
+    新增期号都比已有期号新时只追加到升序存储末尾，否则重新解析整个文件。
+    启用二进制格式后，优先以 memmap 方式加载同名 .npy 文件，CSV 追加的新开奖原地追加到 .npy 末尾
+    """
+
+    def __init__(self, binary_enabled=False):
+        self.binary_enabled = binary_enabled
+        self._source = None
+        self._signature = None
+        self._layout = None
+        self._lock = threading.Lock()
+        self._set_rows(_empty_rows())
+
+    @staticmethod
+    def _file_signature(path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _signatures(self, path):
+        csv_sig = self._file_signature(path)
+        binary_sig = self._file_signature(binary_path_for(path)) if self.binary_enabled else None
+        return (csv_sig, binary_sig)
+
+    def refresh(self, history_file):
+        """
+        检查数据文件是否变化，变化时重新加载
+
+        Args:
+            history_file: CSV 文件路径
+
+        Returns:
+            bool: 是否发生了重新加载
+        """
+        path = str(history_file)
+        signature = self._signatures(path)
+
+        if signature == self._signature and path == self._source:
+            return False
+
+        with self._lock:
+            # 双重检查，避免并发线程重复解析
+            signature = self._signatures(path)
+            if signature == self._signature and path == self._source:
+                return False
+
+            csv_sig, binary_sig = signature
+            binary_file = binary_path_for(path)
+
+            if csv_sig is None and binary_sig is None:
+                self._set_rows(_empty_rows())
+                self._layout = None
+            elif binary_sig is not None and is_binary_fresh(binary_file, path) and self._load_binary(binary_file):
+                self._layout = self._read_layout(path) if csv_sig else None
+            else:
+                if not (self._is_append(path, csv_sig) and self._load_tail(path, self._signature[0][2], binary_file)):
+                    periods, dates, numbers, self._layout = parse_history_csv(path)
+                    self._set_rows(_sorted_rows(periods, dates, numbers))
+                    if self.binary_enabled:
+                        self._write_binary(binary_file)
+                signature = self._signatures(path)
+
+            self._source = path
+            self._signature = signature
+            return True
+
+    def _set_rows(self, rows, count=None, positions=None, binary_backed=False):
+        """
+        替换升序存储并发布新快照
+
+        Args:
+            rows: 升序的各列（可带预留容量或为 memmap）
+            count: 有效行数，默认为全部
+            positions: 沿用的期号位置索引（追加时），None 表示重新建立
+            binary_backed: 存储是否直接引用二进制文件
+        """
+        count = len(rows.periods) if count is None else count
+        self._rows = rows
+        self._count = count
+        self._positions = positions or _PeriodPositions(rows.periods, count)
+        self._binary_backed = binary_backed
+        if count == 0:
+            self._snapshot = _empty_snapshot()
+            return
+        # 倒序视图，不复制
+        self._snapshot = DrawSnapshot(
+            *(column[count - 1::-1] for column in rows),
+            index=_PeriodIndex(self._positions, count)
+        )
+
+    def _load_binary(self, binary_file, appended=None):
+        """
+        以 memmap 方式加载二进制文件作为存储
+
+        Args:
+            binary_file: 二进制文件路径
+            appended: 刚追加到文件末尾的期号，沿用已有的期号位置索引
+
+        Returns:
+            bool: 是否加载成功（旧版按期号倒序存储的文件视为无效，由 CSV 重新生成）
+        """
+        try:
+            records = load_binary(binary_file)
+        except (OSError, ValueError):
+            return False
+        periods = records['period']
+        if len(periods) > 1 and periods[0] > periods[-1]:
+            return False
+
+        rows = DrawRows(periods, records['date'], records['numbers'], records['masks'])
+        positions = None
+        if appended is not None:
+            positions = self._positions
+            positions.extend(appended, periods)
+        self._set_rows(rows, positions=positions, binary_backed=True)
+        return True
+
+    def _write_binary(self, binary_file):
+        """二进制文件只是 CSV 的缓存，写入失败（如 Windows 下被映射占用）时忽略"""
+        rows, count = self._rows, self._count
+        try:
+            save_binary(binary_file, *(column[:count] for column in rows))
+        except OSError:
+            return False
+        # 改为引用刚写入的文件，之后的新开奖可以原地追加
+        return self._load_binary(binary_file)
+
+    @staticmethod
+    def _read_layout(path):
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            header = next(csv.reader(f), None)
+        return read_csv_layout(header) if header else None
+
+    def _is_append(self, path, csv_sig):
+        """判断文件是否只是在末尾追加了新行"""
+        if path != self._source or self._signature is None or self._layout is None:
+            return False
+        old = self._signature[0]
+        if csv_sig is None or old is None:
+            return False
+        if csv_sig[0] != old[0] or csv_sig[2] <= old[2]:
+            return False
+
+        # 原文件末尾必须是完整的一行
+        with open(path, 'rb') as f:
+            f.seek(old[2] - 1)
+            return f.read(1) == b'\n'
+
+    def _load_tail(self, path, offset, binary_file):
+        """
+        解析文件追加的尾部并追加到存储末尾
+
+        Returns:
+            bool: 是否已处理；新增期号不全比已有期号新时返回 False，由调用方整体重新加载
+        """
+        periods, dates, numbers, _ = parse_history_csv(path, offset=offset, layout=self._layout)
+        if not periods:
+            return True
+
+        new = _sorted_rows(periods, dates, numbers)
+        count = self._count
+        if count and new.periods[0] <= self._rows.periods[count - 1]:
+            return False
+
+        if self.binary_enabled and self._binary_backed and \
+                append_binary(binary_file, count, *new) and self._load_binary(binary_file, new.periods):
+            return True
+
+        self._extend(new)
+        if self.binary_enabled and not is_binary_fresh(binary_file, path):
+            self._write_binary(binary_file)
+        return True
+
+    def _extend(self, new):
+        """在内存存储末尾追加升序的新行（容量不足时按倍数扩容，均摊 O(新增行数)）"""
+        rows, count = self._rows, self._count
+        total = count + len(new.periods)
+        dates = new.dates
+        if self._binary_backed or len(rows.periods) < total or \
+                rows.dates.dtype.kind != 'U' or rows.dates.dtype.itemsize < dates.dtype.itemsize:
+            capacity = max(2 * total, 64)
+            old_dates = _decode_dates(rows.dates[:count])
+            width = max(old_dates.dtype.itemsize, dates.dtype.itemsize, 40) // 4
+            grown = DrawRows(
+                periods=np.empty(capacity, dtype=np.int64),
+                dates=np.empty(capacity, dtype=f'<U{width}'),
+                numbers=np.empty((capacity, 20), dtype=np.uint8),
+                masks=np.empty((capacity, 2), dtype=np.uint64)
+            )
+            for column, values in zip(grown, (rows.periods[:count], old_dates,
+                                               rows.numbers[:count], rows.masks[:count])):
+                column[:count] = values
+            rows = grown
+
+        for column, values in zip(rows, new):
+            column[count:total] = values
+        self._positions.extend(new.periods, rows.periods)
+        self._set_rows(rows, count=total, positions=self._positions)
+
+    def invalidate(self):
+        """强制下次访问时重新加载"""
+        self._signature = None
+
+    def __len__(self):
+        return len(self._snapshot.periods)
+
+    def __contains__(self, period):
+        try:
+            return int(period) in self._snapshot.index
+        except (TypeError, ValueError):
+            return False
+
+    @property
+    def snapshot(self):
+        return self._snapshot
+
+    @property
+    def signature(self):
+        """已加载数据的文件签名 (inode, mtime, size)，优先使用 CSV；未加载时为 None"""
+        if self._signature is None:
+            return None
+        csv_sig, binary_sig = self._signature
+        return csv_sig or binary_sig
+
+    @property
+    def layout(self):
+        return self._layout
+
+    def latest(self, n):
+        """
+        获取最新 n 期数据视图（不复制）
+
+        Args:
+            n: 期数
+
+        Returns:
+            DrawView: periods / dates / numbers / masks 切片视图，按时间倒序
+        """
+        snap = self._snapshot
+        return DrawView(snap.periods[:n], snap.dates[:n], snap.numbers[:n], snap.masks[:n])
+
+    def by_period(self, period):
+        """
+        按期号获取号码行视图
+
+        Args:
+            period: 期号（str 或 int）
+
+        Returns:
+            numpy.ndarray: 长度为 20 的 uint8 视图，期号不存在时返回 None
+        """
+        snap = self._snapshot
+        try:
+            idx = snap.index.get(int(period))
+        except (TypeError, ValueError):
+            return None
+        if idx is None:
+            return None
+        return snap.numbers[idx]
+
+    def latest_period(self):
+        """最新期号（字符串），无数据时返回 None"""
+        snap = self._snapshot
+        return str(int(snap.periods[0])) if len(snap.periods) else None
+
+    def to_records(self, limit=50):
+        """
+        转换为旧接口使用的字典列表
+
+        Args:
+            limit: 期数
+
+        Returns:
+            list: 每项包含 period, date, numbers
+        """
+        snap = self._snapshot
+        periods = snap.periods[:limit].tolist()
+        dates = _decode_dates(snap.dates[:limit]).tolist()
+        rows = snap.numbers[:limit].tolist()
+
+        return [
+            {
+                'period': str(period),
+                'date': date,
+                'numbers': [NUMBER_LABELS[n] for n in row]
+            }
+            for period, date, row in zip(periods, dates, rows)
+        ]
+
+
+# 全局实例
+draw_store = DrawStore()
@@ -0,0 +1,113 @@
+"""
+跨进程文件锁
+gunicorn 多个 worker 写同一份数据文件时使用
+Linux/Mac 使用 fcntl.flock，Windows 使用 msvcrt.locking
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+try:
+    import msvcrt
+except ImportError:  # Linux/Mac
+    msvcrt = None
+
+
+# 同一进程内按路径区分的线程锁（flock 不能保证同进程多线程互斥的可移植性）
+_thread_locks = {}
+_thread_locks_guard = threading.Lock()
+
+
+def _thread_lock_for(path):
+    with _thread_locks_guard:
+        lock = _thread_locks.get(path)
+        if lock is None:
+            lock = threading.RLock()
+            _thread_locks[path] = lock
+        return lock
+
+
+@contextmanager
+def file_lock(lock_path, timeout=None):
+    """
+    获取排他文件锁
+
+    Args:
+        lock_path: 锁文件路径（不存在时自动创建）
+        timeout: 最长等待秒数，None 表示一直等待
+
+    Raises:
+        TimeoutError: 超时仍未获取到锁
+    """
+    lock_path = str(lock_path)
+    thread_lock = _thread_lock_for(lock_path)
+
+    if not thread_lock.acquire(timeout=-1 if timeout is None else timeout):
+        raise TimeoutError(f'获取文件锁超时: {lock_path}')
+
+    fd = None
+    try:
+        fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        _acquire(fd, lock_path, timeout)
+        try:
+            yield
+        finally:
+            _release(fd)
+    finally:
+        if fd is not None:
+            os.close(fd)
+        thread_lock.release()
+
+
+def _acquire(fd, lock_path, timeout):
+    deadline = None if timeout is None else time.monotonic() + timeout
+
+    while True:
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            elif msvcrt is not None:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            return
+        except OSError:
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(f'获取文件锁超时: {lock_path}')
+            time.sleep(0.01)
+
+
+def _release(fd):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    elif msvcrt is not None:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+def atomic_write(path, write_func, mode='w', **open_kwargs):
+    """
+    原子写文件：先写临时文件，再 os.replace 覆盖目标文件
+
+    Args:
+        path: 目标文件路径
+        write_func: 接收文件对象的写入函数
+        mode: 打开模式
+        **open_kwargs: 传给 open 的其他参数（encoding、newline 等）
+    """
+    path = str(path)
+    tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    try:
+        with open(tmp_path, mode, **open_kwargs) as f:
+            write_func(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
@@ -0,0 +1,120 @@
+"""
+推荐历史索引
+为 recommendations_history.json 建立按期号排序的索引（期号 -> 记录在文件中的字节区间），
+分页查询时只读取并解析当页的记录；文件变化（inode/mtime/size）后重建索引
+"""
+import json
+import os
+import re
+import threading
+from bisect import bisect_left, bisect_right
+
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+class HistoryIndex:
+    """推荐历史文件的期号索引"""
+
+    def __init__(self):
+        self._signature = None
+        self._periods = []  # 升序期号
+        self._offsets = {}  # 期号 -> (起始字节, 结束字节)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _scan(text):
+        """扫描顶层对象，返回 {键: (起始字符, 结束字符)}"""
+        decoder = json.JSONDecoder()
+        offsets = {}
+        pos = _WHITESPACE.match(text, 0).end()
+        if pos >= len(text) or text[pos] != '{':
+            raise ValueError('推荐历史文件格式错误: 顶层不是对象')
+        pos += 1
+
+        while True:
+            pos = _WHITESPACE.match(text, pos).end()
+            if text[pos] == '}':
+                break
+            key, pos = decoder.raw_decode(text, pos)
+            pos = _WHITESPACE.match(text, pos).end()
+            if text[pos] != ':':
+                raise ValueError(f'推荐历史文件格式错误: 位置 {pos}')
+            pos = _WHITESPACE.match(text, pos + 1).end()
+            start = pos
+            _, pos = decoder.raw_decode(text, pos)
+            offsets[key] = (start, pos)
+            pos = _WHITESPACE.match(text, pos).end()
+            if text[pos] == ',':
+                pos += 1
+        return offsets
+
+    def _build(self, f, signature):
+        raw = f.read()
+        text = raw.decode('utf-8')
+        offsets = self._scan(text)
+
+        if len(raw) != len(text):
+            # 含非 ASCII 字符：字符位置换算为字节位置
+            positions = sorted({p for span in offsets.values() for p in span})
+            byte_pos = {}
+            last_char, last_byte = 0, 0
+            for p in positions:
+                last_byte += len(text[last_char:p].encode('utf-8'))
+                last_char = p
+                byte_pos[p] = last_byte
+            offsets = {k: (byte_pos[s], byte_pos[e]) for k, (s, e) in offsets.items()}
+
+        self._offsets = offsets
+        self._periods = sorted(offsets)
+        self._signature = signature
+
+    def query(self, history_file, start=None, end=None, cursor=None, offset=0, limit=50):
+        """
+        按期号倒序分页查询
+
+        Args:
+            history_file: 推荐历史 JSON 文件
+            start: 起始期号（含）
+            end: 结束期号（含）
+            cursor: 只返回期号小于该值的记录（游标分页）
+            offset: 跳过的记录数
+            limit: 返回的记录数
+
+        Returns:
+            tuple: ([(期号, 记录)], 期号范围内的总数, 下一页游标或 None)
+        """
+        history_file = str(history_file)
+        if not os.path.exists(history_file):
+            return [], 0, None
+
+        with self._lock, open(history_file, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            if signature != self._signature:
+                self._build(f, signature)
+
+            periods = self._periods
+            lo = bisect_left(periods, start) if start else 0
+            hi = bisect_right(periods, end) if end else len(periods)
+            total = max(hi - lo, 0)
+            if cursor:
+                hi = min(hi, bisect_left(periods, cursor))
+
+            # 倒序第 offset 条对应升序下标 hi - 1 - offset
+            first = hi - 1 - offset
+            stop = max(lo, first - limit + 1)
+            selected = [periods[i] for i in range(first, stop - 1, -1)]
+
+            items = []
+            for period in selected:
+                begin, finish = self._offsets[period]
+                f.seek(begin)
+                items.append((period, json.loads(f.read(finish - begin).decode('utf-8'))))
+
+        next_cursor = selected[-1] if selected and stop > lo else None
+        return items, total, next_cursor
+
+
+# 全局实例
+history_index = HistoryIndex()
@@ -0,0 +1,131 @@
+"""
+开奖历史增量写入模块
+按期号合并新开奖数据：只追加本地不存在的期号，不再整表重写
+"""
+import csv
+import os
+
+from app.utils.draw_store import draw_store
+from app.utils.file_lock import file_lock, atomic_write
+
+
+# 标准CSV表头
+CSV_FIELDNAMES = ['期号', '日期'] + [f'号码{i+1}' for i in range(20)]
+
+
+def _csv_row(item):
+    """开奖数据字典转换为标准CSV行"""
+    return [str(item['period']).strip(), item.get('date', '')] + \
+        [str(n).zfill(2) for n in item['numbers'][:20]]
+
+
+def normalize_draws(draws):
+    """
+    过滤无效数据并按期号去重
+
+    Args:
+        draws: 开奖数据列表，每项包含 period, date, numbers
+
+    Returns:
+        list: (期号整数, 开奖数据) 列表，保持原有顺序
+    """
+    seen = set()
+    result = []
+    for item in draws:
+        numbers = item.get('numbers') or []
+        try:
+            period = int(str(item.get('period', '')).strip())
+            values = {int(n) for n in numbers}
+        except (TypeError, ValueError):
+            continue
+
+        if len(numbers) != 20 or len(values) != 20 or min(values) < 1 or max(values) > 80:
+            continue
+        if period in seen:
+            continue
+
+        seen.add(period)
+        result.append((period, item))
+    return result
+
+
+def write_full_csv(history_file, draws):
+    """
+    原子地整表写入CSV（临时文件 + rename）
+
+    Args:
+        history_file: CSV 文件路径
+        draws: 开奖数据列表
+    """
+    def write(f):
+        writer = csv.writer(f)
+        writer.writerow(CSV_FIELDNAMES)
+        for item in draws:
+            writer.writerow(_csv_row(item))
+
+    atomic_write(history_file, write, 'w', encoding='utf-8-sig', newline='')
+
+
+def _has_standard_header(history_file):
+    with open(history_file, 'r', encoding='utf-8-sig', newline='') as f:
+        header = next(csv.reader(f), None)
+    return header == CSV_FIELDNAMES
+
+
+def merge_draws(history_file, draws):
+    """
+    按期号合并开奖数据到历史文件
+
+    持有文件锁后用 draw_store 的期号索引做 O(1) 去重，
+    新期号以追加方式写入文件末尾（读取时按期号排序）
+
+    Args:
+        history_file: CSV 文件路径
+        draws: 开奖数据列表
+
+    Returns:
+        list: 实际新增的开奖数据
+    """
+    history_file = str(history_file)
+    candidates = normalize_draws(draws)
+    if not candidates:
+        return []
+
+    with file_lock(history_file + '.lock'):
+        # 锁内刷新索引，其他进程刚写入的期号也能识别
+        draw_store.refresh(history_file)
+        new_items = [item for period, item in candidates if period not in draw_store]
+
+        if not new_items:
+            return []
+
+        if not os.path.exists(history_file) or os.path.getsize(history_file) == 0:
+            new_items.sort(key=lambda x: int(x['period']), reverse=True)
+            write_full_csv(history_file, new_items)
+        elif _has_standard_header(history_file):
+            _append_rows(history_file, new_items)
+        else:
+            # 非标准表头，转换为标准格式整表写入
+            existing = draw_store.to_records(len(draw_store))
+            merged = sorted(existing + new_items, key=lambda x: int(x['period']), reverse=True)
+            write_full_csv(history_file, merged)
+
+        draw_store.refresh(history_file)
+
+    return new_items
+
+
+def _append_rows(history_file, items):
+    with open(history_file, 'rb+') as f:
+        # 保证追加内容从新行开始
+        f.seek(-1, os.SEEK_END)
+        needs_newline = f.read(1) != b'\n'
+
+    with open(history_file, 'a', encoding='utf-8', newline='') as f:
+        if needs_newline:
+            f.write('\r\n')
+        writer = csv.writer(f)
+        for item in items:
+            writer.writerow(_csv_row(item))
+        f.flush()
+        os.fsync(f.fileno())
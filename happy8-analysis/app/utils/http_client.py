@@ -0,0 +1,157 @@
+"""
+数据源 HTTP 客户端
+- 每个数据源一个 requests.Session，连接池复用 TCP/TLS 连接（keep-alive）
+- 响应缓存：新鲜期内直接复用，过期后带 ETag / Last-Modified 做条件请求，304 时复用缓存
+- 统计缓存命中、条件请求命中、未命中和错误次数
+"""
+import re
+import threading
+import time
+from collections import Counter
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+_MAX_AGE_RE = re.compile(r'max-age=(\d+)')
+
+
+class CacheEntry:
+    """单个 URL 的缓存条目"""
+
+    def __init__(self, payload, etag, last_modified, fresh_until, expires_at):
+        self.payload = payload
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fresh_until = fresh_until
+        self.expires_at = expires_at
+
+
+class HttpClient:
+    """带连接池和条件缓存的 HTTP 客户端"""
+
+    def __init__(self, pool_size=4):
+        self.pool_size = pool_size
+        self._sessions = {}
+        self._cache = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def session(self, name):
+        """获取数据源对应的共享 Session"""
+        with self._lock:
+            session = self._sessions.get(name)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=2, pool_maxsize=self.pool_size)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self._sessions[name] = session
+            return session
+
+    def _count(self, name, key):
+        with self._lock:
+            self._stats.setdefault(name, Counter())[key] += 1
+
+    @staticmethod
+    def _fresh_seconds(response, default_ttl, cache_timeout):
+        """新鲜期：优先使用服务端 Cache-Control max-age，否则使用默认值，均不超过 CACHE_TIMEOUT"""
+        cache_control = response.headers.get('Cache-Control', '')
+        if 'no-store' in cache_control or 'no-cache' in cache_control:
+            return 0
+        match = _MAX_AGE_RE.search(cache_control)
+        ttl = int(match.group(1)) if match else default_ttl
+        return max(0, min(ttl, cache_timeout))
+
+    def get_json(self, name, url, headers=None, timeout=15, fresh_ttl=60,
+                 cache_timeout=3600, force=False, verify=False):
+        """
+        请求 JSON 数据（带缓存）
+
+        Args:
+            name: 数据源名称（区分 Session 和统计）
+            url: 请求地址
+            headers: 请求头
+            timeout: 超时（秒）
+            fresh_ttl: 服务端未给出 max-age 时的默认新鲜期（秒）
+            cache_timeout: 缓存条目最长保留时间（秒），即 Config.CACHE_TIMEOUT
+            force: 跳过新鲜期，至少发一次条件请求
+            verify: 是否校验 SSL 证书
+
+        Returns:
+            解析后的 JSON
+
+        Raises:
+            ValueError: 非 200/304 响应
+            requests.RequestException: 网络错误
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._cache.get(url)
+            if entry is not None and now >= entry.expires_at:
+                del self._cache[url]
+                entry = None
+
+        if entry is not None and not force and now < entry.fresh_until:
+            self._count(name, 'hits')
+            return entry.payload
+
+        request_headers = dict(headers or {})
+        if entry is not None:
+            if entry.etag:
+                request_headers['If-None-Match'] = entry.etag
+            if entry.last_modified:
+                request_headers['If-Modified-Since'] = entry.last_modified
+
+        try:
+            response = self.session(name).get(url, headers=request_headers,
+                                              timeout=timeout, verify=verify)
+        except requests.RequestException:
+            self._count(name, 'errors')
+            raise
+
+        if response.status_code == 304 and entry is not None:
+            self._count(name, 'revalidated')
+            fresh = self._fresh_seconds(response, fresh_ttl, cache_timeout)
+            with self._lock:
+                entry.fresh_until = now + fresh
+                entry.expires_at = now + cache_timeout
+            return entry.payload
+
+        if response.status_code != 200:
+            self._count(name, 'errors')
+            raise ValueError(f'HTTP {response.status_code}')
+
+        payload = response.json()
+        self._count(name, 'misses')
+
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        fresh = self._fresh_seconds(response, fresh_ttl, cache_timeout)
+        if cache_timeout > 0 and (fresh or etag or last_modified):
+            with self._lock:
+                self._cache[url] = CacheEntry(payload, etag, last_modified,
+                                              now + fresh, now + cache_timeout)
+        return payload
+
+    def clear(self):
+        """清空响应缓存"""
+        with self._lock:
+            self._cache.clear()
+
+    def get_stats(self):
+        """各数据源的缓存统计"""
+        with self._lock:
+            return {
+                name: {
+                    'hits': stats['hits'],
+                    'revalidated': stats['revalidated'],
+                    'misses': stats['misses'],
+                    'errors': stats['errors']
+                }
+                for name, stats in self._stats.items()
+            }
+
+
+# 全局实例
+http_client = HttpClient()
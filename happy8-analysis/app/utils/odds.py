@@ -0,0 +1,208 @@
+"""
+中奖概率与期望收益
+每期从 80 个号码中开出 20 个，选 k 个号码（选一至选十）恰好命中 m 个的概率为超几何分布：
+    P(m | k) = C(20, m) * C(60, k - m) / C(80, k)
+概率表用整数组合数和 Fraction 精确计算，导入时一次算好；
+胆拖全拖（b 个胆码 + 其余 80-b 个号码全部作拖码，共 C(80-b, k-b) 注选 k）按胆码命中个数 h 计算整组奖金：
+    拖码中开出 20-h 个，命中 h+j 的注数为 C(20-h, j) * C(60-b+h, k-b-j)
+期望收益、方差和各奖级概率在设置奖金表时一次算好，请求时只做查表
+"""
+from fractions import Fraction
+from math import comb, sqrt
+
+from app.utils.bitmask import NUMBER_COUNT
+
+
+DRAW_SIZE = 20  # 每期开出的号码个数
+MAX_PICK = 10  # 最多选十
+
+# 选 k 命中 m 个的精确概率 {k: [P(0), P(1), ..., P(k)]}
+HIT_PROBABILITIES = {
+    k: [Fraction(comb(DRAW_SIZE, m) * comb(NUMBER_COUNT - DRAW_SIZE, k - m), comb(NUMBER_COUNT, k))
+        for m in range(k + 1)]
+    for k in range(1, MAX_PICK + 1)
+}
+
+
+def _number(value):
+    """数值格式：整数原样返回，其他保留 6 位小数"""
+    if value.denominator == 1:
+        return value.numerator
+    return round(float(value), 6)
+
+
+class OddsTable:
+    """按奖金表预先计算的各玩法中奖统计"""
+
+    def __init__(self):
+        self.configure({}, 2)
+
+    def configure(self, prize_table, price=2):
+        """
+        设置奖金表和每注金额
+
+        Args:
+            prize_table: {选几: {中几个: 奖金}}，如 {1: {1: 4.6}}
+            price: 每注金额（元）
+        """
+        # 经 str 转换，4.6 等小数按字面值精确表示
+        self.prizes = {
+            int(k): {int(m): Fraction(str(v)) for m, v in tiers.items()}
+            for k, tiers in prize_table.items()
+        }
+        self.price = Fraction(str(price))
+        # 整表替换，读取方无需加锁
+        self._summaries = {k: self._build(k) for k in HIT_PROBABILITIES}
+        self._banker_summaries = {(b, k): self._build_banker(b, k)
+                                  for k in HIT_PROBABILITIES for b in range(1, k)}
+
+    def summary(self, k):
+        """
+        选 k 个号码一注的中奖统计
+
+        Args:
+            k: 选号个数（1-10）
+
+        Returns:
+            dict: 各奖级概率、中奖概率、期望奖金、期望收益（扣除本金）、方差、标准差
+
+        Raises:
+            ValueError: k 不在 1-10
+        """
+        summary = self._summaries.get(k)
+        if summary is None:
+            raise ValueError(f'选号个数须为 1-{MAX_PICK}')
+        return summary
+
+    def _build(self, k):
+        probabilities = HIT_PROBABILITIES[k]
+        prizes = self.prizes.get(k, {})
+
+        tiers = []
+        mean = Fraction(0)
+        second_moment = Fraction(0)
+        win = Fraction(0)
+        for m in sorted(prizes, reverse=True):
+            p = probabilities[m]
+            tiers.append({
+                'hits': m,
+                'prize': _number(prizes[m]),
+                'probability': float(p),
+                'exact': str(p),
+                'odds': round(1 / float(p), 2)
+            })
+            mean += p * prizes[m]
+            second_moment += p * prizes[m] ** 2
+            win += p
+        variance = second_moment - mean ** 2
+
+        return {
+            'k': k,
+            'price': _number(self.price),
+            'distribution': [
+                {'hits': m, 'probability': float(p), 'exact': str(p)}
+                for m, p in enumerate(probabilities)
+            ],
+            'tiers': tiers,
+            'win_probability': round(float(win), 6),
+            'expected_prize': _number(mean),
+            'expected_value': _number(mean - self.price),
+            'return_rate': round(float(mean / self.price), 6) if self.price else 0,
+            'variance': _number(variance),
+            'std': round(sqrt(variance), 4)
+        }
+
+    def banker_summary(self, bankers, k):
+        """
+        胆拖全拖一组号码的中奖统计
+
+        Args:
+            bankers: 胆码个数
+            k: 玩法（选几），须大于胆码个数
+
+        Returns:
+            dict: 注数、总金额、按胆码命中个数的整组奖金和概率、期望收益、方差、标准差
+
+        Raises:
+            ValueError: 胆码个数或玩法不合法
+        """
+        summary = self._banker_summaries.get((bankers, k))
+        if summary is None:
+            raise ValueError(f'胆码个数须小于玩法的选号个数 (选 1-{MAX_PICK})')
+        return summary
+
+    def _build_banker(self, b, k):
+        prizes = self.prizes.get(k, {})
+        others = NUMBER_COUNT - b
+        tickets = comb(others, k - b)
+        cost = self.price * tickets
+
+        outcomes = []
+        mean = Fraction(0)
+        second_moment = Fraction(0)
+        win = Fraction(0)
+        for h, p in enumerate(HIT_PROBABILITIES[b]):
+            # 拖码中开出 drawn 个，整组各注奖金之和
+            drawn = DRAW_SIZE - h
+            prize = sum(comb(drawn, j) * comb(others - drawn, k - b - j) * prizes.get(h + j, 0)
+                        for j in range(k - b + 1))
+            outcomes.append({
+                'banker_hits': h,
+                'prize': _number(Fraction(prize)),
+                'probability': float(p),
+                'exact': str(p)
+            })
+            mean += p * prize
+            second_moment += p * prize ** 2
+            if prize > 0:
+                win += p
+        variance = second_moment - mean ** 2
+
+        return {
+            'k': k,
+            'bankers': b,
+            'tickets': tickets,
+            'price': _number(self.price),
+            'cost': _number(cost),
+            'outcomes': outcomes,
+            'win_probability': round(float(win), 6),
+            'expected_prize': _number(mean),
+            'expected_value': _number(mean - cost),
+            'return_rate': round(float(mean / cost), 6) if cost else 0,
+            'variance': _number(variance),
+            'std': round(sqrt(variance), 4)
+        }
+
+    def banker_ticket(self, bankers, k):
+        """
+        胆拖全拖号码的中奖统计
+
+        Args:
+            bankers: 胆码列表
+            k: 玩法（选几）
+
+        Returns:
+            dict: 同 banker_summary，另含 numbers（胆码）
+        """
+        result = dict(self.banker_summary(len(set(bankers)), k))
+        result['numbers'] = list(bankers)
+        return result
+
+    def ticket(self, numbers):
+        """
+        一注号码的中奖统计（按号码个数查表）
+
+        Args:
+            numbers: 号码列表
+
+        Returns:
+            dict: 同 summary（不含命中个数分布），另含 numbers
+        """
+        result = {key: value for key, value in self.summary(len(set(numbers))).items()
+                  if key != 'distribution'}
+        result['numbers'] = list(numbers)
+        return result
+
+
+# 全局实例
+odds_table = OddsTable()
@@ -0,0 +1,108 @@
+"""
+模式特征矩阵
+由 (n, 80) 命中矩阵一次性计算每期的连号、同尾特征：
+- 连号段：命中矩阵两侧补 0 后沿号码方向差分，+1 为段首、-1 为段尾，段长 = 段尾 - 段首
+- 连号区间：号码 k 与 k+1 同时开出记入区间 k // 10（0、10 … 70）
+- 尾数：按尾数分组计数
+"""
+import numpy as np
+
+from app.utils.bitmask import NUMBER_COUNT
+
+
+# 连号段长度分类：2连、3连、4连、5连及以上
+RUN_LABELS = ['2连', '3连', '4连', '5连及以上']
+# 连号区间（号码 k 与 k+1 中 k 所在的十位区间）
+ZONE_COUNT = 8
+# 号码 1-80 的尾数
+_TAILS = np.arange(1, NUMBER_COUNT + 1) % 10
+# 号码 1-79 作为连号对较小号码时所在的区间
+_PAIR_ZONES = np.arange(1, NUMBER_COUNT) // 10
+
+
+def run_length_counts(hits):
+    """
+    每期各长度连号段的个数
+
+    Args:
+        hits: (n, 80) 命中矩阵
+
+    Returns:
+        numpy.ndarray: (n, 4)，列依次为 2连、3连、4连、5连及以上
+    """
+    padded = np.zeros((len(hits), NUMBER_COUNT + 2), dtype=np.int8)
+    padded[:, 1:-1] = hits
+    steps = np.diff(padded, axis=1)
+    # np.nonzero 按行优先返回，段首和段尾一一对应
+    rows, starts = np.nonzero(steps == 1)
+    _, ends = np.nonzero(steps == -1)
+    lengths = ends - starts
+
+    runs = lengths >= 2
+    categories = np.minimum(lengths[runs], 5) - 2
+    counts = np.bincount(rows[runs] * 4 + categories, minlength=len(hits) * 4)
+    return counts.reshape(len(hits), 4)
+
+
+def consecutive_pairs(hits):
+    """
+    相邻号码同时开出的矩阵
+
+    Returns:
+        numpy.ndarray: (n, 79) bool，[i, k-1] 表示第 i 期号码 k 与 k+1 同时开出
+    """
+    hits = np.asarray(hits, dtype=bool)
+    return hits[:, :-1] & hits[:, 1:]
+
+
+def consecutive_zone_counts(hits):
+    """
+    每期各区间的连号对数
+
+    Returns:
+        numpy.ndarray: (n, 8)，第 z 列为较小号码在 [10z, 10z+9] 的连号对数
+    """
+    pairs = consecutive_pairs(hits)
+    counts = np.zeros((len(hits), ZONE_COUNT), dtype=np.int32)
+    for zone in range(ZONE_COUNT):
+        counts[:, zone] = pairs[:, _PAIR_ZONES == zone].sum(axis=1)
+    return counts
+
+
+def tail_counts(hits):
+    """
+    每期各尾数的号码个数
+
+    Returns:
+        numpy.ndarray: (n, 10)
+    """
+    hits = np.asarray(hits, dtype=bool)
+    counts = np.zeros((len(hits), 10), dtype=np.int32)
+    for tail in range(10):
+        counts[:, tail] = hits[:, _TAILS == tail].sum(axis=1)
+    return counts
+
+
+def top_consecutive_zones(hits, top=3):
+    """
+    连号对最多的区间（与按期号倒序、期内号码升序统计的 Counter.most_common 顺序一致）
+
+    Args:
+        hits: (n, 80) 命中矩阵，行顺序与 data 一致（最新在前）
+        top: 返回的区间数
+
+    Returns:
+        list: 区间起点（0、10 … 70）
+    """
+    pairs = consecutive_pairs(hits)
+    counts = np.zeros(ZONE_COUNT, dtype=np.int64)
+    first_seen = np.full(ZONE_COUNT, np.iinfo(np.int64).max)
+
+    rows, numbers = np.nonzero(pairs)
+    zones = _PAIR_ZONES[numbers]
+    np.add.at(counts, zones, 1)
+    # 首次出现位置：行优先的序号
+    np.minimum.at(first_seen, zones, rows * NUMBER_COUNT + numbers)
+
+    order = np.lexsort((first_seen, -counts))
+    return [int(z) * 10 for z in order[:top] if counts[z]]
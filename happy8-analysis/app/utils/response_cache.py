@@ -0,0 +1,147 @@
+"""
+接口响应缓存
+/api/data 的输出只取决于（开奖数据文件签名、请求参数、模型版本），
+按该组合生成强 ETag，缓存序列化后的响应体：
+- 进程内 LRU
+- 可选的共享文件缓存（gunicorn 多个 worker 共用），超出上限时删除最旧的文件，应用启动时清空
+浏览器带 If-None-Match 轮询时只需比较 ETag 并返回 304
+"""
+import glob
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from app.utils.file_lock import atomic_write
+
+
+def make_etag(*parts):
+    """由缓存键生成 ETag 值（不含引号）"""
+    key = '|'.join(str(p) for p in parts)
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()[:20]
+
+
+class ResponseCache:
+    """按 ETag 缓存响应体的 LRU"""
+
+    def __init__(self, max_entries=32):
+        self.max_entries = max_entries
+        self.shared_dir = None
+        self.max_shared_files = 64
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'shared_hits': 0, 'misses': 0, 'not_modified': 0}
+
+    def configure(self, max_entries=32, shared_dir=None, max_shared_files=64):
+        """
+        设置缓存容量和共享缓存目录
+
+        Args:
+            max_entries: 进程内最多缓存的响应数
+            shared_dir: 共享文件缓存目录，None 表示只使用进程内缓存
+            max_shared_files: 共享文件缓存最多保留的响应数
+        """
+        with self._lock:
+            self.max_entries = max_entries
+            self.shared_dir = str(shared_dir) if shared_dir else None
+            self.max_shared_files = max_shared_files
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def record_not_modified(self):
+        self._count('not_modified')
+
+    def _shared_path(self, etag):
+        return os.path.join(self.shared_dir, f'{etag}.json')
+
+    def get(self, etag):
+        """
+        读取缓存的响应体
+
+        Args:
+            etag: ETag 值
+
+        Returns:
+            bytes: 响应体，未命中返回 None
+        """
+        with self._lock:
+            body = self._entries.get(etag)
+            if body is not None:
+                self._entries.move_to_end(etag)
+                self.stats['hits'] += 1
+                return body
+            shared_dir = self.shared_dir
+
+        if shared_dir:
+            try:
+                with open(self._shared_path(etag), 'rb') as f:
+                    body = f.read()
+            except OSError:
+                body = None
+            if body:
+                self._store(etag, body)
+                self._count('shared_hits')
+                return body
+
+        self._count('misses')
+        return None
+
+    def put(self, etag, body):
+        """
+        缓存响应体
+
+        Args:
+            etag: ETag 值
+            body: 序列化后的响应体
+        """
+        self._store(etag, body)
+        if self.shared_dir:
+            os.makedirs(self.shared_dir, exist_ok=True)
+            atomic_write(self._shared_path(etag), lambda f: f.write(body), 'wb')
+            self._trim_shared()
+
+    def _trim_shared(self):
+        """共享缓存文件超出上限时删除最旧的"""
+        paths = glob.glob(os.path.join(self.shared_dir, '*.json'))
+        if len(paths) <= self.max_shared_files:
+            return
+
+        def mtime(path):
+            try:
+                return os.stat(path).st_mtime_ns
+            except OSError:
+                return 0
+
+        for path in sorted(paths, key=mtime)[:len(paths) - self.max_shared_files]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _store(self, etag, body):
+        with self._lock:
+            self._entries[etag] = body
+            self._entries.move_to_end(etag)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self):
+        """清空缓存（新增开奖数据、应用启动时调用）"""
+        with self._lock:
+            self._entries.clear()
+            shared_dir = self.shared_dir
+
+        if shared_dir:
+            for path in glob.glob(os.path.join(shared_dir, '*.json')):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+
+# 全局实例
+response_cache = ResponseCache()
@@ -0,0 +1,133 @@
+"""
+号码评分引擎
+每个特征是长度 80 的向量（下标 n 对应号码 n+1），多个特征按行组成 (F, 80) 特征矩阵；
+每个评分策略是一组特征权重，多个策略组成 (S, F) 权重矩阵，
+全部策略的得分 = 权重矩阵 @ 特征矩阵，一次矩阵乘法得到 (S, 80) 得分。
+选号用 argpartition 取前 k 名，边界同分时号码小的优先（与按分数稳定排序一致）
+
+特征（均为原始值，不做归一化，权重按量纲设置）：
+- hot: 最近热号期数内的出现次数
+- omission: 当前遗漏
+- repeat: 最新一期是否开出（1/0）
+- freq_N: 最近 N 期内的出现次数
+- co_occurrence: 窗口内与最新一期其他号码的同出次数之和
+- ml: ML模型预测的出现概率（未加载模型时为 0）
+"""
+import numpy as np
+
+from app.utils.bitmask import NUMBER_COUNT
+from app.utils.omission_matrix import hit_matrix, current_omission_vector
+
+
+def label_vector(values):
+    """
+    {号码: 数值} 转换为长度 80 的向量（缺少的号码为 0）
+
+    Args:
+        values: 如 {'01': 3, '07': 5}
+
+    Returns:
+        numpy.ndarray: 长度 80，数值类型由输入推断
+    """
+    vector = np.zeros(NUMBER_COUNT, dtype=np.asarray(list(values.values()) or [0]).dtype)
+    for number, value in values.items():
+        vector[int(number) - 1] = value
+    return vector
+
+
+def number_features(data, windows=(), hot_periods=20, co_window=20, probabilities=None):
+    """
+    由开奖数据计算全部特征
+
+    Args:
+        data: 历史数据列表（按期号倒序，data[0] 为最新一期）
+        windows: freq_N 的期数列表
+        hot_periods: hot 特征的期数
+        co_window: co_occurrence 特征的期数
+        probabilities: ML预测概率 {号码: 概率}，可选
+
+    Returns:
+        tuple: (特征名列表, (F, 80) 特征矩阵)
+    """
+    depth = max(list(windows) + [hot_periods, co_window, 1])
+    hits = hit_matrix(data[:depth]).astype(np.int64)
+    # 前缀和：前 t 期（最新在前）的出现次数为 counts[t]
+    counts = np.zeros((len(hits) + 1, NUMBER_COUNT), dtype=np.int64)
+    np.cumsum(hits, axis=0, out=counts[1:])
+
+    def recent(periods):
+        return counts[min(periods, len(hits))]
+
+    latest = hits[0] if len(hits) else np.zeros(NUMBER_COUNT, dtype=np.int64)
+    omission = np.asarray(current_omission_vector(data)[1:], dtype=np.int64)
+
+    # 号码 n 与最新一期其他号码的同出次数：每期与最新一期的交集大小按号码累加，再去掉与自身的同出
+    window = hits[:co_window]
+    co_occurrence = window.T @ (window @ latest) - latest * window.sum(axis=0)
+
+    names = ['hot', 'omission', 'repeat']
+    rows = [recent(hot_periods), omission, latest]
+    for periods in windows:
+        names.append(f'freq_{periods}')
+        rows.append(recent(periods))
+    names.append('co_occurrence')
+    rows.append(co_occurrence)
+    names.append('ml')
+    rows.append(label_vector(probabilities) if probabilities else np.zeros(NUMBER_COUNT, dtype=np.int64))
+
+    return names, np.vstack(rows)
+
+
+def weight_matrix(strategies, names):
+    """
+    策略权重组成权重矩阵
+
+    Args:
+        strategies: {策略名: {特征名: 权重}}
+        names: 特征矩阵的特征名列表
+
+    Returns:
+        numpy.ndarray: (S, F)，行顺序与 strategies 一致
+
+    Raises:
+        ValueError: 权重中包含未知特征
+    """
+    columns = {name: i for i, name in enumerate(names)}
+    rows = []
+    for strategy, weights in strategies.items():
+        row = [0] * len(names)
+        for feature, weight in weights.items():
+            if feature not in columns:
+                raise ValueError(f'策略 {strategy} 包含未知特征: {feature}')
+            row[columns[feature]] = weight
+        rows.append(row)
+    return np.asarray(rows).reshape(len(rows), len(names))
+
+
+def top_numbers(scores, k):
+    """
+    每个策略得分最高的 k 个号码
+
+    Args:
+        scores: (S, 80) 或长度 80 的得分
+        k: 选号个数
+
+    Returns:
+        numpy.ndarray: (S, k) 或长度 k 的号码下标（0-79），按得分从高到低，同分时号码小的在前
+    """
+    scores = np.asarray(scores)
+    single = scores.ndim == 1
+    scores = np.atleast_2d(scores)
+    k = min(k, scores.shape[1])
+
+    result = np.empty((len(scores), k), dtype=np.intp)
+    for row, values in enumerate(scores):
+        if k < len(values):
+            # 第 k 大的分数作为门槛，门槛上的同分号码全部保留后再稳定排序
+            threshold = values[np.argpartition(-values, k - 1)[k - 1]]
+            candidates = np.flatnonzero(values >= threshold)
+        else:
+            candidates = np.arange(len(values))
+        order = np.lexsort((candidates, -values[candidates]))
+        result[row] = candidates[order[:k]]
+    return result[0] if single else result
@@ -0,0 +1,119 @@
+"""
+网络请求合并 (single-flight)
+- 同一进程内：相同 key 的并发调用共享同一次执行及其结果
+- 跨 gunicorn worker：文件锁保证同一时刻只有一个 worker 执行，
+  结果写入共享结果文件，冷却期内其他调用直接读取该结果，不再访问网络
+"""
+import json
+import os
+import threading
+import time
+
+from app.utils.file_lock import file_lock, atomic_write
+
+
+class _Call:
+    """一次进行中的调用"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """合并相同 key 的并发调用"""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.stats = {'executed': 0, 'shared': 0, 'cooldown': 0}
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def do(self, key, func, state_dir=None, cooldown=0, cacheable=bool):
+        """
+        执行 func，相同 key 的并发调用只执行一次
+
+        Args:
+            key: 调用标识（用作文件名）
+            func: 无参函数，返回值需可 JSON 序列化
+            state_dir: 共享锁和结果文件的目录，None 表示只在进程内合并
+            cooldown: 冷却期（秒），期内直接返回上次结果
+            cacheable: 判断结果是否写入共享结果文件（默认只缓存非空结果）
+
+        Returns:
+            func 的返回值（或冷却期内的上次结果）
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            call.event.wait()
+            self._count('shared')
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self._run(key, func, state_dir, cooldown, cacheable)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+    def _run(self, key, func, state_dir, cooldown, cacheable):
+        if state_dir is None:
+            self._count('executed')
+            return func()
+
+        result_file = os.path.join(str(state_dir), f'{key}.json')
+        found, result = self._load_recent(result_file, cooldown)
+        if found:
+            return result
+
+        os.makedirs(str(state_dir), exist_ok=True)
+        with file_lock(f'{result_file}.lock'):
+            # 等锁期间其他 worker 可能已经完成同一请求
+            found, result = self._load_recent(result_file, cooldown)
+            if found:
+                return result
+
+            self._count('executed')
+            result = func()
+            if cooldown > 0 and cacheable(result):
+                payload = {'timestamp': time.time(), 'result': result}
+                atomic_write(result_file, lambda f: json.dump(payload, f, ensure_ascii=False),
+                             'w', encoding='utf-8')
+            return result
+
+    def _load_recent(self, result_file, cooldown):
+        """读取冷却期内的共享结果，返回 (是否命中, 结果)"""
+        if cooldown <= 0:
+            return False, None
+        try:
+            if time.time() - os.path.getmtime(result_file) >= cooldown:
+                return False, None
+            with open(result_file, 'r', encoding='utf-8') as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            return False, None
+
+        if time.time() - payload.get('timestamp', 0) >= cooldown:
+            return False, None
+        self._count('cooldown')
+        return True, payload.get('result')
+
+
+# 全局实例
+single_flight = SingleFlight()
@@ -0,0 +1,334 @@
+"""
+SQLite 存储后端（可选）
+开奖数据、推荐记录、验证结果分表存储，WAL 模式支持多个 worker 并发读写
+通过配置 STORAGE_BACKEND = 'sqlite' 启用
+"""
+import json
+import sqlite3
+import threading
+
+from flask import current_app
+
+from app.utils.history_writer import normalize_draws
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS draws (
+    period INTEGER PRIMARY KEY,
+    date TEXT NOT NULL DEFAULT '',
+    numbers TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS recommendations (
+    period TEXT PRIMARY KEY,
+    date TEXT,
+    timestamp TEXT,
+    recommendations TEXT NOT NULL,
+    actual_result TEXT
+);
+
+CREATE TABLE IF NOT EXISTS validations (
+    period TEXT NOT NULL,
+    strategy TEXT NOT NULL,
+    predicted TEXT NOT NULL,
+    hits TEXT NOT NULL,
+    hit_count INTEGER NOT NULL,
+    hit_rate TEXT NOT NULL,
+    PRIMARY KEY (period, strategy)
+);
+
+CREATE INDEX IF NOT EXISTS idx_validations_strategy ON validations (strategy, period);
+"""
+
+# 每个线程各自持有连接（sqlite3 连接不能跨线程共享）
+_local = threading.local()
+
+
+def is_enabled():
+    """当前应用是否使用 SQLite 后端"""
+    return current_app.config.get('STORAGE_BACKEND') == 'sqlite'
+
+
+def get_connection(db_file=None):
+    """
+    获取当前线程的数据库连接（首次连接时启用 WAL 并建表）
+
+    Args:
+        db_file: 数据库路径，默认读取 DATABASE_FILE 配置
+
+    Returns:
+        sqlite3.Connection
+    """
+    db_file = str(db_file or current_app.config['DATABASE_FILE'])
+    connections = getattr(_local, 'connections', None)
+    if connections is None:
+        connections = _local.connections = {}
+
+    conn = connections.get(db_file)
+    if conn is None:
+        conn = sqlite3.connect(db_file, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.executescript(SCHEMA)
+        connections[db_file] = conn
+    return conn
+
+
+def _numbers_text(numbers):
+    return ','.join(str(n).zfill(2) for n in numbers)
+
+
+# ---------------------------------------------------------------- 开奖数据
+
+def read_draws(limit=50, conn=None):
+    """
+    读取最近的开奖数据
+
+    Args:
+        limit: 期数
+
+    Returns:
+        list: 每项包含 period, date, numbers，按期号倒序
+    """
+    conn = conn or get_connection()
+    rows = conn.execute(
+        'SELECT period, date, numbers FROM draws ORDER BY period DESC LIMIT ?', (limit,)
+    ).fetchall()
+    return [
+        {'period': str(row['period']), 'date': row['date'], 'numbers': row['numbers'].split(',')}
+        for row in rows
+    ]
+
+
+def draw_version(conn=None):
+    """
+    开奖数据版本
+
+    Returns:
+        tuple: (最新期号, 总期数)，无数据时为 (None, 0)
+    """
+    conn = conn or get_connection()
+    row = conn.execute('SELECT MAX(period), COUNT(*) FROM draws').fetchone()
+    return (str(row[0]) if row[0] is not None else None, row[1])
+
+
+def has_draw(period, conn=None):
+    """期号是否已存在"""
+    conn = conn or get_connection()
+    try:
+        period = int(period)
+    except (TypeError, ValueError):
+        return False
+    return conn.execute('SELECT 1 FROM draws WHERE period = ?', (period,)).fetchone() is not None
+
+
+def insert_draws(draws, conn=None):
+    """
+    插入开奖数据，已存在的期号忽略
+
+    Args:
+        draws: (期号整数, 开奖数据) 列表
+
+    Returns:
+        list: 实际新增的开奖数据
+    """
+    conn = conn or get_connection()
+    added = []
+    with conn:
+        for period, item in draws:
+            cursor = conn.execute(
+                'INSERT OR IGNORE INTO draws (period, date, numbers) VALUES (?, ?, ?)',
+                (period, item.get('date', ''), _numbers_text(item['numbers'][:20]))
+            )
+            if cursor.rowcount:
+                added.append(item)
+    return added
+
+
+# ---------------------------------------------------------------- 推荐记录
+
+def save_recommendation(period, record, conn=None):
+    """
+    保存（覆盖）某期的推荐记录
+
+    Args:
+        period: 期号
+        record: 包含 date, timestamp, recommendations 的字典
+    """
+    conn = conn or get_connection()
+    with conn:
+        conn.execute(
+            'INSERT OR REPLACE INTO recommendations (period, date, timestamp, recommendations, actual_result) '
+            'VALUES (?, ?, ?, ?, NULL)',
+            (str(period), record.get('date'), record.get('timestamp'),
+             json.dumps(record.get('recommendations', {}), ensure_ascii=False))
+        )
+        conn.execute('DELETE FROM validations WHERE period = ?', (str(period),))
+
+
+def save_validation(period, actual, validation, conn=None):
+    """
+    保存某期的开奖结果与各策略验证结果
+
+    Args:
+        period: 期号
+        actual: 实际开奖号码
+        validation: {策略: {predicted, hits, hit_count, hit_rate}}
+    """
+    conn = conn or get_connection()
+    period = str(period)
+    with conn:
+        conn.execute(
+            'UPDATE recommendations SET actual_result = ? WHERE period = ?',
+            (json.dumps(actual), period)
+        )
+        conn.executemany(
+            'INSERT OR REPLACE INTO validations (period, strategy, predicted, hits, hit_count, hit_rate) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            [
+                (period, strategy, json.dumps(v['predicted']), json.dumps(v['hits']),
+                 v['hit_count'], v['hit_rate'])
+                for strategy, v in validation.items()
+            ]
+        )
+
+
+def pending_validations(periods, conn=None):
+    """
+    查询给定期号中已有推荐但尚未验证的记录
+
+    Args:
+        periods: 期号列表
+
+    Returns:
+        dict: {期号: 推荐号码字典}
+    """
+    conn = conn or get_connection()
+    periods = [str(p).strip() for p in periods]
+    if not periods:
+        return {}
+
+    placeholders = ','.join('?' * len(periods))
+    rows = conn.execute(
+        f'SELECT period, recommendations FROM recommendations '
+        f'WHERE actual_result IS NULL AND period IN ({placeholders})',
+        periods
+    ).fetchall()
+    return {row['period']: json.loads(row['recommendations']) for row in rows}
+
+
+def _record_from_row(row, validations):
+    record = {
+        'date': row['date'],
+        'timestamp': row['timestamp'],
+        'recommendations': json.loads(row['recommendations'])
+    }
+    if row['actual_result'] is not None:
+        record['actual_result'] = json.loads(row['actual_result'])
+        record['validation'] = validations.get(row['period'], {})
+    return record
+
+
+def _load_validations(conn, periods=None):
+    if periods is None:
+        rows = conn.execute('SELECT * FROM validations').fetchall()
+    else:
+        periods = list(periods)
+        if not periods:
+            return {}
+        placeholders = ','.join('?' * len(periods))
+        rows = conn.execute(
+            f'SELECT * FROM validations WHERE period IN ({placeholders})', periods
+        ).fetchall()
+
+    result = {}
+    for row in rows:
+        result.setdefault(row['period'], {})[row['strategy']] = {
+            'predicted': json.loads(row['predicted']),
+            'hits': json.loads(row['hits']),
+            'hit_count': row['hit_count'],
+            'hit_rate': row['hit_rate']
+        }
+    return result
+
+
+def load_recommendation_history(conn=None):
+    """
+    加载全部推荐历史（与 JSON 文件相同的结构）
+
+    Returns:
+        dict: {期号: 推荐记录}
+    """
+    conn = conn or get_connection()
+    validations = _load_validations(conn)
+    rows = conn.execute('SELECT * FROM recommendations ORDER BY period').fetchall()
+    return {row['period']: _record_from_row(row, validations) for row in rows}
+
+
+def query_recommendation_history(start=None, end=None, cursor=None, offset=0, limit=50,
+                                 conn=None):
+    """
+    按期号倒序分页查询推荐历史（只读取当页记录的验证结果）
+
+    Args:
+        start: 起始期号（含）
+        end: 结束期号（含）
+        cursor: 只返回期号小于该值的记录
+        offset: 跳过的记录数
+        limit: 返回的记录数
+
+    Returns:
+        tuple: ([(期号, 推荐记录)], 期号范围内的总数, 下一页游标或 None)
+    """
+    conn = conn or get_connection()
+    clauses, params = [], []
+    if start:
+        clauses.append('period >= ?')
+        params.append(str(start))
+    if end:
+        clauses.append('period <= ?')
+        params.append(str(end))
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+    total = conn.execute(f'SELECT COUNT(*) FROM recommendations {where}', params).fetchone()[0]
+
+    if cursor:
+        clauses.append('period < ?')
+        params.append(str(cursor))
+        where = f"WHERE {' AND '.join(clauses)}"
+    # 多取一条判断是否还有下一页
+    rows = conn.execute(
+        f'SELECT * FROM recommendations {where} ORDER BY period DESC LIMIT ? OFFSET ?',
+        params + [limit + 1, offset]
+    ).fetchall()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    validations = _load_validations(conn, [row['period'] for row in rows])
+    items = [(row['period'], _record_from_row(row, validations)) for row in rows]
+    next_cursor = items[-1][0] if items and has_more else None
+    return items, total, next_cursor
+
+
+# ---------------------------------------------------------------- 数据迁移
+
+def import_history(draws, history, conn=None):
+    """
+    导入现有 CSV 开奖数据和 JSON 推荐历史
+
+    Args:
+        draws: 开奖数据列表
+        history: 推荐历史字典 {期号: 推荐记录}
+
+    Returns:
+        tuple: (新增开奖期数, 导入推荐条数)
+    """
+    conn = conn or get_connection()
+    added = insert_draws(normalize_draws(draws), conn=conn)
+
+    for period, record in history.items():
+        save_recommendation(period, record, conn=conn)
+        if 'actual_result' in record:
+            save_validation(period, record['actual_result'], record.get('validation', {}), conn=conn)
+
+    return len(added), len(history)
@@ -0,0 +1,50 @@
+"""
+历史数据回填脚本
+从配置的数据源按页并发获取全部快乐8开奖历史，按期号合并到历史存储
+中断后重新运行会从断点 (data/backfill_checkpoint.json) 继续
+
+用法:
+    python backfill_history.py [--page-size 100] [--concurrency 4] [--max-pages N] [--reset]
+"""
+import argparse
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from app.services.backfill import backfill_history
+
+
+def main():
+    parser = argparse.ArgumentParser(description='回填快乐8全部开奖历史')
+    parser.add_argument('--page-size', type=int, help='每页期数')
+    parser.add_argument('--concurrency', type=int, help='同时请求的页数')
+    parser.add_argument('--max-pages', type=int, help='最多获取的页数')
+    parser.add_argument('--reset', action='store_true', help='忽略断点，从第一页重新开始')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("快乐8 历史数据回填")
+    print("=" * 60)
+
+    app = create_app()
+
+    with app.app_context():
+        try:
+            stats = backfill_history(page_size=args.page_size, concurrency=args.concurrency,
+                                     reset=args.reset, max_pages=args.max_pages)
+        except Exception as e:
+            print(f"\n[ERROR] 回填失败: {e}")
+            return 1
+
+    print(f"\n[OK] 完成 {stats['pages']} 页, 获取 {stats['fetched']} 期, 新增 {stats['added']} 期")
+    if stats['failed_pages']:
+        print(f"[WARN] 失败页: {stats['failed_pages']}，重新运行本脚本可从断点继续")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
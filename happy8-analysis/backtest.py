@@ -0,0 +1,74 @@
+"""
+推荐策略回测脚本
+按时间顺序重放全部开奖历史，每期只用之前的数据生成推荐并与开奖结果比对，
+输出各策略的命中统计
+
+用法:
+    python backtest.py [--start 2025001] [--end 2026026] [--lookback 50] [--workers N] [--output report.json]
+"""
+import argparse
+import json
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from app.utils.data_loader import read_from_csv
+from app.services.backtester import run_backtest
+
+
+def main():
+    parser = argparse.ArgumentParser(description='回测快乐8推荐策略')
+    parser.add_argument('--start', help='回测起始期号（含）')
+    parser.add_argument('--end', help='回测结束期号（含）')
+    parser.add_argument('--lookback', type=int, help='每期可见的历史期数')
+    parser.add_argument('--workers', type=int, help='进程数，默认为 CPU 核数')
+    parser.add_argument('--output', help='保存 JSON 报告的路径')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("快乐8 推荐策略回测")
+    print("=" * 60)
+
+    app = create_app()
+
+    with app.app_context():
+        data = read_from_csv(limit=10 ** 9)
+        if not data:
+            print("[ERROR] 无法读取历史数据")
+            return 1
+
+        config = app.config
+        report = run_backtest(
+            data,
+            start_period=args.start,
+            end_period=args.end,
+            lookback=args.lookback or config['BACKTEST_LOOKBACK'],
+            hot_periods=config['HOT_NUMBER_PERIODS'],
+            workers=args.workers,
+            shard_size=config['BACKTEST_SHARD_SIZE']
+        )
+
+    if not report['periods']:
+        print(f"[ERROR] 历史数据不足: 共 {len(data)} 期，至少需要 {report['lookback'] + 1} 期")
+        return 1
+
+    print(f"\n回测期号: {report['first_period']} - {report['last_period']}，"
+          f"共 {report['periods']} 期，用时 {report['elapsed']:.2f} 秒\n")
+    print(f"{'策略':<16}{'平均命中':>10}{'命中率':>10}{'最多命中':>10}  命中分布")
+    for key, stats in sorted(report['strategies'].items(), key=lambda x: -x[1]['hit_rate']):
+        histogram = ' '.join(f"{k}:{v}" for k, v in stats['histogram'].items())
+        print(f"{key:<16}{stats['avg_hits']:>10.3f}{stats['hit_rate'] * 100:>9.2f}%"
+              f"{stats['max_hits']:>10}  {histogram}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n[OK] 报告已保存: {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
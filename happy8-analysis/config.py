@@ -18,6 +18,17 @@ class Config:
     DATA_DIR = BASE_DIR / 'data'
     HISTORY_FILE = DATA_DIR / 'happy8_history.csv'
     RECOMMENDATIONS_FILE = DATA_DIR / 'recommendations_history.json'
+    RECOMMENDATION_JOURNAL_DELAY = 0.5  # 推荐记录后台写入的合并窗口（秒）
+    HISTORY_PAGE_SIZE = 50  # /api/history 默认每页记录数
+    HISTORY_MAX_PAGE_SIZE = 200  # /api/history 每页记录数上限
+    STRATEGY_STATS_FILE = DATA_DIR / 'strategy_stats.json'  # 策略表现台账
+    STRATEGY_STATS_WINDOWS = (10, 50)  # 策略表现的滑动窗口期数
+    # 二进制历史文件 (data/happy8_history.npy)，memmap 加载，多个 worker 共享页缓存；新开奖原地追加
+    HISTORY_BINARY_ENABLED = True
+    
+    # 存储后端: 'file' (CSV + JSON) 或 'sqlite' (WAL 模式，需先运行 migrate_to_sqlite.py)
+    STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'file')
+    DATABASE_FILE = DATA_DIR / 'happy8.db'
     
     # 日志配置
     LOG_DIR = BASE_DIR / 'logs'
@@ -26,14 +37,31 @@ class Config:
     
     # 数据获取配置
     DEFAULT_LIMIT = 50
-    CACHE_TIMEOUT = 3600  # 缓存超时时间（秒）
+    CACHE_TIMEOUT = 3600  # 缓存超时时间（秒），数据源响应缓存的最长保留时间
+    FETCH_CACHE_TTL = 60  # 数据源未返回 max-age 时，响应直接复用的新鲜期（秒）
     REQUEST_TIMEOUT = 15  # 网络请求超时时间（秒）
+    FETCH_HEDGE_DELAY = 2.0  # 首选数据源超过该时间未返回时并发请求下一个数据源（秒），需至少两个已适配解析的数据源
+    CIRCUIT_BREAKER_THRESHOLD = 3  # 数据源连续失败多少次后熔断
+    CIRCUIT_BREAKER_COOLDOWN = 300  # 熔断冷却时间（秒）
+    FETCH_COOLDOWN = 30  # 网络获取完成后的冷却期（秒），期内刷新直接复用结果，不访问网络
+    SINGLE_FLIGHT_DIR = DATA_DIR / 'single_flight'  # 跨 worker 合并请求的锁和结果文件目录
+    
+    # 接口响应缓存 (/api/data，ETag/304)
+    RESPONSE_CACHE_SIZE = 32  # 进程内缓存的响应数
+    RESPONSE_CACHE_SHARED = True  # 是否启用多 worker 共享的文件缓存
+    RESPONSE_CACHE_DIR = DATA_DIR / 'response_cache'
+    RESPONSE_CACHE_SHARED_FILES = 64  # 共享文件缓存最多保留的响应数（超出时删除最旧的）
+    DATA_MAX_LIMIT = 500  # /api/data 的 limit 上限
     
-    # API 数据源
+    # API 数据源（按优先级排序）
+    # 只有 fetch_engine.PARSERS 中有解析函数的数据源参与请求；目前只适配了福彩官网，
+    # 彩票API 会被跳过，FETCH_HEDGE_DELAY 对冲在适配第二个数据源之前不会触发
     DATA_SOURCES = [
         {
             'name': '福彩官网',
-            'url': 'http://www.cwl.gov.cn/cwl_admin/front/cwlkj/search/kjxx/findDrawNotice?name=kl8&issueCount={limit}'
+            'url': 'http://www.cwl.gov.cn/cwl_admin/front/cwlkj/search/kjxx/findDrawNotice?name=kl8&issueCount={limit}',
+            # 分页接口（增量更新、历史回填使用）
+            'page_url': 'http://www.cwl.gov.cn/cwl_admin/front/cwlkj/search/kjxx/findDrawNotice?name=kl8&pageNo={page}&pageSize={size}&systemType=PC'
         },
         {
             'name': '彩票API',
@@ -41,14 +69,71 @@ class Config:
         }
     ]
     
+    # 历史回填配置 (backfill_history.py)
+    BACKFILL_PAGE_SIZE = 100  # 每页期数
+    BACKFILL_CONCURRENCY = 4  # 同时请求的页数
+    BACKFILL_MAX_RETRIES = 3  # 单页失败重试次数
+    BACKFILL_BACKOFF = 1.0  # 重试退避基数（秒），按 1, 2, 4... 倍递增
+    BACKFILL_CHECKPOINT_FILE = DATA_DIR / 'backfill_checkpoint.json'
+    
     # 分析配置
     HOT_NUMBER_PERIODS = 20  # 热号分析期数
     PATTERN_ANALYSIS_PERIODS = 30  # 模式分析期数
     AC_ANALYSIS_PERIODS = 50  # AC值分析期数
+    FREQUENCY_WINDOWS = (10, 20, 50, 100)  # /api/frequency 默认统计窗口（期数）
+    FREQUENCY_MAX_WINDOWS = 10  # /api/frequency、/api/patterns 单次最多查询的窗口数
+    PATTERN_WINDOWS = (10, 30, 100, None)  # /api/patterns 默认统计窗口（None 表示全部历史）
+    CO_OCCURRENCE_MIN_HITS = 3  # 热号同出分析中列出的最少同出个数
+    PREDICTION_SCORE_WEIGHTS = {'hot': 10, 'omission': 3}  # 仪表盘预测分数的特征权重
+    
+    # 号码评分配置 (/api/scores)
+    SCORING_HISTORY_PERIODS = 200  # 评分读取的历史期数（遗漏值以此为上限）
+    SCORING_WINDOWS = (10, 20, 50, 100)  # freq_N 特征的窗口期数
+    SCORING_CO_OCCURRENCE_PERIODS = 20  # co_occurrence 特征的统计期数
+    SCORING_PICK_SIZE = 10  # 每个策略默认选号个数
+    SCORING_MAX_STRATEGIES = 50  # 单次请求最多的策略数
+    SCORING_STRATEGIES = {  # 默认评分策略 {策略名: {特征名: 权重}}
+        'hot_omission': {'hot': 10, 'omission': 3},
+        'recent_hot': {'freq_10': 3, 'freq_50': 1},
+        'cold_rebound': {'omission': 1, 'freq_100': 0.2},
+        'repeat_follow': {'repeat': 5, 'co_occurrence': 0.1, 'hot': 1},
+        'ml_blend': {'ml': 100, 'hot': 1},
+    }
+    
+    # 多注组合优化配置 (/api/tickets)
+    TICKET_POOL_STRATEGY = 'hot_omission'  # 未指定号码池时的来源：评分策略名或 'all_candidates'
+    TICKET_POOL_SIZE = 20  # 由评分策略生成的号码池大小
+    TICKET_MAX_POOL = 40  # 号码池上限
+    TICKET_MAX_TICKETS = 50  # 单次请求最多的注数
+    TICKET_RESTARTS = 8  # 搜索重启次数
+    TICKET_TIME_BUDGET = 0.2  # 搜索时间上限（秒）
+    TICKET_WORKERS = 1  # 并行重启的进程数，1 表示在请求进程中计算
+    
+    # 回测配置
+    BACKTEST_LOOKBACK = 50  # 每期生成推荐时可见的历史期数（与仪表盘默认分析期数一致）
+    BACKTEST_SHARD_SIZE = 2000  # 每个进程分片的期数
+    
+    # 奖金设置 (/api/odds)
+    TICKET_PRICE = 2  # 每注金额（元）
+    PRIZE_TABLE = {  # 固定奖金 {选几: {中几个: 奖金（元）}}，选十中十为浮动奖，按封顶金额计
+        10: {10: 5000000, 9: 8000, 8: 800, 7: 80, 6: 5, 5: 3, 0: 2},
+        9: {9: 300000, 8: 2000, 7: 200, 6: 20, 5: 5, 4: 3, 0: 2},
+        8: {8: 50000, 7: 800, 6: 88, 5: 10, 4: 3, 0: 2},
+        7: {7: 10000, 6: 288, 5: 28, 4: 4, 0: 2},
+        6: {6: 3000, 5: 30, 4: 10, 3: 3},
+        5: {5: 1000, 4: 21, 3: 3},
+        4: {4: 100, 3: 5, 2: 3},
+        3: {3: 53, 2: 3},
+        2: {2: 19},
+        1: {1: 4.6},
+    }
     
     # 自动更新配置
     AUTO_UPDATE_ENABLED = True  # 是否启用自动更新
     UPDATE_INTERVAL_MINUTES = 15  # 更新间隔(分钟)
+    UPDATE_PAGE_SIZE = 100  # 增量更新每页期数，缺口超过时分页获取
+    UPDATE_MAX_PAGES = 50  # 增量更新最多获取的页数
+    UPDATE_INITIAL_PERIODS = 100  # 本地无数据时首次获取的期数
     UPDATE_TIME_WINDOWS = [  # 开奖时间窗口 (开始时间, 结束时间)
         ('09:00', '21:30'),  # 白天开奖时段
     ]
@@ -0,0 +1,41 @@
+"""
+开奖历史格式转换脚本
+CSV <-> 二进制 (.npy, memmap 加载)
+
+用法:
+    python convert_history.py to-binary [csv文件] [npy文件]
+    python convert_history.py to-csv [npy文件] [csv文件]
+"""
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config import Config
+from app.utils.binary_history import csv_to_binary, binary_to_csv, binary_path_for
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in ('to-binary', 'to-csv'):
+        print(__doc__)
+        return 1
+
+    csv_file = str(Config.HISTORY_FILE)
+    binary_file = binary_path_for(csv_file)
+
+    if sys.argv[1] == 'to-binary':
+        src = sys.argv[2] if len(sys.argv) > 2 else csv_file
+        dst = sys.argv[3] if len(sys.argv) > 3 else binary_path_for(src)
+        count = csv_to_binary(src, dst)
+    else:
+        src = sys.argv[2] if len(sys.argv) > 2 else binary_file
+        dst = sys.argv[3] if len(sys.argv) > 3 else csv_file
+        count = binary_to_csv(src, dst)
+
+    print(f'[OK] 已转换 {count} 期数据: {src} -> {dst}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
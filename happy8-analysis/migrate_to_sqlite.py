@@ -0,0 +1,57 @@
+"""
+数据迁移脚本: CSV + JSON -> SQLite
+将 data/happy8_history.csv 和 data/recommendations_history.json 导入 SQLite 数据库
+导入完成后设置环境变量 STORAGE_BACKEND=sqlite 启用 SQLite 后端
+"""
+import sys
+import os
+import json
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from app.utils import sqlite_store
+from app.utils.draw_store import DrawStore
+
+
+def main():
+    """执行迁移"""
+    print("=" * 60)
+    print("快乐8 数据迁移: CSV/JSON -> SQLite")
+    print("=" * 60)
+    
+    app = create_app()
+    
+    with app.app_context():
+        history_file = app.config['HISTORY_FILE']
+        rec_file = app.config['RECOMMENDATIONS_FILE']
+        db_file = app.config['DATABASE_FILE']
+        
+        # 读取全部开奖数据(不受 limit 限制)
+        print(f"\n[1/3] 读取开奖数据: {history_file}")
+        store = DrawStore()
+        store.refresh(history_file)
+        draws = store.to_records(len(store))
+        print(f"[OK] 共 {len(draws)} 期")
+        
+        print(f"\n[2/3] 读取推荐历史: {rec_file}")
+        history = {}
+        if os.path.exists(rec_file):
+            with open(rec_file, 'r', encoding='utf-8') as f:
+                history = json.load(f)
+        print(f"[OK] 共 {len(history)} 条")
+        
+        print(f"\n[3/3] 写入数据库: {db_file}")
+        conn = sqlite_store.get_connection(db_file)
+        added, imported = sqlite_store.import_history(draws, history, conn=conn)
+        print(f"[OK] 新增开奖 {added} 期, 导入推荐 {imported} 条")
+    
+    print("\n" + "=" * 60)
+    print("[SUCCESS] 迁移完成!")
+    print("=" * 60)
+    print("\n提示: 设置环境变量 STORAGE_BACKEND=sqlite 后重启应用即可启用 SQLite 后端")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+测试公共夹具
+- stub_server: 本地 HTTP 桩服务，按路径返回预设的状态码、延迟和 JSON
+"""
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def make_draws(first_period, count):
+    """生成 count 期开奖数据（福彩官网格式，期号从 first_period 递减）"""
+    return [
+        {
+            'code': str(first_period - i),
+            'date': '2026-01-01(四)',
+            'red': ','.join(str(n).zfill(2) for n in range(1 + i % 60, 21 + i % 60))
+        }
+        for i in range(count)
+    ]
+
+
+class StubServer:
+    """按路径配置响应的 HTTP 桩服务，记录每次请求的路径和时间"""
+
+    def __init__(self):
+        self.routes = {}
+        self.requests = []
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                with stub._lock:
+                    stub.requests.append((parts.path, parts.query, time.monotonic()))
+                    route = stub.routes.get(parts.path, {'status': 404, 'body': {}})
+                    if callable(route):
+                        route = route(parts.query)
+                if route.get('delay'):
+                    time.sleep(route['delay'])
+                body = json.dumps(route.get('body', {}), ensure_ascii=False).encode('utf-8')
+                try:
+                    self.send_response(route.get('status', 200))
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                except OSError:
+                    # 客户端已超时断开
+                    pass
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.httpd.daemon_threads = True
+        self.base_url = f'http://127.0.0.1:{self.httpd.server_address[1]}'
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+
+    def route(self, path, status=200, body=None, delay=0):
+        """设置固定响应"""
+        self.routes[path] = {'status': status, 'body': body or {}, 'delay': delay}
+
+    def hits(self, path):
+        """某路径的请求时间列表"""
+        with self._lock:
+            return [at for p, _, at in self.requests if p == path]
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def stub_server():
+    server = StubServer()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def app(tmp_path):
+    """最小应用上下文：数据文件均写入临时目录"""
+    from flask import Flask
+    from config import TestingConfig
+
+    app = Flask('happy8-test')
+    app.config.from_object(TestingConfig)
+    app.config.update(
+        STORAGE_BACKEND='file',
+        DATA_DIR=tmp_path,
+        HISTORY_FILE=tmp_path / 'happy8_history.csv',
+        RECOMMENDATIONS_FILE=tmp_path / 'recommendations_history.json',
+        STRATEGY_STATS_FILE=tmp_path / 'strategy_stats.json',
+        DATABASE_FILE=tmp_path / 'happy8.db',
+        BACKFILL_CHECKPOINT_FILE=tmp_path / 'backfill_checkpoint.json',
+        SINGLE_FLIGHT_DIR=tmp_path / 'single_flight',
+        RESPONSE_CACHE_DIR=tmp_path / 'response_cache',
+        AUTO_UPDATE_ENABLED=False
+    )
+    with app.app_context():
+        yield app
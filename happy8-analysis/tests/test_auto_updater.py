@@ -0,0 +1,65 @@
+"""自动更新：按缺口获取缺失期数"""
+from app.services import auto_updater as auto_updater_module
+from app.services.auto_updater import auto_updater
+from app.services.fetch_engine import parse_cwl_response
+
+from conftest import make_draws
+
+
+LATEST = 2026300
+
+
+def network(monkeypatch, total):
+    """模拟网络分页接口，记录每次请求的 (limit, page)"""
+    draws = parse_cwl_response({'result': make_draws(LATEST, total)})
+    calls = []
+
+    def fetch_from_network(limit=50, force=False, page=1):
+        calls.append((limit, page))
+        return draws[(page - 1) * limit:page * limit]
+
+    monkeypatch.setattr(auto_updater_module, 'fetch_from_network', fetch_from_network)
+    return calls
+
+
+def test_gap_within_one_page_needs_one_request(app, monkeypatch):
+    calls = network(monkeypatch, 300)
+
+    missing = auto_updater._fetch_missing(str(LATEST - 5), 5)
+
+    assert [item['period'] for item in missing] == [str(LATEST - i) for i in range(5)]
+    assert calls == [(6, 1)]
+
+
+def test_underestimated_gap_keeps_paging(app, monkeypatch):
+    calls = network(monkeypatch, 300)
+
+    missing = auto_updater._fetch_missing(str(LATEST - 8), 5)
+
+    assert len(missing) == 8
+    assert calls == [(6, 1), (6, 2)]
+
+
+def test_large_gap_is_paged(app, monkeypatch):
+    app.config['UPDATE_PAGE_SIZE'] = 100
+    calls = network(monkeypatch, 300)
+
+    missing = auto_updater._fetch_missing(str(LATEST - 150), 150)
+
+    assert len(missing) == 150
+    assert calls == [(100, 1), (100, 2)]
+
+
+def test_no_missing_draws_is_not_a_save_failure(app, monkeypatch, caplog):
+    network(monkeypatch, 1)
+    merged = []
+    monkeypatch.setattr(auto_updater_module, 'read_from_csv', lambda limit=None: [{'period': str(LATEST - 5)}])
+    monkeypatch.setattr(auto_updater_module, 'merge_history', lambda data: merged.append(data) or len(data))
+    monkeypatch.setattr(auto_updater, '_fetch_missing', lambda local_period, gap: [])
+
+    with caplog.at_level('INFO'):
+        assert auto_updater.check_and_update() is False
+
+    assert merged == []
+    assert '新增 0 期' in caplog.text
+    assert '数据保存失败' not in caplog.text
@@ -0,0 +1,212 @@
+"""历史数据回填：分页并发、重试退避、断点续传、去重和批量写入"""
+import csv
+import logging
+from urllib.parse import parse_qs
+
+import pytest
+
+from app.services import backfill
+from app.services.backfill import Backfiller, load_checkpoint, shift_done_pages
+from app.utils.http_client import http_client
+
+from conftest import make_draws
+
+
+logger = logging.getLogger('test_backfill')
+
+LATEST = 2026300
+
+
+@pytest.fixture(autouse=True)
+def clear_http_cache():
+    http_client.clear()
+    yield
+    http_client.clear()
+
+
+class PagedHistory:
+    """按 pageNo / pageSize 分页返回的开奖历史，可按页注入失败"""
+
+    def __init__(self, total, delay=0):
+        self.draws = make_draws(LATEST, total)
+        self.delay = delay
+        self.faults = {}  # 页码 -> 依次使用的故障响应，用完后正常返回
+
+    def add_latest(self, count):
+        """新开奖 count 期（分页整体后移）"""
+        latest = int(self.draws[0]['code'])
+        self.draws = make_draws(latest + count, count) + self.draws
+
+    def __call__(self, query):
+        params = parse_qs(query)
+        page, size = int(params['pageNo'][0]), int(params['pageSize'][0])
+        faults = self.faults.get(page)
+        if faults:
+            return faults.pop(0)
+        return {'body': {'result': self.draws[(page - 1) * size:page * size]}, 'delay': self.delay}
+
+
+def make_backfiller(stub_server, history, name, **kwargs):
+    stub_server.routes['/kl8'] = history
+    source = {
+        'name': name,
+        'parser': '福彩官网',
+        'url': stub_server.base_url + '/kl8?issueCount={limit}',
+        'page_url': stub_server.base_url + '/kl8?pageNo={page}&pageSize={size}'
+    }
+    options = dict(page_size=100, concurrency=4, max_retries=3, backoff=0.01, timeout=2, logger=logger)
+    options.update(kwargs)
+    return Backfiller([source], **options)
+
+
+def requested_pages(stub_server):
+    return [int(parse_qs(query)['pageNo'][0]) for path, query, _ in stub_server.requests if path == '/kl8']
+
+
+def history_periods(app):
+    with open(app.config['HISTORY_FILE'], 'r', encoding='utf-8') as f:
+        return [row[0] for row in csv.reader(f)][1:]
+
+
+def test_pages_fetched_concurrently(app, stub_server):
+    history = PagedHistory(250, delay=0.3)
+    backfiller = make_backfiller(stub_server, history, 'fanout')
+
+    stats = backfiller.run()
+
+    assert stats['fetched'] == 250
+    assert stats['added'] == 250
+    assert stats['failed_pages'] == []
+    # 第 1 页返回后，后续 concurrency 页同时发出
+    pages = requested_pages(stub_server)
+    assert pages[0] == 1
+    assert sorted(pages[1:5]) == [2, 3, 4, 5]
+    started = [at for path, _, at in stub_server.requests if path == '/kl8']
+    assert started[4] - started[1] < 0.3
+    assert sorted(history_periods(app), reverse=True) == [str(LATEST - i) for i in range(250)]
+
+
+def test_short_page_stops_fan_out(app, stub_server):
+    history = PagedHistory(150)
+    backfiller = make_backfiller(stub_server, history, 'short-page', concurrency=1)
+
+    stats = backfiller.run()
+
+    assert stats['fetched'] == 150
+    assert requested_pages(stub_server) == [1, 2]
+
+
+def test_retry_with_backoff_on_server_error(app, stub_server):
+    history = PagedHistory(150)
+    history.faults[2] = [{'status': 500}, {'status': 503}]
+    backfiller = make_backfiller(stub_server, history, 'retry-5xx', backoff=0.1)
+
+    stats = backfiller.run()
+
+    assert stats['failed_pages'] == []
+    assert stats['added'] == 150
+    attempts = [at for (path, query, at) in stub_server.requests if 'pageNo=2&' in query]
+    assert len(attempts) == 3
+    # 退避时间按 1, 2 倍递增（含至多 50% 的随机抖动）
+    assert attempts[1] - attempts[0] >= 0.1
+    assert attempts[2] - attempts[1] >= 0.2
+
+
+def test_retry_on_timeout(app, stub_server):
+    history = PagedHistory(150)
+    history.faults[2] = [{'body': {'result': []}, 'delay': 1.0}]
+    backfiller = make_backfiller(stub_server, history, 'retry-timeout', timeout=0.3)
+
+    stats = backfiller.run()
+
+    assert stats['failed_pages'] == []
+    assert stats['fetched'] == 150
+    assert requested_pages(stub_server).count(2) == 2
+
+
+def test_retries_exhausted_page_is_reported(app, stub_server, tmp_path):
+    history = PagedHistory(250)
+    history.faults[2] = [{'status': 500}] * 3
+    checkpoint_file = str(tmp_path / 'checkpoint.json')
+    backfiller = make_backfiller(stub_server, history, 'retry-exhausted', max_retries=2)
+
+    stats = backfiller.run(checkpoint_file)
+
+    assert stats['failed_pages'] == [2]
+    assert stats['added'] == 150
+    # 失败页不记入断点，下次运行重新获取
+    done_pages = load_checkpoint(checkpoint_file)['done_pages']
+    assert 2 not in done_pages
+    assert {1, 3} <= done_pages
+
+
+def test_shift_done_pages():
+    assert shift_done_pages({1, 2, 3}, 100, 0) == {1, 2, 3}
+    # 后移 30 期：原第 1-3 页覆盖新位置 [30, 330)，完整覆盖的只有第 2、3 页
+    assert shift_done_pages({1, 2, 3}, 100, 30) == {2, 3}
+    # 不连续的页各自换算
+    assert shift_done_pages({1, 3}, 100, 30) == set()
+    assert shift_done_pages({2, 3, 5, 6}, 10, 10) == {3, 4, 6, 7}
+
+
+def test_checkpoint_resume_after_new_draws(app, stub_server, tmp_path):
+    history = PagedHistory(450)
+    checkpoint_file = str(tmp_path / 'checkpoint.json')
+    backfiller = make_backfiller(stub_server, history, 'resume')
+
+    stats = backfiller.run(checkpoint_file, max_pages=3)
+    assert stats['added'] == 300
+    checkpoint = load_checkpoint(checkpoint_file)
+    assert checkpoint['done_pages'] == {1, 2, 3}
+    assert checkpoint['anchor_period'] == str(LATEST)
+
+    # 中断期间新开奖 30 期，已完成的第 2、3 页换算后仍完整，不再请求
+    history.add_latest(30)
+    stub_server.requests.clear()
+    stats = backfiller.run(checkpoint_file)
+
+    assert 2 not in requested_pages(stub_server)
+    assert 3 not in requested_pages(stub_server)
+    assert stats['added'] == 180
+    assert len(history_periods(app)) == 480
+    assert load_checkpoint(checkpoint_file)['anchor_period'] == str(LATEST + 30)
+
+
+def test_dedupe_by_period(app, stub_server):
+    history = PagedHistory(150)
+    # 第 2 页与第 1 页末尾重复 10 期（分页期间新开奖造成的重叠）
+    overlap = history.draws[90:100] + history.draws[100:150]
+    history.faults[2] = [{'body': {'result': overlap}}]
+    backfiller = make_backfiller(stub_server, history, 'dedupe', concurrency=1)
+
+    stats = backfiller.run()
+
+    assert stats['fetched'] == 160
+    assert stats['added'] == 150
+    periods = history_periods(app)
+    assert len(periods) == len(set(periods)) == 150
+
+    # 再次运行时本地已有的期号不重复写入
+    stats = backfiller.run()
+    assert stats['added'] == 0
+    assert len(history_periods(app)) == 150
+
+
+def test_bulk_merge_into_history_file(app, stub_server, monkeypatch):
+    history = PagedHistory(500)
+    merges = []
+    merge_history = backfill.merge_history
+
+    def recording_merge(data):
+        merges.append(len(data))
+        return merge_history(data)
+
+    monkeypatch.setattr(backfill, 'merge_history', recording_merge)
+    backfiller = make_backfiller(stub_server, history, 'bulk-merge', concurrency=1)
+
+    stats = backfiller.run(batch_pages=2)
+
+    # 每 2 页写入一次，末尾不足一批的页在结束时写入
+    assert merges == [200, 200, 100]
+    assert stats['added'] == 500
+    assert sorted(history_periods(app), key=int, reverse=True) == [str(LATEST - i) for i in range(500)]
@@ -0,0 +1,107 @@
+"""开奖数据存储：追加写入只处理新增的尾部，二进制文件原地追加"""
+import os
+
+import numpy as np
+import pytest
+
+from app.utils.binary_history import append_binary, binary_path_for, load_binary, save_binary
+from app.utils.draw_store import DrawStore
+from app.utils.history_writer import CSV_FIELDNAMES
+
+
+def draw_row(period):
+    start = period % 60
+    return [str(period), '2026-01-01'] + [str(n).zfill(2) for n in range(start + 1, start + 21)]
+
+
+def write_rows(path, periods, mode='a'):
+    with open(path, mode, encoding='utf-8', newline='') as f:
+        if mode == 'w':
+            f.write(','.join(CSV_FIELDNAMES) + '\n')
+        for period in periods:
+            f.write(','.join(draw_row(period)) + '\n')
+    # 保证 mtime 与上次写入不同
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+@pytest.fixture
+def history_file(tmp_path):
+    path = str(tmp_path / 'happy8_history.csv')
+    write_rows(path, range(2026001, 2026101), 'w')
+    return path
+
+
+@pytest.mark.parametrize('binary', [False, True])
+def test_appended_draws_extend_the_store(history_file, binary):
+    store = DrawStore(binary)
+    store.refresh(history_file)
+    before = store.snapshot
+
+    write_rows(history_file, [2026102, 2026101])
+    assert store.refresh(history_file)
+
+    assert len(store) == 102
+    assert store.latest_period() == '2026102'
+    assert store.snapshot.periods[:3].tolist() == [2026102, 2026101, 2026100]
+    assert store.by_period('2026101').tolist() == [int(n) for n in draw_row(2026101)[2:]]
+    # 追加前的快照不受影响
+    assert len(before.periods) == 100
+    assert 2026101 not in before.index
+    assert before.index.get(2026100) == 0
+
+
+def test_binary_is_appended_in_place(history_file):
+    store = DrawStore(True)
+    store.refresh(history_file)
+    binary_file = binary_path_for(history_file)
+    inode = os.stat(binary_file).st_ino
+
+    for period in range(2026101, 2026111):
+        write_rows(history_file, [period])
+        store.refresh(history_file)
+
+    assert os.stat(binary_file).st_ino == inode
+    records = load_binary(binary_file)
+    assert records['period'].tolist() == list(range(2026001, 2026111))
+    reloaded = DrawStore(True)
+    reloaded.refresh(history_file)
+    assert reloaded.to_records(110) == store.to_records(110)
+
+
+def test_older_period_in_tail_reloads_everything(history_file):
+    store = DrawStore(True)
+    store.refresh(history_file)
+
+    write_rows(history_file, [2026101, 2025999])
+    store.refresh(history_file)
+
+    assert len(store) == 102
+    assert store.snapshot.periods[-1] == 2025999
+    assert '2025999' in store
+    assert load_binary(binary_path_for(history_file))['period'][0] == 2025999
+
+
+def test_legacy_descending_binary_is_regenerated(history_file):
+    periods = np.arange(2026100, 2026000, -1, dtype=np.int64)
+    numbers = np.ones((100, 20), dtype=np.uint8)
+    save_binary(binary_path_for(history_file), periods, ['2026-01-01'] * 100, numbers,
+                np.zeros((100, 2), dtype=np.uint64))
+    os.utime(binary_path_for(history_file), ns=(0, os.stat(history_file).st_mtime_ns + 1_000_000))
+
+    store = DrawStore(True)
+    store.refresh(history_file)
+
+    assert store.by_period('2026100').tolist() == [int(n) for n in draw_row(2026100)[2:]]
+    assert load_binary(binary_path_for(history_file))['period'][0] == 2026001
+
+
+def test_append_binary_checks_record_count(tmp_path):
+    binary_file = str(tmp_path / 'history.npy')
+    row = (np.array([1], dtype=np.int64), ['2026-01-01'], np.ones((1, 20), dtype=np.uint8),
+           np.zeros((1, 2), dtype=np.uint64))
+    save_binary(binary_file, *row)
+
+    assert not append_binary(binary_file, 2, np.array([2]), *row[1:])
+    assert append_binary(binary_file, 1, np.array([2]), *row[1:])
+    assert load_binary(binary_file)['period'].tolist() == [1, 2]
@@ -0,0 +1,84 @@
+"""截止期号 end：按数值定位，非数字或早于最早一期返回 400，响应给出实际截止期号"""
+import csv
+
+import pytest
+
+from app.routes import register_routes
+from app.services.co_occurrence import CoOccurrenceIndex
+from app.services.frequency_index import FrequencyIndex
+from app.utils.history_writer import CSV_FIELDNAMES
+
+
+def make_rows(first_period, count):
+    """期号从 first_period 递增的 count 期开奖数据（按期号倒序）"""
+    rows = [
+        {'period': str(first_period + i), 'numbers': [str(n).zfill(2) for n in range(1 + i % 60, 21 + i % 60)]}
+        for i in range(count)
+    ]
+    return rows[::-1]
+
+
+@pytest.mark.parametrize('index_class', [FrequencyIndex, CoOccurrenceIndex])
+def test_periods_compare_as_numbers(index_class):
+    # 期号位数变化时字符串比较会错位：'1000' < '998'
+    index = index_class()
+    index.extend(make_rows(995, 10))
+
+    assert index.resolve_period(None) == '1004'
+    assert index.resolve_period('999') == '999'
+    assert index.resolve_period(' 1001 ') == '1001'
+    assert index.resolve_period('99999999') == '1004'
+    assert index.resolve_period(1000) == '1000'
+
+
+@pytest.mark.parametrize('index_class', [FrequencyIndex, CoOccurrenceIndex])
+@pytest.mark.parametrize('end', ['abc', '', '994'])
+def test_invalid_end_is_rejected(index_class, end):
+    index = index_class()
+    index.extend(make_rows(995, 10))
+
+    with pytest.raises(ValueError):
+        index.resolve_period(end)
+
+
+def test_window_ends_at_resolved_period():
+    index = FrequencyIndex()
+    rows = make_rows(995, 10)
+    index.extend(rows)
+
+    periods, counts = index.window_counts([3], '1000')[3]
+
+    assert periods == 3
+    expected = [0] * 80
+    for row in rows:
+        if 998 <= int(row['period']) <= 1000:
+            for n in row['numbers']:
+                expected[int(n) - 1] += 1
+    assert counts.tolist() == expected
+
+
+@pytest.fixture
+def client(app):
+    with open(app.config['HISTORY_FILE'], 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_FIELDNAMES)
+        for row in make_rows(2026001, 30):
+            writer.writerow([row['period'], '2026-01-01'] + row['numbers'])
+    register_routes(app)
+    return app.test_client()
+
+
+@pytest.mark.parametrize('path', ['/api/frequency?windows=10', '/api/patterns?windows=10',
+                                  '/api/co_occurrence?window=10'])
+def test_routes_validate_end(client, path):
+    for end in ('abc', '2025999'):
+        response = client.get(f'{path}&end={end}')
+        assert response.status_code == 400
+        assert response.get_json()['success'] is False
+
+    response = client.get(f'{path}&end=99999999')
+    assert response.status_code == 200
+    assert response.get_json()['end_period'] == '2026030'
+
+    response = client.get(f'{path}&end=2026012')
+    assert response.get_json()['end_period'] == '2026012'
@@ -0,0 +1,143 @@
+"""多数据源并发获取引擎：对冲请求、结果选择、故障切换和熔断"""
+import logging
+import time
+
+import pytest
+
+from app.services.fetch_engine import FetchEngine
+from app.utils.http_client import http_client
+
+from conftest import make_draws
+
+
+logger = logging.getLogger('test_fetch_engine')
+
+
+@pytest.fixture(autouse=True)
+def clear_http_cache():
+    http_client.clear()
+    yield
+    http_client.clear()
+
+
+def source(stub_server, name, path):
+    """指向桩服务的数据源（使用福彩官网的解析逻辑）"""
+    return {'name': name, 'parser': '福彩官网', 'url': stub_server.base_url + path + '?limit={limit}'}
+
+
+def fetch(engine, sources, hedge_delay=0.2, timeout=3, **kwargs):
+    return engine.fetch(sources, 5, headers={}, timeout=timeout, logger=logger,
+                        hedge_delay=hedge_delay, cache_ttl=0, cache_timeout=0, **kwargs)
+
+
+def test_hedge_fires_after_delay(stub_server):
+    stub_server.route('/slow', body={'result': make_draws(2026100, 5)}, delay=1.0)
+    stub_server.route('/fast', body={'result': make_draws(2026200, 5)})
+    sources = [source(stub_server, 'hedge-slow', '/slow'), source(stub_server, 'hedge-fast', '/fast')]
+
+    started = time.monotonic()
+    data = fetch(FetchEngine(), sources, hedge_delay=0.2)
+    elapsed = time.monotonic() - started
+
+    assert data[0]['period'] == '2026200'
+    assert 0.2 <= stub_server.hits('/fast')[0] - stub_server.hits('/slow')[0] < 0.6
+    assert elapsed < 0.8
+
+
+def test_no_hedge_when_primary_is_fast(stub_server):
+    stub_server.route('/primary', body={'result': make_draws(2026100, 5)})
+    stub_server.route('/backup', body={'result': make_draws(2026200, 5)})
+    sources = [source(stub_server, 'quick-primary', '/primary'),
+               source(stub_server, 'quick-backup', '/backup')]
+
+    data = fetch(FetchEngine(), sources, hedge_delay=0.5)
+
+    assert data[0]['period'] == '2026100'
+    assert stub_server.hits('/backup') == []
+
+
+def test_first_valid_result_wins(stub_server):
+    # 首选数据源号码不完整，视为失败；取后续第一个有效结果
+    invalid = make_draws(2026100, 5)
+    invalid[0]['red'] = '01,02,03'
+    stub_server.route('/invalid', body={'result': invalid})
+    stub_server.route('/valid', body={'result': make_draws(2026200, 5)})
+    stub_server.route('/later', body={'result': make_draws(2026300, 5)}, delay=0.5)
+    sources = [source(stub_server, 'pick-invalid', '/invalid'),
+               source(stub_server, 'pick-valid', '/valid'),
+               source(stub_server, 'pick-later', '/later')]
+
+    data = fetch(FetchEngine(), sources, hedge_delay=1.0)
+
+    assert [item['period'] for item in data] == [str(2026200 - i) for i in range(5)]
+    assert all(len(item['numbers']) == 20 for item in data)
+
+
+def test_failover_without_waiting_for_hedge_delay(stub_server):
+    stub_server.route('/down', status=500)
+    stub_server.route('/up', body={'result': make_draws(2026200, 5)})
+    sources = [source(stub_server, 'failover-down', '/down'),
+               source(stub_server, 'failover-up', '/up')]
+    engine = FetchEngine()
+
+    started = time.monotonic()
+    data = fetch(engine, sources, hedge_delay=2.0)
+
+    assert data[0]['period'] == '2026200'
+    assert time.monotonic() - started < 1.0
+    assert engine.get_status()['failover-down']['failures'] == 1
+
+
+def test_all_sources_failing_returns_empty(stub_server):
+    stub_server.route('/down', status=500)
+    sources = [source(stub_server, 'empty-a', '/down'), source(stub_server, 'empty-b', '/down')]
+
+    assert fetch(FetchEngine(), sources) == []
+
+
+def test_breaker_open_half_open_close(stub_server):
+    stub_server.route('/flaky', status=500)
+    sources = [source(stub_server, 'breaker-flaky', '/flaky')]
+    engine = FetchEngine()
+    options = {'failure_threshold': 2, 'cooldown': 0.3}
+
+    # 连续失败达到阈值后熔断
+    fetch(engine, sources, **options)
+    assert engine.get_status()['breaker-flaky']['state'] == 'closed'
+    fetch(engine, sources, **options)
+    assert engine.get_status()['breaker-flaky']['state'] == 'open'
+
+    # 熔断期间不发请求
+    requests_before = len(stub_server.hits('/flaky'))
+    assert fetch(engine, sources, **options) == []
+    assert len(stub_server.hits('/flaky')) == requests_before
+
+    # 冷却结束进入半开，试探失败再次熔断
+    time.sleep(0.35)
+    assert engine.get_status()['breaker-flaky']['state'] == 'half_open'
+    assert fetch(engine, sources, **options) == []
+    assert len(stub_server.hits('/flaky')) == requests_before + 1
+    assert engine.get_status()['breaker-flaky']['state'] == 'open'
+
+    # 再次冷却后试探成功，恢复闭合
+    stub_server.route('/flaky', body={'result': make_draws(2026100, 5)})
+    time.sleep(0.35)
+    data = fetch(engine, sources, **options)
+    assert data[0]['period'] == '2026100'
+    status = engine.get_status()['breaker-flaky']
+    assert status['state'] == 'closed'
+    assert status['failures'] == 0
+
+
+def test_source_without_parser_is_skipped(stub_server):
+    stub_server.route('/unknown', body={'rows': []})
+    stub_server.route('/cwl', body={'result': make_draws(2026100, 5)})
+    sources = [{'name': 'no-parser', 'url': stub_server.base_url + '/unknown?limit={limit}'},
+               source(stub_server, 'with-parser', '/cwl')]
+    engine = FetchEngine()
+
+    data = fetch(engine, sources)
+
+    assert data[0]['period'] == '2026100'
+    assert stub_server.hits('/unknown') == []
+    assert 'no-parser' not in engine.get_status()
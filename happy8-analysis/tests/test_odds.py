@@ -0,0 +1,98 @@
+"""中奖概率：胆拖全拖的整组统计和推荐号码的玩法"""
+import json
+from fractions import Fraction
+from itertools import combinations
+
+import pytest
+
+from app.services import analyzer
+from app.utils.odds import OddsTable, odds_table
+from config import Config
+
+
+@pytest.fixture
+def table():
+    table = OddsTable()
+    table.configure(Config.PRIZE_TABLE, Config.TICKET_PRICE)
+    return table
+
+
+@pytest.mark.parametrize('b, k', [(3, 4), (4, 5), (2, 4)])
+def test_banker_outcomes_match_enumeration(table, b, k):
+    summary = table.banker_summary(b, k)
+    bankers = list(range(1, b + 1))
+    others = [n for n in range(1, 81) if n not in bankers]
+
+    for outcome in summary['outcomes']:
+        h = outcome['banker_hits']
+        # 开出前 h 个胆码和 20-h 个拖码
+        drawn = set(bankers[:h]) | set(others[:20 - h])
+        total = sum(Config.PRIZE_TABLE[k].get(len(drawn & set(bankers + list(extra))), 0)
+                    for extra in combinations(others, k - b))
+        assert outcome['prize'] == total
+
+    assert summary['tickets'] == len(list(combinations(others, k - b)))
+    assert summary['cost'] == summary['tickets'] * Config.TICKET_PRICE
+
+
+def test_banker_expectation_is_sum_of_tickets(table):
+    for b, k in [(3, 4), (4, 5), (1, 10)]:
+        summary = table.banker_summary(b, k)
+        single = Fraction(str(table.summary(k)['expected_prize']))
+        assert summary['expected_prize'] == pytest.approx(float(single * summary['tickets']), rel=1e-5)
+
+
+def test_banker_summary_rejects_invalid_play(table):
+    with pytest.raises(ValueError):
+        table.banker_summary(4, 4)
+
+
+def test_recommendations_priced_under_their_play(app, monkeypatch):
+    odds_table.configure(Config.PRIZE_TABLE, Config.TICKET_PRICE)
+    stored = {
+        'banker_codes': ['12', '21', '51'],
+        'pick4_3dan': ['52', '60', '62'],
+        'pick5_4dan': ['34', '52', '60', '62'],
+        'smart_pick5': ['12', '16', '21', '28', '34'],
+        'ml_pick7': ['03', '06', '28', '30', '49', '59', '78'],
+    }
+    with open(app.config['RECOMMENDATIONS_FILE'], 'w', encoding='utf-8') as f:
+        json.dump({'2026101': {'recommendations': stored}}, f)
+
+    def fail(data):
+        raise AssertionError('推荐已保存时不应重新分析')
+
+    monkeypatch.setattr(analyzer, 'analyze_omission', fail)
+    monkeypatch.setattr(analyzer, 'analyze_hot_numbers', fail)
+
+    result = analyzer.get_ticket_odds([{'period': '2026100', 'numbers': []}], [5])
+    recommendations = result['recommendations']
+
+    assert (recommendations['pick4_3dan']['k'], recommendations['pick4_3dan']['bankers']) == (4, 3)
+    assert recommendations['pick4_3dan']['tickets'] == 77
+    assert (recommendations['pick5_4dan']['k'], recommendations['pick5_4dan']['bankers']) == (5, 4)
+    assert (recommendations['banker_codes']['k'], recommendations['banker_codes']['bankers']) == (4, 3)
+    assert recommendations['smart_pick5']['k'] == 5
+    assert recommendations['ml_pick7']['k'] == 7
+    assert recommendations['ml_pick7']['numbers'] == stored['ml_pick7']
+
+
+def test_missing_recommendations_are_generated_once(app, monkeypatch):
+    odds_table.configure(Config.PRIZE_TABLE, Config.TICKET_PRICE)
+    data = [{'period': str(2026100 - i), 'date': '2026-01-01',
+             'numbers': [str(n).zfill(2) for n in range(1 + i % 60, 21 + i % 60)]} for i in range(60)]
+    calls = []
+    generate = analyzer.generate_recommendations
+
+    def counting_generate(*args):
+        calls.append(1)
+        return generate(*args)
+
+    monkeypatch.setattr(analyzer, 'generate_recommendations', counting_generate)
+
+    first = analyzer.get_ticket_odds(data)
+    second = analyzer.get_ticket_odds(data)
+
+    assert len(calls) == 1
+    assert first['recommendations'] == second['recommendations']
+    assert first['recommendations']['pick4_3dan']['bankers'] == 3
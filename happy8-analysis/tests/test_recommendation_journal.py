@@ -0,0 +1,66 @@
+"""推荐记录写入队列：请求侧去重与写入失败后的重试"""
+import json
+
+import pytest
+
+from app.services.recommendation_journal import RecommendationJournal
+
+
+@pytest.fixture
+def journal(app, tmp_path):
+    app.config['RECOMMENDATIONS_FILE'] = tmp_path / 'recommendations_history.json'
+    app.config['RECOMMENDATION_JOURNAL_DELAY'] = 0
+    journal = RecommendationJournal()
+    journal.init_app(app)
+    return journal
+
+
+def saved(app):
+    with open(app.config['RECOMMENDATIONS_FILE'], 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_same_recommendation_is_queued_once(app, journal):
+    journal.record_recommendation('2026100', {'smart_pick5': ['01', '02']})
+    journal.record_recommendation('2026100', {'smart_pick5': ['01', '02']})
+    assert journal.flush(5)
+
+    assert journal.stats['events'] == 1
+    assert saved(app)['2026100']['recommendations'] == {'smart_pick5': ['01', '02']}
+
+
+def test_failed_write_allows_requeue(app, journal, monkeypatch):
+    apply = journal.apply
+    failures = [IOError('磁盘已满')]
+
+    def flaky_apply(events):
+        if failures:
+            raise failures.pop()
+        apply(events)
+
+    monkeypatch.setattr(journal, 'apply', flaky_apply)
+
+    journal.record_recommendation('2026100', {'smart_pick5': ['01', '02']})
+    assert journal.flush(5)
+    assert not (app.config['RECOMMENDATIONS_FILE']).exists()
+
+    # 写入失败的内容再次登记时重新入队
+    journal.record_recommendation('2026100', {'smart_pick5': ['01', '02']})
+    assert journal.flush(5)
+    assert saved(app)['2026100']['recommendations'] == {'smart_pick5': ['01', '02']}
+
+
+def test_failed_sync_write_allows_retry(app, tmp_path, monkeypatch):
+    journal = RecommendationJournal()
+
+    def failing_apply(events):
+        raise IOError('磁盘已满')
+
+    monkeypatch.setattr(journal, 'apply', failing_apply)
+    with pytest.raises(IOError):
+        journal.record_recommendation('2026100', {'smart_pick5': ['01', '02']})
+
+    monkeypatch.undo()
+    app.config['RECOMMENDATIONS_FILE'] = tmp_path / 'recommendations_history.json'
+    journal.record_recommendation('2026100', {'smart_pick5': ['01', '02']})
+    assert saved(app)['2026100']['recommendations'] == {'smart_pick5': ['01', '02']}
@@ -0,0 +1,77 @@
+"""/api/data 响应缓存：按数据文件签名失效，缓存文件数有界"""
+import csv
+import os
+
+import pytest
+
+from app.routes import register_routes
+from app.utils.history_writer import CSV_FIELDNAMES
+from app.utils.response_cache import ResponseCache, response_cache
+
+
+def write_history(path, offset):
+    """在原文件上直接改写 60 期数据（期号不变，号码随 offset 变化），模拟应用外的编辑"""
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_FIELDNAMES)
+        for i in range(60):
+            start = (i + offset) % 60
+            writer.writerow([str(2026160 - i), '2026-01-01'] + [str(n).zfill(2) for n in range(start + 1, start + 21)])
+
+
+@pytest.fixture
+def client(app, tmp_path):
+    register_routes(app)
+    response_cache.configure(shared_dir=tmp_path / 'response_cache', max_shared_files=4)
+    response_cache.invalidate()
+    yield app.test_client()
+    response_cache.configure()
+    response_cache.invalidate()
+
+
+def test_rewrite_with_same_periods_invalidates(app, client):
+    history_file = str(app.config['HISTORY_FILE'])
+    write_history(history_file, 0)
+    first = client.get('/api/data')
+    assert first.status_code == 200
+
+    write_history(history_file, 7)
+    # 期号和期数不变、文件 inode 不变，签名中的 mtime / size 仍会变化
+    os.utime(history_file, ns=(0, os.stat(history_file).st_mtime_ns + 1_000_000))
+    second = client.get('/api/data', headers={'If-None-Match': first.headers['ETag']})
+
+    assert second.status_code == 200
+    assert second.headers['ETag'] != first.headers['ETag']
+    assert second.get_json()['history'][0]['numbers'] != first.get_json()['history'][0]['numbers']
+
+
+def test_unchanged_data_answers_304(app, client):
+    write_history(str(app.config['HISTORY_FILE']), 0)
+    first = client.get('/api/data?limit=20')
+
+    second = client.get('/api/data?limit=20', headers={'If-None-Match': first.headers['ETag']})
+
+    assert second.status_code == 304
+
+
+def test_limit_is_clamped(app, client):
+    write_history(str(app.config['HISTORY_FILE']), 0)
+    app.config['DATA_MAX_LIMIT'] = 30
+
+    large = client.get('/api/data?limit=100000')
+    capped = client.get('/api/data?limit=30')
+
+    assert large.headers['ETag'] == capped.headers['ETag']
+    assert len(large.get_json()['history']) == 30
+
+
+def test_shared_files_are_capped(tmp_path):
+    shared_dir = tmp_path / 'shared'
+    cache = ResponseCache()
+    cache.configure(max_entries=2, shared_dir=shared_dir, max_shared_files=3)
+
+    for i in range(6):
+        cache.put(f'etag{i}', b'{}')
+        os.utime(shared_dir / f'etag{i}.json', ns=(i, i))
+
+    assert sorted(os.listdir(shared_dir)) == ['etag3.json', 'etag4.json', 'etag5.json']
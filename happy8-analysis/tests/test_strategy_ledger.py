@@ -0,0 +1,118 @@
+"""策略表现台账：增量记入、持久化格式和首次建立"""
+import json
+import threading
+
+import pytest
+
+from app.services import analyzer
+from app.services.strategy_ledger import StrategyLedger, strategy_ledger
+
+
+def validation(hit_count, size=5):
+    return {'smart_pick5': {'predicted': ['01'] * size, 'hit_count': hit_count}}
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    ledger = StrategyLedger()
+    ledger.configure(tmp_path / 'strategy_stats.json', (2, 3))
+    ledger.ensure(dict)
+    return ledger
+
+
+def test_saves_totals_and_last_period(ledger):
+    ledger.record({'2026100': validation(1), '2026101': validation(3)})
+
+    with open(ledger.ledger_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    assert 'validated' not in data
+    assert data['validated_periods'] == 2
+    assert data['last_validated'] == '2026101'
+    assert data['strategies']['smart_pick5']['hits'] == 4
+
+
+def test_periods_not_after_last_are_ignored(ledger):
+    assert ledger.record({'2026100': validation(1)}) == []
+    assert ledger.record({'2026100': validation(1), '2026099': validation(5)}) == ['2026099', '2026100']
+    assert ledger.record({'2026101': validation(2)}) == []
+
+    stats = ledger.stats()
+    assert stats['validated_periods'] == 2
+    assert stats['strategies'][0]['hits'] == 3
+    assert stats['strategies'][0]['last_period'] == '2026101'
+
+
+def test_other_process_sees_saved_totals(ledger):
+    ledger.record({'2026100': validation(1), '2026101': validation(2), '2026102': validation(3)})
+
+    other = StrategyLedger()
+    other.configure(ledger.ledger_file, (2, 3))
+    other.record({'2026102': validation(4), '2026103': validation(4)})
+
+    stats = ledger.stats()
+    assert stats['validated_periods'] == 4
+    summary = stats['strategies'][0]
+    assert summary['hits'] == 10
+    assert summary['windows']['2'] == {'periods': 2, 'hits': 7, 'hit_rate': 0.7, 'avg_hits': 3.5}
+
+
+def test_reads_legacy_validated_list(tmp_path):
+    ledger_file = tmp_path / 'strategy_stats.json'
+    ledger_file.write_text(json.dumps({
+        'windows': [2, 3],
+        'validated': ['2026100', '2026101'],
+        'strategies': {'smart_pick5': {'periods': 2, 'attempts': 10, 'hits': 3,
+                                       'histogram': {'1': 1, '2': 1},
+                                       'recent': [['2026101', 2, 5], ['2026100', 1, 5]]}}
+    }), encoding='utf-8')
+    ledger = StrategyLedger()
+    ledger.configure(ledger_file, (2, 3))
+
+    ledger.record({'2026101': validation(5), '2026102': validation(4)})
+
+    stats = ledger.stats()
+    assert stats['validated_periods'] == 3
+    assert stats['strategies'][0]['hits'] == 7
+
+
+def test_ensure_rebuilds_from_history(tmp_path):
+    history = {
+        '2026101': {'validation': validation(2)},
+        '2026100': {'validation': validation(1)},
+        '2026102': {'recommendations': {}}
+    }
+    ledger = StrategyLedger()
+    ledger.configure(tmp_path / 'rebuilt.json', (2, 3))
+    ledger.ensure(lambda: history)
+
+    stats = ledger.stats()
+    assert stats['validated_periods'] == 2
+    assert stats['strategies'][0]['last_period'] == '2026101'
+
+
+def test_journal_is_flushed_before_ledger_lock(app, tmp_path, monkeypatch):
+    app.config['RECOMMENDATIONS_FILE'] = tmp_path / 'recommendations_history.json'
+    strategy_ledger.configure(tmp_path / 'strategy_stats.json', (2, 3))
+    flushed_under_lock = []
+
+    def flush(timeout=None):
+        # 写入线程记入验证时需要台账锁：flush 时当前线程不能持有它
+        acquired = []
+
+        def probe():
+            acquired.append(strategy_ledger._lock.acquire(timeout=0.1))
+            if acquired[0]:
+                strategy_ledger._lock.release()
+
+        thread = threading.Thread(target=probe)
+        thread.start()
+        thread.join()
+        flushed_under_lock.append(not acquired[0])
+        return True
+
+    monkeypatch.setattr(analyzer.recommendation_journal, 'flush', flush)
+
+    stats = analyzer.get_strategy_stats()
+
+    assert stats['validated_periods'] == 0
+    assert flushed_under_lock == [False]
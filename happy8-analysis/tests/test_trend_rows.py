@@ -0,0 +1,32 @@
+"""走势图行数据：各行各单元格互不共享"""
+from app.services.analyzer import generate_trend_rows
+
+
+def make_data(count):
+    """count 期开奖数据（按期号倒序）"""
+    return [
+        {'period': str(2026100 - i), 'date': '2026-01-01',
+         'numbers': [str(n).zfill(2) for n in range(1 + i % 60, 21 + i % 60)]}
+        for i in range(count)
+    ]
+
+
+def test_cells_are_independent():
+    rows = generate_trend_rows(make_data(80), limit=5)
+
+    cells = [cell for row in rows for cell in row['data'].values()]
+    assert len({id(cell) for cell in cells}) == len(cells)
+
+    before = rows[1]['data'][1].copy()
+    rows[0]['data'][1]['hit'] = 'edited'
+    assert rows[1]['data'][1] == before
+
+
+def test_hit_is_zero_omission():
+    rows = generate_trend_rows(make_data(80), limit=5)
+
+    # 行按时间正序，最后一行为最新一期
+    assert rows[-1]['period'] == '2026100'
+    for number, cell in rows[-1]['data'].items():
+        assert cell['hit'] == (1 <= number <= 20)
+        assert cell['hit'] == (cell['omission'] == 0)